@@ -1,16 +1,28 @@
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from app.cache import Cache
 from app.config import settings
 from app.models import User
 
 security = HTTPBearer()
 
+# "<telegram_id>:<avlod>" -> User (get_current_user har so'rovda bazaga bormasligi uchun)
+user_cache = Cache(
+    "users",
+    ttl=settings.USER_CACHE_TTL,
+    maxsize=settings.USER_CACHE_SIZE,
+    dumps=lambda user: user.model_dump_json(),
+    loads=lambda raw: User.model_validate_json(raw),
+)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    from jose import jwt  # lazy: cold start'da import qilinmaydi
+    
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -22,6 +34,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 
 def verify_token(token: str) -> Optional[int]:
+    from jose import JWTError, jwt
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         telegram_id = payload.get("sub")
@@ -32,6 +46,34 @@ def verify_token(token: str) -> Optional[int]:
         return None
 
 
+async def get_user_by_telegram_id(telegram_id: int) -> Optional[User]:
+    """Foydalanuvchini keshdan yoki bazadan olish"""
+    # Kalit bazadan o'qishdan oldin: orada invalidate_user bo'lsa eski hujjat eski avlodga yoziladi
+    key = await user_cache.group_key(telegram_id)
+    user = await user_cache.get(key)
+    if user is None:
+        user = await User.find_one(User.telegram_id == telegram_id)
+        if user is not None:
+            await user_cache.set(key, user)
+    return user
+
+
+async def invalidate_user(telegram_id: int):
+    """Foydalanuvchi o'zgarganda keshdan o'chirish (barcha workerlarda)"""
+    await user_cache.bump(telegram_id)
+
+
+async def warm_user_cache() -> int:
+    """Faol foydalanuvchilarni keshga oldindan yuklash"""
+    users = await User.find(
+        User.is_active == True,
+        User.is_approved == True
+    ).limit(settings.USER_CACHE_SIZE).to_list()
+    for user in users:
+        await user_cache.set(await user_cache.group_key(user.telegram_id), user)
+    return len(users)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> User:
@@ -45,7 +87,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = await User.find_one(User.telegram_id == telegram_id)
+    user = await get_user_by_telegram_id(telegram_id)
     
     if user is None:
         raise HTTPException(
@@ -71,6 +113,14 @@ async def get_approved_user(current_user: User = Depends(get_current_user)) -> U
     return current_user
 
 
+async def verify_bot_token(x_bot_token: str = Header(default="")) -> None:
+    """Bot jarayonidan kelgan so'rovlar (X-Bot-Token = BOT_API_TOKEN)"""
+    if not settings.BOT_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Bot API sozlanmagan")
+    if not secrets.compare_digest(x_bot_token, settings.BOT_API_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Noto'g'ri bot tokeni")
+
+
 async def get_admin_user(current_user: User = Depends(get_approved_user)) -> User:
     """Only admin users can access"""
     if not current_user.is_admin:
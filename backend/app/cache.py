@@ -0,0 +1,428 @@
+"""
+Keshlar: har bir worker ichida TTLCache (L1), ixtiyoriy umumiy Redis (L2)
+va workerlar orasida invalidatsiya shinasi.
+
+    CACHE_BACKEND=memory | redis
+    CACHE_INVALIDATION=none | redis | mongo
+
+`Cache.delete()` lokal L1 ni, Redis L2 ni tozalaydi va boshqa workerlarga
+xabar yuboradi - ular o'z L1 keshlaridan o'chiradi.
+
+Kalitlar guruhi (masalan hodimning barcha hisobotlari) o'chirilmaydi -
+`Cache.bump(*groups)` guruhlar avlodini oshiradi (Redis da bitta pipeline
+INCR, shinaga bitta xabar) va
+`group_key()` yangi kalitlar beradi; eskilari TTL/LRU bilan o'ladi. Kalit
+ma'lumot o'qilishidan oldin olinadi, shuning uchun o'qish va `set` orasida
+bump bo'lsa, eski qiymat hech kim o'qimaydigan eski avlodga yoziladi.
+Shina ulanishi uzilib qayta ulansa, xabarlar yo'qolgan bo'lishi mumkinligi
+uchun barcha L1 keshlar tozalanadi.
+
+Shu shina orqali kichik hodisalar ham yuboriladi (`publish_event` /
+`subscribe`), masalan yangi ping haqida long-poll kutayotgan workerlarga.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Shu jarayon yuborgan xabarlarni qayta qo'llamaslik uchun
+WORKER_ID = uuid.uuid4().hex
+
+# namespace -> Cache (invalidatsiya xabarlari shu orqali yetkaziladi)
+_registry: Dict[str, "Cache"] = {}
+
+# topic -> hodisa qabul qiluvchilar (publish_event)
+_listeners: Dict[str, List[Callable[[dict], None]]] = defaultdict(list)
+
+
+class TTLCache:
+    """Oddiy in-process kesh: har bir yozuv `ttl` sekund yashaydi, `maxsize` dan oshsa eng eskisi chiqariladi"""
+
+    def __init__(self, ttl: float, maxsize: Optional[int] = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend:
+    """Umumiy L2 kesh. Redis ishlamasa xatolar loglanadi va kesh 'miss' deb hisoblanadi"""
+
+    def __init__(self, url: str, prefix: str):
+        from redis import asyncio as aioredis  # ixtiyoriy bog'liqlik
+
+        self.redis = aioredis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        try:
+            return await self.redis.get(self._key(namespace, key))
+        except Exception as e:
+            logger.warning("Redis cache get failed: %s", e)
+            return None
+
+    async def set(self, namespace: str, key: str, value: str, ttl: float) -> None:
+        try:
+            await self.redis.set(self._key(namespace, key), value, ex=max(int(ttl), 1))
+        except Exception as e:
+            logger.warning("Redis cache set failed: %s", e)
+
+    async def delete(self, namespace: str, key: str) -> None:
+        try:
+            await self.redis.delete(self._key(namespace, key))
+        except Exception as e:
+            logger.warning("Redis cache delete failed: %s", e)
+
+    async def get_generation(self, namespace: str, group: str) -> Optional[int]:
+        try:
+            raw = await self.redis.get(self._key(namespace, f"gen:{group}"))
+        except Exception as e:
+            logger.warning("Redis cache generation get failed: %s", e)
+            return None
+        return int(raw) if raw is not None else 0
+
+    async def incr_generations(self, namespace: str, groups: List[str]) -> List[Optional[int]]:
+        # TTL siz: avlod faqat o'sadi, aks holda eski avlod kalitlari qayta ishlatilishi mumkin
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for group in groups:
+                    pipe.incr(self._key(namespace, f"gen:{group}"))
+                return await pipe.execute()
+        except Exception as e:
+            logger.warning("Redis cache generation incr failed: %s", e)
+            return [None] * len(groups)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+class InvalidationBus:
+    """Invalidatsiya o'chirilgan (bitta worker) - xabarlar hech qayerga yuborilmaydi"""
+
+    async def publish(self, message: dict) -> None:
+        pass
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class _ListeningBus(InvalidationBus, ABC):
+    """Fonda xabarlarni tinglaydi, uzilishda qayta ulanadi"""
+
+    name = ""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        connected_before = False
+        while True:
+            try:
+                async for message in self._listen():
+                    if message is None:
+                        # Obuna tayyor: qayta ulanishda yo'qolgan xabarlar o'rniga hammasini tozalash
+                        if connected_before:
+                            clear_local_caches()
+                        connected_before = True
+                        continue
+                    apply_invalidation(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Cache invalidation bus (%s) disconnected: %s", self.name, e)
+            await asyncio.sleep(1)
+
+    @abstractmethod
+    def _listen(self) -> AsyncIterator[Optional[dict]]:
+        """Xabarlar oqimi; obuna tayyor bo'lganda avval None beriladi"""
+
+
+class RedisInvalidationBus(_ListeningBus):
+    name = "redis"
+
+    def __init__(self, url: str, channel: str):
+        super().__init__()
+        from redis import asyncio as aioredis
+
+        self.redis = aioredis.from_url(url)
+        self.channel = channel
+
+    async def publish(self, message: dict) -> None:
+        try:
+            await self.redis.publish(self.channel, json.dumps(message))
+        except Exception as e:
+            logger.warning("Cache invalidation publish failed: %s", e)
+
+    async def _listen(self):
+        pubsub = self.redis.pubsub()
+        try:
+            await pubsub.subscribe(self.channel)
+            yield None
+            async for item in pubsub.listen():
+                if item["type"] == "message":
+                    yield json.loads(item["data"])
+        finally:
+            await pubsub.aclose()
+
+    async def stop(self) -> None:
+        await super().stop()
+        await self.redis.aclose()
+
+
+class MongoInvalidationBus(_ListeningBus):
+    """
+    Change stream orqali (replica set / Atlas kerak). Xabarlar
+    `cache_invalidations` kolleksiyasiga yoziladi va TTL indeks bilan o'chadi.
+    """
+
+    name = "mongo"
+    COLLECTION = "cache_invalidations"
+    EXPIRE_SECONDS = 3600
+
+    def _collection(self):
+        from app import database
+        return database.client[settings.DB_NAME][self.COLLECTION]
+
+    async def publish(self, message: dict) -> None:
+        try:
+            await self._collection().insert_one({**message, "created_at": datetime.utcnow()})
+        except Exception as e:
+            logger.warning("Cache invalidation publish failed: %s", e)
+
+    async def _listen(self):
+        collection = self._collection()
+        await collection.create_index("created_at", expireAfterSeconds=self.EXPIRE_SECONDS)
+        async with collection.watch([{"$match": {"operationType": "insert"}}]) as stream:
+            yield None
+            async for change in stream:
+                doc = change["fullDocument"]
+                yield {k: doc.get(k) for k in ("origin", "namespace", "key", "groups", "generations", "topic", "data")}
+
+
+_backend: Optional[RedisBackend] = None
+_bus: Optional[InvalidationBus] = None
+
+
+def get_backend() -> Optional[RedisBackend]:
+    global _backend
+    if _backend is None and settings.CACHE_BACKEND == "redis":
+        _backend = RedisBackend(settings.REDIS_URL, settings.CACHE_KEY_PREFIX)
+    return _backend
+
+
+def get_bus() -> InvalidationBus:
+    global _bus
+    if _bus is None:
+        if settings.CACHE_INVALIDATION == "redis":
+            _bus = RedisInvalidationBus(settings.REDIS_URL, f"{settings.CACHE_KEY_PREFIX}:invalidate")
+        elif settings.CACHE_INVALIDATION == "mongo":
+            _bus = MongoInvalidationBus()
+        else:
+            _bus = InvalidationBus()
+    return _bus
+
+
+class Cache:
+    """
+    Nomlangan kesh: L1 (TTLCache) + ixtiyoriy Redis L2. Kalitlar str ga
+    aylantiriladi; `dumps`/`loads` faqat Redis uchun ishlatiladi.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        maxsize: Optional[int] = None,
+        dumps: Callable[[Any], str] = json.dumps,
+        loads: Callable[[bytes], Any] = json.loads,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = TTLCache(ttl, maxsize)
+        # group -> avlod (shu workerda ma'lum bo'lgani; hajmi guruhlar soni bilan cheklangan)
+        self.generations: Dict[str, int] = {}
+        self.dumps = dumps
+        self.loads = loads
+        _registry[namespace] = self
+
+    async def get(self, key: Hashable) -> Any:
+        key = str(key)
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        backend = get_backend()
+        if backend is None:
+            return None
+        raw = await backend.get(self.namespace, key)
+        if raw is None:
+            return None
+        value = self.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    async def set(self, key: Hashable, value: Any) -> None:
+        key = str(key)
+        self.local.set(key, value)
+        backend = get_backend()
+        if backend is not None:
+            await backend.set(self.namespace, key, self.dumps(value), self.ttl)
+
+    async def delete(self, key: Hashable) -> None:
+        key = str(key)
+        self.local.delete(key)
+        backend = get_backend()
+        if backend is not None:
+            await backend.delete(self.namespace, key)
+        await get_bus().publish({"origin": WORKER_ID, "namespace": self.namespace, "key": key})
+
+    async def group_key(self, group: Hashable, *parts: Hashable) -> str:
+        """`group` ning joriy avlodi bilan kalit - ma'lumotni o'qishdan oldin olinadi"""
+        group = str(group)
+        generation = self.generations.get(group)
+        if generation is None:
+            backend = get_backend()
+            generation = await backend.get_generation(self.namespace, group) if backend is not None else 0
+            if generation is None:
+                # Redis javob bermadi - keshlanmaydigan (hech kim o'qimaydigan) kalit
+                return ":".join([group, f"nocache-{uuid.uuid4().hex}", *map(str, parts)])
+            generation = max(generation, self.generations.get(group, 0))
+            self.generations[group] = generation
+        return ":".join([group, str(generation), *map(str, parts)])
+
+    async def bump(self, *groups: Hashable) -> None:
+        """Guruhlardagi barcha kalitlarni eskirtirish (skan va o'chirishsiz)"""
+        groups = [str(group) for group in groups]
+        if not groups:
+            return
+        backend = get_backend()
+        generations = await backend.incr_generations(self.namespace, groups) if backend is not None else [None] * len(groups)
+        for group, generation in zip(groups, generations):
+            self.bump_local(group, generation)
+        await get_bus().publish(
+            {"origin": WORKER_ID, "namespace": self.namespace, "groups": groups, "generations": generations}
+        )
+
+    def bump_local(self, group: str, generation: Optional[int] = None) -> None:
+        # Redis bo'lsa - umumiy avlod, bo'lmasa har bir worker o'z hisoblagichini oshiradi
+        current = self.generations.get(group, 0)
+        self.generations[group] = max(current, generation) if generation is not None else current + 1
+
+    def reset_local(self) -> None:
+        self.local.clear()
+        if get_backend() is not None:
+            # Avlodlar Redis dan qayta o'qiladi; xotira rejimida ular saqlanadi (kamaymasligi kerak)
+            self.generations.clear()
+
+    def __len__(self) -> int:
+        return len(self.local)
+
+
+def apply_invalidation(message: dict) -> None:
+    """Boshqa workerdan kelgan xabar bo'yicha L1 keshni tozalash"""
+    if message.get("origin") == WORKER_ID:
+        return
+    if message.get("topic") is not None:
+        _dispatch(message["topic"], message.get("data") or {})
+        return
+    cache = _registry.get(message.get("namespace"))
+    if cache is None:
+        return
+    if message.get("key") is not None:
+        cache.local.delete(message["key"])
+    elif message.get("groups") is not None:
+        for group, generation in zip(message["groups"], message.get("generations") or [None] * len(message["groups"])):
+            cache.bump_local(group, generation)
+
+
+def subscribe(topic: str, callback: Callable[[dict], None]) -> None:
+    """Hodisa qabul qiluvchini ro'yxatdan o'tkazish (callback sinxron va tez bo'lishi kerak)"""
+    _listeners[topic].append(callback)
+
+
+def _dispatch(topic: str, data: dict) -> None:
+    for callback in _listeners.get(topic, ()):
+        try:
+            callback(data)
+        except Exception:
+            logger.exception("Event listener failed for %s", topic)
+
+
+async def publish_event(topic: str, data: dict) -> None:
+    """Hodisani shu workerdagi va (shina bo'lsa) boshqa workerlardagi qabul qiluvchilarga yetkazish"""
+    _dispatch(topic, data)
+    await get_bus().publish({"origin": WORKER_ID, "topic": topic, "data": data})
+
+
+def clear_local_caches() -> None:
+    for cache in _registry.values():
+        cache.reset_local()
+
+
+async def start_cache():
+    """Invalidatsiya shinasini ishga tushirish (lifespan da)"""
+    await get_bus().start()
+
+
+async def stop_cache():
+    global _backend, _bus
+    if _bus is not None:
+        await _bus.stop()
+        _bus = None
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
@@ -0,0 +1,131 @@
+"""
+API JSON javoblari uchun gzip/brotli siqish (Accept-Encoding bo'yicha)
+"""
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.static_files import brotli, parse_accept_encoding
+
+
+class CompressionMiddleware:
+    """
+    `application/json` (va NDJSON oqim) javoblarni `minimum_size` baytdan katta bo'lsa siqadi.
+    Allaqachon siqilgan (static manifest) javoblarga tegmaydi.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = parse_accept_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and accepted.get("br", 0) > 0:
+            encoding = "br"
+        elif accepted.get("gzip", 0) > 0:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """
+    Body `minimum_size` gacha buferlanadi: javob undan kichik bo'lsa o'zgarishsiz,
+    katta bo'lsa qolgan qismlar oqim sifatida siqiladi (BaseHTTPMiddleware
+    javoblari ham bir nechta `http.response.body` xabarida keladi).
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Message = None
+        self.eligible = False
+        self.started = False
+        self.buffer = b""
+        self.compressor = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.eligible = (
+                headers.get("content-type", "").startswith(("application/json", "application/x-ndjson"))
+                and "content-encoding" not in headers
+            )
+            if not self.eligible:
+                await self._send(message)
+            else:
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or not self.eligible:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            await self._send({
+                "type": "http.response.body",
+                "body": self.compressor.compress(body, final=not more_body),
+                "more_body": more_body,
+            })
+            return
+
+        self.buffer += body
+        if len(self.buffer) < self.middleware.minimum_size:
+            if more_body:
+                return
+            # Kichik javob - siqmasdan yuboriladi
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            await self._send(self.start_message)
+            await self._send({"type": "http.response.body", "body": self.buffer})
+            return
+
+        self.compressor = _StreamCompressor(self.encoding, self.middleware)
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        headers["Content-Encoding"] = self.encoding
+        if "etag" in headers and not headers["etag"].startswith("W/"):
+            # Siqilgan variant boshqa baytlar - ETag ham farqlanadi
+            headers["ETag"] = headers["etag"][:-1] + f'-{self.encoding}"'
+
+        data = self.compressor.compress(self.buffer, final=not more_body)
+        self.buffer = b""
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(data))
+        await self._send(self.start_message)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str, middleware: CompressionMiddleware):
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=middleware.brotli_quality)
+            self._zlib = None
+        else:
+            self._br = None
+            # wbits=31 - gzip sarlavhasi bilan
+            self._zlib = zlib.compressobj(middleware.gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self._br is not None:
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
@@ -0,0 +1,110 @@
+"""
+Hisobot va tarix endpointlari uchun conditional GET (ETag / Last-Modified).
+
+Validator'lar bitta kichik aggregation bilan olinadi (yozuvlar soni va
+oxirgi o'zgarish vaqti), shuning uchun o'zgarmagan oraliq uchun hujjatlar
+o'qilmaydi va serializatsiya qilinmaydi - `304 Not Modified` qaytadi.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+from app.models import DailyWorkRecord, LocationLog
+from app.services import archive_service
+from app.timezone import day_bounds_utc
+from app.static_files import etag_matches
+
+# Javob formati o'zgarganda oshiring - eski ETag'lar yaroqsiz bo'ladi
+VALIDATOR_VERSION = "1"
+
+
+class Validators:
+    def __init__(self, etag: str, last_modified: Optional[datetime]):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @classmethod
+    def build(cls, *parts, count: int, last_modified: Optional[datetime]) -> "Validators":
+        raw = "|".join(str(p) for p in (VALIDATOR_VERSION, *parts, count, last_modified and last_modified.isoformat()))
+        return cls('"' + hashlib.sha1(raw.encode()).hexdigest() + '"', last_modified)
+
+    def variant(self, name: str) -> "Validators":
+        """Boshqa ko'rinish (masalan NDJSON) - baytlar boshqa, ETag ham farqlanadi"""
+        return Validators(self.etag[:-1] + f'-{name}"', self.last_modified)
+
+    def to_dict(self) -> dict:
+        return {
+            "etag": self.etag,
+            "last_modified": self.last_modified.isoformat() if self.last_modified else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Validators":
+        last_modified = data.get("last_modified")
+        return cls(data["etag"], datetime.fromisoformat(last_modified) if last_modified else None)
+
+    def headers(self) -> dict:
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(
+                self.last_modified.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True
+            )
+        return headers
+
+    def apply(self, response: Response) -> None:
+        response.headers.update(self.headers())
+
+    def not_modified(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            return etag_matches(if_none_match, self.etag)
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is not None:
+                since = since.astimezone(timezone.utc).replace(tzinfo=None)
+            return self.last_modified.replace(microsecond=0) <= since
+        return False
+
+    def not_modified_response(self) -> Response:
+        return Response(status_code=304, headers=self.headers())
+
+
+async def _aggregate_validators(collection, match: dict, last_field) -> tuple:
+    pipeline = [
+        {"$match": match},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "last": {"$max": last_field}}},
+    ]
+    result = await collection.aggregate(pipeline).to_list(length=1)
+    if not result:
+        return 0, None
+    return result[0]["count"], result[0]["last"]
+
+
+async def daily_records_validators(user_id: str, start_date: str, end_date: str) -> Validators:
+    """DailyWorkRecord oralig'i uchun ETag/Last-Modified (updated_at, bo'lmasa created_at)"""
+    count, last = await _aggregate_validators(
+        DailyWorkRecord.get_motor_collection(),
+        {"user_id": user_id, "date": {"$gte": start_date, "$lte": end_date}},
+        {"$ifNull": ["$updated_at", "$created_at"]},
+    )
+    return Validators.build("daily", user_id, start_date, end_date, count=count, last_modified=last)
+
+
+async def location_logs_validators(user_id: str, date_str: str) -> Validators:
+    """Bir kunlik LocationLog uchun ETag/Last-Modified (oxirgi timestamp + arxiv fayli)"""
+    count, last = await _aggregate_validators(
+        LocationLog.get_motor_collection(),
+        {"user_id": user_id, "day": date_str},
+        "$timestamp",
+    )
+    day_start, day_end = day_bounds_utc(datetime.strptime(date_str, "%Y-%m-%d").date())
+    archive = await archive_service.archive_signature(user_id, day_start, day_end)
+    return Validators.build("locations", user_id, date_str, archive, count=count, last_modified=last)
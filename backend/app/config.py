@@ -10,6 +10,7 @@ class Settings(BaseSettings):
     # Telegram
     BOT_TOKEN: str = ""
     ADMIN_IDS: str = ""
+    BOT_API_TOKEN: str = ""  # bot -> API so'rovlari uchun umumiy maxfiy kalit (X-Bot-Token)
     
     # JWT
     SECRET_KEY: str = "change-this-secret-key-in-production"
@@ -20,12 +21,82 @@ class Settings(BaseSettings):
     FRONTEND_URL: str = "http://localhost:5173"
     ALLOWED_ORIGINS: str = ""
     
+    # Tashkilot vaqt zonasi (kun chegaralari, ish soatlari)
+    TIMEZONE: str = "Asia/Tashkent"
+    
+    # Startup
+    INDEX_SYNC: str = "startup"  # startup | background | manual (python -m app.manage sync-indexes)
+    WARM_CACHES: bool = True
+    
+    # Keshlar
+    CACHE_BACKEND: str = "memory"  # memory | redis (workerlar orasida umumiy L2)
+    CACHE_INVALIDATION: str = "none"  # none | redis (pub/sub) | mongo (change stream)
+    REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_KEY_PREFIX: str = "hr_tracker"
+    SETTINGS_CACHE_TTL: int = 60  # sekund
+    USER_CACHE_TTL: int = 60  # sekund
+    USER_CACHE_SIZE: int = 10000
+    REPORT_CACHE_TTL: int = 300  # sekund
+    REPORT_CACHE_SIZE: int = 5000
+    
+    # work_end_hour dan keyin shuncha soat pinglar qabul qilinadi (qo'shimcha ish, tabelda overtime_hours; 0 - yo'q)
+    OVERTIME_MAX_HOURS: int = 4
+    
+    # Kelmagan pinglar uchun bot orqali ogohlantirish
+    MISSED_PING_ALERTS: bool = False
+    MISSED_PING_NOTIFY_ADMINS: bool = False
+    MISSED_PING_WORKDAYS: str = "0,1,2,3,4"  # 0 - dushanba
+    MISSED_PING_HOLIDAYS: str = ""  # YYYY-MM-DD,YYYY-MM-DD (bayramlar)
+    
+    # Eski pinglar arxivi (Arrow IPC, bo'sh - o'chirilgan)
+    ARCHIVE_DIR: str = ""
+    ARCHIVE_COMPRESSION: str = "zstd"  # zstd | lz4 | none (none - memory map nusxasiz)
+    ARCHIVE_KEEP_MONTHS: int = 3  # shuncha oxirgi oy MongoDB da qoladi
+    
+    # Pinglarning ishonchliligi (tezlik/aniqlik tekshiruvi)
+    PLAUSIBILITY_MODE: str = "flag"  # flag (yoziladi, belgilanadi) | reject (yozilmaydi)
+    PING_MAX_SPEED_KMH: float = 150
+    PING_MAX_ACCURACY_METERS: float = 500
+    PLAUSIBILITY_CACHE_SIZE: int = 50000  # oxirgi nuqtasi xotirada saqlanadigan hodimlar
+    
+    # /locations/today/wait uchun eng uzoq kutish
+    LONG_POLL_MAX_SECONDS: int = 30
+    
+    # Fon hisobot vazifalari (natijalar GridFS da)
+    REPORT_JOB_WORKERS: int = 2  # bir workerdagi parallel vazifalar
+    REPORT_JOB_TIMEOUT: int = 600  # sekund
+    REPORT_JOB_TTL_HOURS: int = 24  # natija shuncha saqlanadi
+    
+    # Davriy vazifalar: workerlar orasida bitta leader (MongoDB lease)
+    SCHEDULER_ENABLED: bool = True  # false - bu jarayon leader bo'lmaydi
+    SCHEDULER_LEASE_SECONDS: int = 30  # leader o'lsa shuncha vaqtda boshqasi oladi
+    
+    # API javoblarini siqish (gzip/brotli)
+    COMPRESSION_MIN_SIZE: int = 1024  # bayt
+    
+    # Profiling (faqat adminlar uchun, X-Profile sarlavhasi bilan)
+    PROFILING_ENABLED: bool = False
+    PROFILE_HEADER: str = "X-Profile"
+    PROFILE_INTERVAL: float = 0.001  # sekund
+    PROFILE_DIR: str = ""
+    
+    # Slow query log (0 - o'chirilgan)
+    SLOW_QUERY_MS: int = 200
+    
     @property
     def admin_ids_list(self) -> List[int]:
         if not self.ADMIN_IDS:
             return []
         return [int(id.strip()) for id in self.ADMIN_IDS.split(",") if id.strip()]
     
+    @property
+    def missed_ping_workdays(self) -> List[int]:
+        return [int(day.strip()) for day in self.MISSED_PING_WORKDAYS.split(",") if day.strip()]
+    
+    @property
+    def missed_ping_holidays(self) -> List[str]:
+        return [day.strip() for day in self.MISSED_PING_HOLIDAYS.split(",") if day.strip()]
+    
     @property
     def cors_origins(self) -> List[str]:
         origins = [self.FRONTEND_URL]
@@ -1,25 +1,67 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
+from beanie.odm.utils.init import Initializer
 from app.config import settings
+from app.profiling import SlowQueryListener
 
 client: AsyncIOMotorClient = None
+_deferred_indexes: "_DeferredIndexInitializer" = None
 
 
-async def init_db():
+class _DeferredIndexInitializer(Initializer):
+    """init_beanie bilan bir xil, lekin indekslarni yaratish keyinga qoldiriladi"""
+
+    def __init__(self, *args, **kwargs):
+        self.deferred = []
+        super().__init__(*args, **kwargs)
+
+    async def init_indexes(self, cls, allow_index_dropping: bool = False):
+        self.deferred.append(cls)
+
+    async def sync_indexes(self):
+        for cls in self.deferred:
+            await Initializer.init_indexes(self, cls, self.allow_index_dropping)
+        self.deferred = []
+
+
+def get_document_models() -> list:
+    from app.models import (
+        User, LocationLog, DailyWorkRecord, FlaggedLocation, Office, ReportJob, SchedulerLease, ScheduledJob, Settings
+    )
+    return [User, LocationLog, DailyWorkRecord, FlaggedLocation, Office, ReportJob, SchedulerLease, ScheduledJob, Settings]
+
+
+async def init_db(sync_indexes: bool = True):
     """MongoDB ga ulanish va Beanie ni ishga tushirish"""
-    global client
+    global client, _deferred_indexes
     
-    from app.models import User, LocationLog, DailyWorkRecord, Settings
+    event_listeners = []
+    if settings.SLOW_QUERY_MS > 0:
+        event_listeners.append(SlowQueryListener(settings.SLOW_QUERY_MS))
     
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=event_listeners)
     
-    await init_beanie(
-        database=client[settings.DB_NAME],
-        document_models=[User, LocationLog, DailyWorkRecord, Settings]
-    )
+    if sync_indexes:
+        await init_beanie(
+            database=client[settings.DB_NAME],
+            document_models=get_document_models()
+        )
+    else:
+        # Indekslar sync_deferred_indexes() yoki `python -m app.manage sync-indexes` orqali
+        _deferred_indexes = _DeferredIndexInitializer(
+            database=client[settings.DB_NAME],
+            document_models=get_document_models()
+        )
+        await _deferred_indexes
     print(f"✅ MongoDB ga ulandi: {settings.DB_NAME}")
 
 
+async def sync_deferred_indexes():
+    """init_db(sync_indexes=False) dan keyin qoldirilgan indekslarni yaratish"""
+    if _deferred_indexes is not None:
+        await _deferred_indexes.sync_indexes()
+
+
 async def close_db():
     """MongoDB ulanishini yopish"""
     global client
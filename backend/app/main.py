@@ -1,19 +1,87 @@
-from fastapi import FastAPI
+from app.startup import startup_timer
+
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 import os
 
+from app import telegram
+from app.auth import get_admin_user
+from app.cache import start_cache, stop_cache
 from app.config import settings
-from app.database import init_db
-from app.routers import auth, users, locations, reports, settings as settings_router
+from app.database import init_db, close_db, sync_deferred_indexes
+from app.periodic import register as register_periodic
+from app.compression import CompressionMiddleware
+from app.profiling import ProfilingMiddleware
+from app.scheduler import scheduler
+from app.static_files import StaticManifest
+from app.routers import auth, bot, users, locations, reports, report_jobs, offices, settings as settings_router
+
+logger = logging.getLogger(__name__)
+
+
+async def _run_background(name: str, coro):
+    """Startup'ni bloklamaydigan fon vazifasi, holati /api/health/startup da"""
+    startup_timer.set_status(name, "running")
+    try:
+        result = await coro
+    except Exception as e:
+        startup_timer.set_status(name, f"failed: {e}")
+        logger.exception("Background startup task failed: %s", name)
+        return
+    startup_timer.mark(name)
+    startup_timer.set_status(name, "done" if result is None else f"done ({result})")
+
+
+async def _warm_caches():
+    from app.auth import warm_user_cache
+    from app.services import settings_service
+    
+    settings_count = await settings_service.warm_cache()
+    users_count = await warm_user_cache()
+    return f"{settings_count} settings, {users_count} users"
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_db()
+    startup_timer.mark("imports")
+    await init_db(sync_indexes=settings.INDEX_SYNC == "startup")
+    startup_timer.mark("init_db")
+    await start_cache()
+    
+    tasks = []
+    if settings.INDEX_SYNC == "background":
+        tasks.append(asyncio.create_task(_run_background("index_sync", sync_deferred_indexes())))
+    if settings.WARM_CACHES:
+        tasks.append(asyncio.create_task(_run_background("warm_caches", _warm_caches())))
+    if static_manifest is not None:
+        # Build'da tayyorlanmagan .br/.gz variantlar - event loop'dan tashqarida
+        tasks.append(asyncio.create_task(
+            _run_background("static_precompress", asyncio.to_thread(static_manifest.precompress))
+        ))
+    if settings.SCHEDULER_ENABLED:
+        # Davriy vazifalar va ping monitor - faqat lease egasi (leader) workerda
+        register_periodic(scheduler)
+        scheduler.start()
+    if settings.REPORT_JOB_WORKERS > 0:
+        from app.services.job_service import job_runner
+        job_runner.start()
+    
+    startup_timer.mark("ready")
+    print(f"🚀 Startup: {startup_timer.summary()} (INDEX_SYNC={settings.INDEX_SYNC})")
     yield
+    
+    for task in tasks:
+        task.cancel()
+    await scheduler.stop()
+    if settings.REPORT_JOB_WORKERS > 0:
+        from app.services.job_service import job_runner
+        await job_runner.stop()
+    await stop_cache()
+    await telegram.close()
+    await close_db()
 
 
 app = FastAPI(
@@ -23,6 +91,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Profiling va slow query logi uchun marshrut konteksti
+app.add_middleware(ProfilingMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -32,12 +103,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# JSON javoblarni siqish
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
 # API Routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
 app.include_router(locations.router, prefix="/api")
 app.include_router(reports.router, prefix="/api")
+app.include_router(report_jobs.router, prefix="/api")
+app.include_router(offices.router, prefix="/api")
 app.include_router(settings_router.router, prefix="/api")
+app.include_router(bot.router, prefix="/api")
 
 
 @app.get("/api/health")
@@ -45,6 +122,18 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/api/health/startup")
+async def health_startup():
+    """Cold start bosqichlari vaqti (ms) va fon vazifalari holati"""
+    return startup_timer.report()
+
+
+@app.get("/api/health/scheduler", dependencies=[Depends(get_admin_user)])
+async def health_scheduler():
+    """Admin: leader, heartbeat va davriy vazifalarning oxirgi natijasi"""
+    return await scheduler.status()
+
+
 @app.get("/")
 async def root():
     return {"message": "HR-Tracker V2 API", "status": "running"}
@@ -52,18 +141,23 @@ async def root():
 
 # Serve static frontend files if they exist (for combined deployment)
 STATIC_DIR = os.path.join(os.path.dirname(__file__), "..", "static")
+static_manifest = None
 if os.path.exists(STATIC_DIR):
-    app.mount("/assets", StaticFiles(directory=os.path.join(STATIC_DIR, "assets")), name="assets")
+    # Fayllar bir marta xotiraga o'qiladi - so'rovlarda fayl tizimi tekshirilmaydi
+    static_manifest = StaticManifest(STATIC_DIR)
+    static_manifest.load()
     
     @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
+    async def serve_spa(full_path: str, request: Request):
         # Don't serve for API routes
         if full_path.startswith("api/"):
             return {"error": "Not found"}
         
-        file_path = os.path.join(STATIC_DIR, full_path)
-        if os.path.exists(file_path) and os.path.isfile(file_path):
-            return FileResponse(file_path)
+        asset = static_manifest.get(full_path)
+        if asset is None:
+            if full_path.startswith("assets/") or static_manifest.index is None:
+                return Response(status_code=404)
+            # SPA fallback - serve index.html
+            asset = static_manifest.index
         
-        # SPA fallback - serve index.html
-        return FileResponse(os.path.join(STATIC_DIR, "index.html"))
+        return static_manifest.response(request, asset)
@@ -0,0 +1,228 @@
+"""
+HR-Tracker V2 - texnik xizmat buyruqlari
+
+    cd backend
+    python -m app.manage sync-indexes
+    python -m app.manage backfill-geo --batch-size 5000
+    python -m app.manage backfill-day --batch-size 5000
+    python -m app.manage backfill-search
+    python -m app.manage archive [--month 2024-03]
+    python -m app.manage recompute --start 2024-03-01 --end 2024-03-31 [--user-id ...]
+    python -m app.manage timesheet --year 2024 --month 3 [--csv tabel.csv]
+    python -m app.manage precompress-static [--dir static]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from app.database import init_db, close_db, sync_deferred_indexes
+
+
+async def sync_indexes(args):
+    """Barcha kolleksiyalar uchun indekslarni tekshirish va yaratish"""
+    started = time.perf_counter()
+    await init_db(sync_indexes=True)
+    print(f"✅ Indekslar sinxronlandi ({time.perf_counter() - started:.2f}s)")
+
+
+async def missing_field_batches(collection, field: str, batch_size: int):
+    """
+    `field` i yo'q hujjatlar ID lari partiyalab, `_id` bo'yicha keyset: har bir
+    partiya oldingisining oxiridan davom etadi (to'ldirilganlar qayta skan qilinmaydi).
+    """
+    last_id = None
+    while True:
+        query = {field: None}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        ids = [doc["_id"] async for doc in collection.find(query, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+        if not ids:
+            return
+        last_id = ids[-1]
+        yield ids
+
+
+async def backfill_geo(args):
+    """Eski pinglarga GeoJSON `location` maydonini qo'shish (2dsphere so'rovlari uchun)"""
+    from app.models import LocationLog
+    
+    started = time.perf_counter()
+    # Indeks backfill'dan keyin quriladi - har bir yangilanishda indeks yozilmaydi
+    await init_db(sync_indexes=False)
+    collection = LocationLog.get_motor_collection()
+    
+    total = 0
+    async for ids in missing_field_batches(collection, "location", args.batch_size):
+        result = await collection.update_many(
+            {"_id": {"$in": ids}},
+            [{"$set": {"location": {"type": "Point", "coordinates": ["$longitude", "$latitude"]}}}]
+        )
+        total += result.modified_count
+        print(f"  {total:,} ta ping yangilandi")
+    
+    await sync_deferred_indexes()
+    print(f"✅ GeoJSON backfill: {total:,} ta ping ({time.perf_counter() - started:.1f}s)")
+
+
+async def backfill_day(args):
+    """Eski pinglarga mahalliy kun kaliti `day` ni qo'shish (TIMEZONE bo'yicha)"""
+    from app.config import settings
+    from app.models import LocationLog
+    
+    started = time.perf_counter()
+    await init_db(sync_indexes=False)
+    collection = LocationLog.get_motor_collection()
+    
+    total = 0
+    async for ids in missing_field_batches(collection, "day", args.batch_size):
+        result = await collection.update_many(
+            {"_id": {"$in": ids}},
+            [{"$set": {"day": {"$dateToString": {
+                "format": "%Y-%m-%d", "date": "$timestamp", "timezone": settings.TIMEZONE
+            }}}}]
+        )
+        total += result.modified_count
+        print(f"  {total:,} ta ping yangilandi")
+    
+    await sync_deferred_indexes()
+    print(f"✅ Kun kaliti backfill: {total:,} ta ping ({time.perf_counter() - started:.1f}s)")
+
+
+async def backfill_search(args):
+    """Foydalanuvchilarga `search_tokens`/`search_prefixes` (qidiruv indeksi uchun) qo'shish"""
+    from app.services.user_service import backfill_search_tokens
+    
+    started = time.perf_counter()
+    await init_db(sync_indexes=False)
+    total = await backfill_search_tokens(batch_size=args.batch_size)
+    await sync_deferred_indexes()
+    print(f"✅ Qidiruv tokenlari: {total:,} ta foydalanuvchi ({time.perf_counter() - started:.1f}s)")
+
+
+async def archive(args):
+    """Yopilgan oylarning pinglarini Arrow IPC arxivga ko'chirish"""
+    from app.services import archive_service
+    
+    await init_db(sync_indexes=False)
+    started = time.perf_counter()
+    if args.month:
+        results = [{"month": args.month, **await archive_service.archive_month(args.month, batch_size=args.batch_size)}]
+    else:
+        results = await archive_service.archive_due(batch_size=args.batch_size)
+    if not results:
+        print("Arxivlanadigan oy yo'q")
+    for result in results:
+        print(f"✅ {result['month']}: {result['rows']:,} ping, {result['users']} hodim")
+    print(f"⏱  {time.perf_counter() - started:.1f}s")
+
+
+async def recompute(args):
+    """DailyWorkRecord'larni pinglardan qayta hisoblash (arxivlangan oylar ham)"""
+    from bson import ObjectId
+    from app.models import User
+    from app.services.location_service import update_daily_record
+    
+    await init_db(sync_indexes=False)
+    start = datetime.strptime(args.start, "%Y-%m-%d").date()
+    end = datetime.strptime(args.end, "%Y-%m-%d").date()
+    if args.user_id:
+        users = [await User.get(ObjectId(args.user_id))]
+    else:
+        users = await User.find(User.is_admin == False).to_list()
+    
+    started = time.perf_counter()
+    days = (end - start).days + 1
+    for user in users:
+        if user is None:
+            continue
+        for offset in range(days):
+            await update_daily_record(user, (start + timedelta(days=offset)).isoformat())
+    print(f"✅ {len(users)} hodim x {days} kun qayta hisoblandi ({time.perf_counter() - started:.1f}s)")
+
+
+async def timesheet(args):
+    """Oylik tabelni hisoblash va chiqarish"""
+    from app.services import timesheet_service
+    
+    await init_db(sync_indexes=False)
+    started = time.perf_counter()
+    sheet = await timesheet_service.build_timesheet(
+        args.year, args.month, args.overtime_rate, args.late_grace_minutes,
+        timesheet_service.parse_workdays(args.workdays)
+    )
+    content = timesheet_service.timesheet_csv(sheet)
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8") as f:
+            f.write(content)
+    else:
+        print(content, end="")
+    print(f"✅ {len(sheet['employees'])} hodim, jami {sheet['total_payable_hours']} soat "
+          f"({time.perf_counter() - started:.2f}s)")
+
+
+async def precompress_static(args):
+    """Frontend build uchun .br/.gz fayllarini oldindan yozish (build.sh)"""
+    from app.static_files import StaticManifest
+    
+    started = time.perf_counter()
+    manifest = StaticManifest(args.dir)
+    assets = manifest.load()
+    written = manifest.write_variants()
+    print(f"✅ {assets} ta fayl, {written} ta siqilgan variant yozildi ({time.perf_counter() - started:.1f}s)")
+
+
+COMMANDS = {
+    "sync-indexes": sync_indexes,
+    "backfill-geo": backfill_geo,
+    "backfill-day": backfill_day,
+    "backfill-search": backfill_search,
+    "archive": archive,
+    "recompute": recompute,
+    "timesheet": timesheet,
+    "precompress-static": precompress_static,
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HR-Tracker V2 texnik xizmat buyruqlari")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sync-indexes", help="Indekslarni yaratish (INDEX_SYNC=manual uchun)")
+    geo = sub.add_parser("backfill-geo", help="LocationLog.location (GeoJSON) maydonini to'ldirish")
+    geo.add_argument("--batch-size", type=int, default=5000)
+    day = sub.add_parser("backfill-day", help="LocationLog.day (mahalliy kun) maydonini to'ldirish")
+    day.add_argument("--batch-size", type=int, default=5000)
+    search = sub.add_parser("backfill-search", help="User.search_tokens/search_prefixes (qidiruv) maydonlarini to'ldirish")
+    search.add_argument("--batch-size", type=int, default=1000)
+    arch = sub.add_parser("archive", help="Eski oylarni ARCHIVE_DIR ga ko'chirish")
+    arch.add_argument("--month", help="YYYY-MM (berilmasa ARCHIVE_KEEP_MONTHS dan oldingi barcha oylar)")
+    arch.add_argument("--batch-size", type=int, default=5000)
+    rec = sub.add_parser("recompute", help="Kunlik yozuvlarni qayta hisoblash")
+    rec.add_argument("--start", required=True, help="YYYY-MM-DD")
+    rec.add_argument("--end", required=True, help="YYYY-MM-DD")
+    rec.add_argument("--user-id")
+    ts = sub.add_parser("timesheet", help="Oylik tabel (CSV)")
+    ts.add_argument("--year", type=int, required=True)
+    ts.add_argument("--month", type=int, required=True)
+    ts.add_argument("--overtime-rate", type=float, default=1.5)
+    ts.add_argument("--late-grace-minutes", type=float, default=0)
+    ts.add_argument("--workdays", default="0,1,2,3,4")
+    ts.add_argument("--csv", help="Fayl (berilmasa stdout)")
+    pre = sub.add_parser("precompress-static", help="static/ uchun .br/.gz variantlarni yozish")
+    pre.add_argument("--dir", default="static")
+    return parser.parse_args(argv)
+
+
+async def run(args):
+    try:
+        await COMMANDS[args.command](args)
+    finally:
+        await close_db()
+
+
+def main(argv=None):
+    asyncio.run(run(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
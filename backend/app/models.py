@@ -1,6 +1,7 @@
 from beanie import Document, Indexed
-from pydantic import Field
-from typing import Optional
+from pymongo import IndexModel
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -15,11 +16,25 @@ class User(Document):
     work_start_hour: int = 9
     work_end_hour: int = 18
     
+    # Biriktirilgan ofislar (bo'sh - istalgan ofis)
+    office_ids: List[str] = Field(default_factory=list)
+    
+    # Qidiruv: ism, username va telegram_id ning normallashtirilgan so'zlari va ularning
+    # boshlanishlari (user_service.search_fields)
+    search_tokens: List[str] = Field(default_factory=list)
+    search_prefixes: List[str] = Field(default_factory=list)
+    
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
     
     class Settings:
         name = "users"
+        indexes = [
+            # Prefiks tengligi + `_id` tartibi: qidiruv filtri va keyset sahifalash bitta IXSCAN
+            IndexModel([("search_prefixes", 1), ("_id", 1)]),
+            # Status filtri + `_id` bo'yicha keyset sahifalash
+            IndexModel([("is_active", 1), ("is_approved", 1), ("_id", 1)]),
+        ]
 
 
 class LocationLog(Document):
@@ -30,9 +45,29 @@ class LocationLog(Document):
     distance: Optional[float] = None
     is_valid: bool = False
     timestamp: Indexed(datetime) = Field(default_factory=datetime.utcnow)
+    # GeoJSON Point: {"type": "Point", "coordinates": [longitude, latitude]}
+    location: Optional[dict] = None
+    # Ping tushgan ofis (Office registry ishlatilganda)
+    office_id: Optional[str] = None
+    # Tashkilot zonasidagi mahalliy kun (YYYY-MM-DD) - kunlik so'rovlar tenglik bo'yicha
+    day: Optional[str] = None
+    # Ishonchlilik tekshiruvi belgilari (PLAUSIBILITY_MODE=flag): low_accuracy, impossible_speed
+    flags: Optional[List[str]] = None
     
     class Settings:
         name = "location_logs"
+        indexes = [
+            IndexModel([("location", "2dsphere"), ("timestamp", 1)]),
+            IndexModel([("user_id", 1), ("day", 1), ("timestamp", 1)]),
+        ]
+
+
+class PresenceSegment(BaseModel):
+    """Kun ichidagi oraliq: office/outside - shu holatdagi pinglar, gap - interval + grace ichida ping yo'q"""
+    kind: str  # office | outside | gap
+    start: datetime
+    end: datetime
+    pings: int = 0
 
 
 class DailyWorkRecord(Document):
@@ -50,12 +85,131 @@ class DailyWorkRecord(Document):
     total_locations: int = 0
     valid_locations: int = 0
     late_minutes: int = 0
+    flagged_locations: int = 0  # FlaggedLocation'lar soni (rad etilganlari ham)
+    
+    # Vaqt tartibidagi birlashtirilgan segmentlar (gap'lar yig'indisi = absent_hours)
+    segments: List[PresenceSegment] = Field(default_factory=list)
     
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
     
     class Settings:
         name = "daily_work_records"
+        indexes = [
+            IndexModel([("user_id", 1), ("date", 1)]),
+        ]
+
+
+class FlaggedLocation(Document):
+    """Ishonchlilik tekshiruvidan o'tmagan ping (admin ko'rib chiqishi uchun)"""
+    user_id: str
+    telegram_id: int
+    latitude: float
+    longitude: float
+    accuracy: Optional[float] = None  # metr
+    timestamp: datetime
+    day: str
+    reasons: List[str]
+    speed_kmh: Optional[float] = None
+    distance_from_prev: Optional[float] = None
+    prev_timestamp: Optional[datetime] = None
+    rejected: bool = False  # True - LocationLog ga yozilmagan
+    location_id: Optional[str] = None  # yozilgan bo'lsa - LocationLog id
+    
+    reviewed: bool = False
+    reviewed_by: Optional[int] = None
+    reviewed_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Settings:
+        name = "flagged_locations"
+        indexes = [
+            IndexModel([("user_id", 1), ("day", 1)]),
+            IndexModel([("reviewed", 1), ("timestamp", -1)]),
+        ]
+
+
+class Office(Document):
+    """Filial: doira (latitude/longitude/radius) yoki ko'pburchak (polygon)"""
+    name: Indexed(str, unique=True)
+    kind: str = "circle"  # circle | polygon
+    
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    radius: Optional[float] = None  # metr
+    
+    polygon: Optional[List[List[float]]] = None  # [[lat, lon], ...]
+    
+    is_active: bool = True
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = None
+    
+    class Settings:
+        name = "offices"
+
+
+class ReportJob(Document):
+    """Fonda hisoblanadigan hisobot; natija GridFS da (`report_results` bucket)"""
+    kind: str  # range | timesheet
+    params: dict
+    params_hash: str
+    # Navbatda/bajarilayotganda = params_hash: bir xil vazifalar takrorlanmaydi (unique)
+    active_key: Optional[str] = None
+    status: str = "queued"  # queued | running | done | failed
+    created_by: int  # admin telegram_id
+    worker_id: Optional[str] = None
+    error: Optional[str] = None
+    
+    result_file_id: Optional[str] = None
+    result_size: Optional[int] = None
+    content_type: Optional[str] = None
+    filename: Optional[str] = None
+    
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    
+    class Settings:
+        name = "report_jobs"
+        indexes = [
+            IndexModel([("active_key", 1)], unique=True,
+                       partialFilterExpression={"active_key": {"$type": "string"}}),
+            IndexModel([("status", 1), ("created_at", 1)]),
+            IndexModel([("expires_at", 1)]),
+        ]
+
+
+class SchedulerLease(Document):
+    """Rejalashtiruvchi rahbarligi: `_id` - lease nomi, egasi muddat tugaguncha leader"""
+    id: str
+    holder: str  # WORKER_ID
+    host: Optional[str] = None
+    acquired_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    expires_at: datetime
+
+    class Settings:
+        name = "scheduler_leases"
+
+
+class ScheduledJob(Document):
+    """Davriy vazifa holati: `_id` - vazifa nomi; `next_run_at` atomar suriladi (slot bir marta bajariladi)"""
+    id: str
+    schedule: str  # "30 0 * * *" | "every 60s"
+    next_run_at: datetime
+    last_started_at: Optional[datetime] = None
+    last_finished_at: Optional[datetime] = None
+    last_status: Optional[str] = None  # running | ok | failed
+    last_error: Optional[str] = None
+    last_result: Optional[str] = None
+    last_duration_ms: Optional[float] = None
+    last_holder: Optional[str] = None
+    runs: int = 0
+    failures: int = 0
+
+    class Settings:
+        name = "scheduled_jobs"
 
 
 class Settings(Document):
@@ -0,0 +1,56 @@
+"""
+`Accept: application/x-ndjson` uchun oqimli javoblar: har bir qator - bitta
+JSON obyekt. Qatorlar Motor kursoridan BATCH_SIZE tadan o'qiladi va har bir
+partiya darhol yoziladi - ro'yxat to'liq xotirada yig'ilmaydi, birinchi bayt
+birinchi partiyadan keyin ketadi.
+"""
+import json
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+MEDIA_TYPE = "application/x-ndjson"
+BATCH_SIZE = 500
+
+
+def wants_ndjson(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    return any(part.split(";")[0].strip().lower() == MEDIA_TYPE for part in accept.split(","))
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} JSON ga o'girilmaydi")
+
+
+def dumps(row: dict) -> bytes:
+    return json.dumps(row, default=_default, separators=(",", ":"), ensure_ascii=False).encode() + b"\n"
+
+
+async def cursor_batches(cursor, batch_size: int = BATCH_SIZE) -> AsyncIterator[List[dict]]:
+    """Motor kursori -> hujjatlar partiyalari (bir vaqtda ko'pi bilan `batch_size` ta)"""
+    cursor.batch_size(batch_size)
+    while True:
+        batch = await cursor.to_list(length=batch_size)
+        if not batch:
+            return
+        yield batch
+
+
+async def _encode(batches: AsyncIterator[List[dict]], to_row: Callable[[dict], dict]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield b"".join(dumps(to_row(doc)) for doc in batch)
+
+
+def response(
+    batches: AsyncIterator[List[dict]],
+    to_row: Callable[[dict], dict] = lambda doc: doc,
+    headers: Optional[Dict[str, str]] = None,
+) -> StreamingResponse:
+    return StreamingResponse(_encode(batches, to_row), media_type=MEDIA_TYPE, headers=headers)
@@ -0,0 +1,50 @@
+"""
+Davriy vazifalar ro'yxati. Barchasi app.scheduler orqali bitta leader
+jarayonda bajariladi - workerlar soni qancha bo'lishidan qat'i nazar.
+"""
+from datetime import timedelta
+
+from bson import ObjectId
+from beanie.operators import In
+
+from app.config import settings
+from app.models import DailyWorkRecord, User
+from app.scheduler import Scheduler
+from app.timezone import local_today
+
+
+async def cleanup_report_jobs() -> str:
+    from app.services import job_service
+    removed = await job_service.cleanup()
+    return f"{removed} natija o'chirildi"
+
+
+async def rollup_yesterday() -> str:
+    """Kechagi kunlik yozuvlarni pinglardan yakuniy qayta hisoblash"""
+    from app.services.location_service import update_daily_record
+    
+    day = (local_today() - timedelta(days=1)).isoformat()
+    user_ids = await DailyWorkRecord.get_motor_collection().distinct("user_id", {"date": day})
+    users = await User.find(In(User.id, [ObjectId(user_id) for user_id in user_ids])).to_list()
+    for user in users:
+        await update_daily_record(user, day)
+    return f"{day}: {len(users)} hodim"
+
+
+async def archive_closed_months() -> str:
+    from app.services import archive_service
+    results = await archive_service.archive_due()
+    return ", ".join(f"{r['month']}: {r['rows']} ping" for r in results) or "arxivlanadigan oy yo'q"
+
+
+def register(scheduler: Scheduler) -> None:
+    from app.services.job_service import CLEANUP_SECONDS
+    
+    scheduler.add_job("report-jobs-cleanup", cleanup_report_jobs, every=timedelta(seconds=CLEANUP_SECONDS))
+    # Kun yopilgandan keyin: kechikkan pinglar va kun davomida o'zgargan interval hisobga olinadi
+    scheduler.add_job("daily-rollup", rollup_yesterday, cron="30 0 * * *")
+    if settings.ARCHIVE_DIR:
+        scheduler.add_job("archive", archive_closed_months, cron="0 3 1 * *")
+    if settings.MISSED_PING_ALERTS:
+        from app.services.ping_monitor import ping_monitor
+        scheduler.add_service("ping-monitor", ping_monitor.run)
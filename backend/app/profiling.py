@@ -0,0 +1,181 @@
+"""
+Adminlar uchun so'rov profileri va sekin MongoDB so'rovlari logi
+"""
+import contextvars
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Any, Optional
+
+from pymongo import monitoring
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, PlainTextResponse, Response
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# So'rov marshruti ("GET /api/reports/...") - slow query logida ko'rsatiladi.
+# Motor buyruqlarni executor'da bajaradi, lekin contextvars'ni o'tkazadi.
+current_route: contextvars.ContextVar[str] = contextvars.ContextVar("current_route", default="-")
+
+PROFILE_MODES = ("html", "text", "speedscope", "store")
+
+# Buyruq nomi -> filter joylashgan kalit
+_FILTER_KEYS = {
+    "find": "filter",
+    "aggregate": "pipeline",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+}
+
+
+def query_shape(value: Any) -> Any:
+    """Filter qiymatlarini '?' bilan almashtirib, faqat tuzilishini qoldirish"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return "?"
+        return [query_shape(item) for item in value]
+    if isinstance(value, str) and value.startswith("$"):
+        return value  # aggregation maydon havolasi ("$user_id")
+    return "?"
+
+
+def command_shape(command_name: str, command: dict) -> Any:
+    """MongoDB buyrug'idan filter shaklini ajratib olish"""
+    if command_name in _FILTER_KEYS:
+        return query_shape(command.get(_FILTER_KEYS[command_name], {}))
+    if command_name in ("update", "delete"):
+        key = "updates" if command_name == "update" else "deletes"
+        return [query_shape(op.get("q", {})) for op in command.get(key, [])]
+    return None
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Threshold'dan uzoq bajarilgan MongoDB buyruqlarini loglash"""
+
+    def __init__(self, threshold_ms: int):
+        self.threshold_ms = threshold_ms
+        # (connection_id, request_id) -> (route, command_name, command)
+        self._pending: dict = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self._pending[(event.connection_id, event.request_id)] = (
+            current_route.get(),
+            event.command_name,
+            event.command,
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, "failed")
+
+    def _finish(self, event, outcome: str) -> None:
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        route, command_name, command = pending
+        logger.warning(
+            "Slow query %.1fms [%s] route=%s command=%s collection=%s shape=%s",
+            duration_ms,
+            outcome,
+            route,
+            command_name,
+            command.get(command_name),
+            command_shape(command_name, command),
+        )
+
+
+async def _is_admin_request(request: Request) -> bool:
+    """Bearer token admin foydalanuvchiga tegishli ekanligini tekshirish"""
+    from app.auth import get_user_by_telegram_id, verify_token
+
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+
+    telegram_id = verify_token(token)
+    if telegram_id is None:
+        return False
+
+    user = await get_user_by_telegram_id(telegram_id)
+    return bool(user and user.is_admin and user.is_approved and user.is_active)
+
+
+def _store_profile(profiler, request: Request) -> str:
+    """Profil HTML natijasini PROFILE_DIR ga saqlash"""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", request.url.path).strip("_") or "root"
+    filename = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}_{request.method}_{slug}.html"
+    path = os.path.join(settings.PROFILE_DIR, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(profiler.output_html())
+    return path
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """
+    Har bir so'rov marshrutini slow query logi uchun belgilaydi.
+    Admin `X-Profile: html|text|speedscope|store` sarlavhasini yuborsa,
+    so'rov pyinstrument (sampling profiler) ostida bajariladi.
+    """
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        token = current_route.set(f"{request.method} {request.url.path}")
+        try:
+            mode = self._profile_mode(request)
+            if mode is None or not await _is_admin_request(request):
+                return await call_next(request)
+            return await self._profile(request, call_next, mode)
+        finally:
+            current_route.reset(token)
+
+    @staticmethod
+    def _profile_mode(request: Request) -> Optional[str]:
+        if not settings.PROFILING_ENABLED:
+            return None
+        mode = request.headers.get(settings.PROFILE_HEADER, "").strip().lower()
+        if not mode:
+            return None
+        if mode == "store" and not settings.PROFILE_DIR:
+            return "html"
+        return mode if mode in PROFILE_MODES else "html"
+
+    async def _profile(self, request: Request, call_next, mode: str) -> Response:
+        from pyinstrument import Profiler
+
+        # async_mode="disabled": call_next endpoint'ni alohida task'da bajaradi,
+        # shuning uchun butun thread profil qilinadi
+        profiler = Profiler(interval=settings.PROFILE_INTERVAL, async_mode="disabled")
+        profiler.start()
+        try:
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+        finally:
+            profiler.stop()
+
+        if mode == "text":
+            return PlainTextResponse(profiler.output_text(unicode=True, show_all=False))
+        if mode == "speedscope":
+            from pyinstrument.renderers import SpeedscopeRenderer
+            return Response(profiler.output(SpeedscopeRenderer()), media_type="application/json")
+        if mode == "html":
+            return HTMLResponse(profiler.output_html())
+
+        # store: asl javob qaytariladi, profil faylga yoziladi
+        path = _store_profile(profiler, request)
+        headers = dict(response.headers)
+        headers["X-Profile-File"] = os.path.basename(path)
+        return Response(content=body, status_code=response.status_code, headers=headers)
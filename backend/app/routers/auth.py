@@ -3,8 +3,9 @@ from datetime import timedelta
 
 from app.models import User
 from app.schemas import TelegramAuth, Token, UserResponse
-from app.auth import create_access_token, get_current_user
+from app.auth import create_access_token, get_current_user, invalidate_user
 from app.config import settings
+from app.services import user_service
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -21,6 +22,7 @@ def user_to_response(user: User) -> UserResponse:
         is_admin=user.is_admin,
         work_start_hour=user.work_start_hour,
         work_end_hour=user.work_end_hour,
+        office_ids=user.office_ids,
         created_at=user.created_at
     )
 
@@ -43,6 +45,7 @@ async def telegram_auth(auth_data: TelegramAuth):
             is_admin=is_admin,
             is_approved=is_admin  # Admins are auto-approved
         )
+        user_service.set_search_tokens(user)
         await user.insert()
     else:
         # Update user info if changed
@@ -54,7 +57,9 @@ async def telegram_auth(auth_data: TelegramAuth):
             user.full_name = auth_data.full_name
             updated = True
         if updated:
+            user_service.set_search_tokens(user)
             await user.save()
+            await invalidate_user(user.telegram_id)
     
     # Create token
     access_token = create_access_token(
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from bson import ObjectId
+
+from app.models import User
+from app.schemas import BotRecipient, BotRecipientsPage, BotConfig, BotPingBatch, BotPingBatchResult
+from app.auth import verify_bot_token
+from app.services import location_service, settings_service
+
+router = APIRouter(prefix="/bot", tags=["Bot"], dependencies=[Depends(verify_bot_token)])
+
+
+@router.get("/recipients", response_model=BotRecipientsPage)
+async def get_recipients(
+    after: Optional[str] = Query(default=None, description="Oldingi sahifaning `next` qiymati"),
+    limit: int = Query(default=500, ge=1, le=5000),
+    work_start_hour: Optional[int] = Query(default=None, ge=0, le=23),
+):
+    """Bot: xabar oladigan hodimlar (tasdiqlangan, faol), _id bo'yicha sahifalab"""
+    query = {"is_approved": True, "is_active": True, "is_admin": False}
+    if work_start_hour is not None:
+        query["work_start_hour"] = work_start_hour
+    if after is not None:
+        if not ObjectId.is_valid(after):
+            raise HTTPException(status_code=400, detail="Noto'g'ri ID formati")
+        query["_id"] = {"$gt": ObjectId(after)}
+    
+    docs = await User.get_motor_collection().find(
+        query, {"telegram_id": 1, "full_name": 1, "work_start_hour": 1}
+    ).sort("_id", 1).limit(limit).to_list(length=None)
+    
+    items = [
+        BotRecipient(
+            id=str(d["_id"]),
+            telegram_id=d["telegram_id"],
+            full_name=d.get("full_name"),
+            work_start_hour=d.get("work_start_hour", 9)
+        )
+        for d in docs
+    ]
+    return BotRecipientsPage(items=items, next=items[-1].id if len(items) == limit else None)
+
+
+@router.get("/config", response_model=BotConfig)
+async def get_bot_config():
+    """Bot: live location throttling uchun interval"""
+    interval = await settings_service.get_location_interval()
+    return BotConfig(
+        location_interval_minutes=interval["minutes"],
+        live_min_gap_seconds=await location_service.live_min_gap_seconds()
+    )
+
+
+@router.post("/locations", response_model=BotPingBatchResult)
+async def ingest_locations(data: BotPingBatch):
+    """Bot: Telegram (live) lokatsiyalari partiyasi - send_location bilan bir xil tekshiruvlar"""
+    return await location_service.ingest_bot_pings(data.pings)
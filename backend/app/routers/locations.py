@@ -1,10 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from datetime import datetime, date
-from typing import List
+from typing import List, Optional
+from bson import ObjectId
+from beanie.operators import In
+from pymongo.errors import OperationFailure
 
-from app.models import User, LocationLog
-from app.schemas import LocationCreate, LocationResponse, TodayStatusResponse
-from app.auth import get_approved_user
+from app.models import User, LocationLog, FlaggedLocation
+from app.schemas import (
+    LocationResponse, LocationBatchResult, TodayStatusResponse, TodayDeltaResponse,
+    GeoPolygonQuery, GeoLocationResponse, NearbyUserResponse, FlaggedLocationResponse
+)
+from app.auth import get_approved_user, get_admin_user
+from app.conditional import location_logs_validators
+from app import ndjson, wire
+from app.config import settings
+from app.services import live_service, location_service, plausibility_service
+from app.services.office_service import polygon_self_intersects
+from app.timezone import day_bounds_utc, local_today
 
 router = APIRouter(prefix="/locations", tags=["Locations"])
 
@@ -17,48 +32,89 @@ def location_to_response(loc: LocationLog) -> LocationResponse:
         longitude=loc.longitude,
         distance=loc.distance,
         is_valid=loc.is_valid,
-        timestamp=loc.timestamp
+        timestamp=loc.timestamp,
+        flags=loc.flags
     )
 
 
-@router.post("/send", response_model=LocationResponse)
+def location_row(doc: dict) -> dict:
+    """Motor hujjati -> LocationResponse ko'rinishidagi dict (NDJSON uchun, Pydantic'siz)"""
+    return {
+        "id": str(doc["_id"]),
+        "latitude": doc["latitude"],
+        "longitude": doc["longitude"],
+        "distance": doc.get("distance"),
+        "is_valid": doc.get("is_valid", False),
+        "timestamp": doc["timestamp"],
+        "flags": doc.get("flags"),
+    }
+
+
+def flagged_to_response(flag: FlaggedLocation) -> FlaggedLocationResponse:
+    return FlaggedLocationResponse(id=str(flag.id), **flag.model_dump(exclude={"id", "revision_id", "created_at"}))
+
+
+def parse_date(date_str: str) -> date:
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Noto'g'ri sana formati. YYYY-MM-DD formatida kiriting.")
+
+
+async def read_pings(request: Request, single: bool = False) -> List[wire.WirePing]:
+    """So'rov tanasi Content-Type bo'yicha: JSON, MessagePack yoki application/x-pings"""
+    try:
+        return wire.decode(request.headers.get("content-type"), await request.body(), single)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except wire.UnsupportedMediaType:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Qo'llab-quvvatlanadigan Content-Type: {', '.join(wire.MEDIA_TYPES)}"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Noto'g'ri so'rov tanasi: {e}")
+
+
+@router.post("/send", response_model=LocationResponse, openapi_extra=wire.request_body(single=True))
 async def send_location(
-    data: LocationCreate,
+    request: Request,
     user: User = Depends(get_approved_user)
 ):
     """Lokatsiya yuborish"""
-    now = datetime.now()
-    if not (user.work_start_hour <= now.hour < user.work_end_hour):
+    [(latitude, longitude, _, accuracy)] = await read_pings(request, single=True)
+    if not location_service.is_work_time(user, datetime.utcnow()):
         raise HTTPException(
             status_code=400,
             detail=f"Ish vaqti emas. Sizning ish vaqtingiz: {user.work_start_hour}:00 - {user.work_end_hour}:00"
         )
     
-    # TODO: Calculate distance and is_valid based on office location settings
-    location = LocationLog(
-        user_id=str(user.id),
-        telegram_id=user.telegram_id,
-        latitude=data.latitude,
-        longitude=data.longitude,
-        distance=0,  # Will be calculated
-        is_valid=True,  # Will be calculated
-        timestamp=datetime.utcnow()
-    )
-    await location.insert()
+    location = await location_service.log_location(user, latitude, longitude, accuracy)
+    if location is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Lokatsiya rad etildi: GPS ma'lumoti ishonchsiz (aniqlik past yoki juda tez ko'chish)"
+        )
     
     return location_to_response(location)
 
 
+@router.post("/send/batch", response_model=LocationBatchResult, openapi_extra=wire.request_body(single=False))
+async def send_location_batch(
+    request: Request,
+    user: User = Depends(get_approved_user)
+):
+    """Bir nechta lokatsiya (klientda yig'ilgan, vaqti bilan); har biri uchun natija"""
+    pings = await read_pings(request)
+    return await location_service.ingest_user_pings(user, pings)
+
+
 @router.get("/today", response_model=List[LocationResponse])
 async def get_today_locations(user: User = Depends(get_approved_user)):
     """Bugungi lokatsiyalar"""
-    today_start = datetime.combine(date.today(), datetime.min.time())
-    today_end = datetime.combine(date.today(), datetime.max.time())
-    
     locations = await LocationLog.find(
         LocationLog.user_id == str(user.id),
-        LocationLog.timestamp >= today_start,
-        LocationLog.timestamp <= today_end
+        LocationLog.day == local_today().isoformat()
     ).sort(LocationLog.timestamp).to_list()
     
     return [location_to_response(loc) for loc in locations]
@@ -67,16 +123,12 @@ async def get_today_locations(user: User = Depends(get_approved_user)):
 @router.get("/status", response_model=TodayStatusResponse)
 async def get_today_status(user: User = Depends(get_approved_user)):
     """Bugungi holat"""
-    today_start = datetime.combine(date.today(), datetime.min.time())
-    today_end = datetime.combine(date.today(), datetime.max.time())
-    
     locations = await LocationLog.find(
         LocationLog.user_id == str(user.id),
-        LocationLog.timestamp >= today_start,
-        LocationLog.timestamp <= today_end
+        LocationLog.day == local_today().isoformat()
     ).sort(LocationLog.timestamp).to_list()
     
-    today_str = date.today().isoformat()
+    today_str = locations[0].day if locations else local_today().isoformat()
     valid_count = sum(1 for loc in locations if loc.is_valid)
     is_in_office = locations[-1].is_valid if locations else False
     
@@ -92,24 +144,212 @@ async def get_today_status(user: User = Depends(get_approved_user)):
     )
 
 
+async def build_today_delta(user: User, since: Optional[str]) -> TodayDeltaResponse:
+    user_id = str(user.id)
+    today_str = local_today().isoformat()
+    try:
+        since_id = live_service.parse_cursor(since) if since else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Noto'g'ri cursor")
+    
+    locations = await live_service.locations_since(user_id, today_str, since_id)
+    record = await live_service.day_record(user_id, today_str)
+    # Kechikkan partiya pinglari eng oxirgi yozilgan bo'lsa ham eng so'nggi vaqtli bo'lmasligi mumkin
+    last = await live_service.last_location(user_id, today_str)
+    cursor = str(max(locations[-1].id, since_id) if since_id else locations[-1].id) if locations else since
+    
+    return TodayDeltaResponse(
+        date=today_str,
+        locations_count=record.total_locations if record else 0,
+        valid_locations=record.valid_locations if record else 0,
+        is_currently_in_office=last.is_valid if last else False,
+        first_location_time=record.work_start_time if record else None,
+        last_location_time=last.timestamp if last else None,
+        work_start_hour=user.work_start_hour,
+        work_end_hour=user.work_end_hour,
+        cursor=cursor,
+        locations=[location_to_response(loc) for loc in locations]
+    )
+
+
+@router.get("/today/delta", response_model=TodayDeltaResponse)
+async def get_today_delta(
+    since: Optional[str] = Query(default=None, description="Oxirgi `cursor` (ping ID si)"),
+    user: User = Depends(get_approved_user)
+):
+    """Bugungi holat va `since` dan keyingi pinglar"""
+    return await build_today_delta(user, since)
+
+
+@router.get("/today/wait", response_model=TodayDeltaResponse)
+async def wait_today_delta(
+    since: Optional[str] = Query(default=None, description="Oxirgi `cursor` (ping ID si)"),
+    timeout: int = Query(default=25, ge=0),
+    user: User = Depends(get_approved_user)
+):
+    """Long-poll: yangi ping kelguncha yoki timeout o'tguncha kutadi"""
+    timeout = min(timeout, settings.LONG_POLL_MAX_SECONDS)
+    # Obuna so'rovdan oldin - so'rov va kutish orasida kelgan ping yo'qolmaydi
+    with live_service.ping_notifier.listen(str(user.id)) as event:
+        delta = await build_today_delta(user, since)
+        # Faqat overlap (allaqachon ko'rilgan) pinglar bo'lsa kursor o'zgarmaydi - kutiladi
+        if timeout == 0 or delta.cursor != since:
+            return delta
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return delta
+    return await build_today_delta(user, since)
+
+
 @router.get("/history/{date_str}", response_model=List[LocationResponse])
 async def get_date_locations(
+    request: Request,
+    response: Response,
     date_str: str,
     user: User = Depends(get_approved_user)
 ):
-    """Berilgan sanadagi lokatsiyalar"""
-    try:
-        target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Noto'g'ri sana formati. YYYY-MM-DD formatida kiriting.")
+    """Berilgan sanadagi lokatsiyalar (`Accept: application/x-ndjson` - oqim, har qatorda bitta ping)"""
+    date_str = parse_date(date_str).isoformat()
+    stream = ndjson.wants_ndjson(request)
     
-    day_start = datetime.combine(target_date, datetime.min.time())
-    day_end = datetime.combine(target_date, datetime.max.time())
+    validators = await location_logs_validators(str(user.id), date_str)
+    if stream:
+        validators = validators.variant("ndjson")
+    if validators.not_modified(request):
+        return validators.not_modified_response()
     
-    locations = await LocationLog.find(
-        LocationLog.user_id == str(user.id),
-        LocationLog.timestamp >= day_start,
-        LocationLog.timestamp <= day_end
-    ).sort(LocationLog.timestamp).to_list()
+    if stream:
+        batches = location_service.iter_date_locations(str(user.id), date_str)
+        return ndjson.response(batches, location_row, headers={**validators.headers(), "Vary": "Accept"})
+    
+    validators.apply(response)
+    response.headers["Vary"] = "Accept"
+    # Arxivlangan oylar ham shu yerda o'qiladi
+    locations = await location_service.get_date_locations(str(user.id), date_str)
     
     return [location_to_response(loc) for loc in locations]
+
+
+# ============ Admin: fazoviy so'rovlar (2dsphere) ============
+
+@router.get("/admin/near", response_model=List[NearbyUserResponse])
+async def admin_near(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(100, gt=0, le=50000, description="Metr"),
+    date_str: str = Query(default=None, description="Sana (YYYY-MM-DD)"),
+    admin: User = Depends(get_admin_user)
+):
+    """Admin: berilgan kuni nuqtadan `radius` metr ichida ping yuborgan hodimlar"""
+    target_date = parse_date(date_str) if date_str else local_today()
+    day_start, day_end = day_bounds_utc(target_date)
+    
+    pipeline = [
+        {"$geoNear": {
+            "near": location_service.geo_point(lat, lon),
+            "distanceField": "geo_distance",
+            "maxDistance": radius,
+            "spherical": True,
+            "query": {"timestamp": {"$gte": day_start, "$lte": day_end}},
+        }},
+        {"$group": {
+            "_id": "$user_id",
+            "telegram_id": {"$first": "$telegram_id"},
+            "pings": {"$sum": 1},
+            "min_distance": {"$min": "$geo_distance"},
+            "first_seen": {"$min": "$timestamp"},
+            "last_seen": {"$max": "$timestamp"},
+        }},
+        {"$sort": {"min_distance": 1}},
+    ]
+    rows = await LocationLog.get_motor_collection().aggregate(pipeline).to_list(length=None)
+    
+    users = await User.find(In(User.id, [ObjectId(r["_id"]) for r in rows if ObjectId.is_valid(r["_id"])])).to_list()
+    users_by_id = {str(u.id): u for u in users}
+    
+    result = []
+    for r in rows:
+        user = users_by_id.get(r["_id"])
+        result.append(NearbyUserResponse(
+            user_id=r["_id"],
+            telegram_id=r["telegram_id"],
+            full_name=user.full_name if user else None,
+            username=user.username if user else None,
+            pings=r["pings"],
+            min_distance=round(r["min_distance"], 2),
+            first_seen=r["first_seen"],
+            last_seen=r["last_seen"]
+        ))
+    return result
+
+
+@router.post("/admin/within", response_model=List[GeoLocationResponse])
+async def admin_within(
+    data: GeoPolygonQuery,
+    admin: User = Depends(get_admin_user)
+):
+    """Admin: sana oralig'ida ko'pburchak ichidagi pinglar"""
+    if len(data.points) < 3 or any(len(p) != 2 for p in data.points):
+        raise HTTPException(status_code=400, detail="Ko'pburchak kamida 3 ta [lat, lon] nuqtadan iborat bo'lishi kerak")
+    if any(not (-90 <= lat <= 90 and -180 <= lon <= 180) for lat, lon in data.points):
+        raise HTTPException(status_code=400, detail="Koordinatalar: lat -90..90, lon -180..180")
+    if polygon_self_intersects(data.points):
+        raise HTTPException(status_code=400, detail="Ko'pburchak qirralari o'zaro kesishmasligi kerak")
+    
+    day_start = day_bounds_utc(parse_date(data.start_date))[0]
+    day_end = day_bounds_utc(parse_date(data.end_date))[1]
+    
+    ring = [[lon, lat] for lat, lon in data.points]
+    if ring[0] != ring[-1]:
+        ring.append(ring[0])
+    
+    query = {
+        "location": {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [ring]}}},
+        "timestamp": {"$gte": day_start, "$lte": day_end},
+    }
+    if data.user_id:
+        query["user_id"] = data.user_id
+    
+    try:
+        locations = await LocationLog.find(query).sort(LocationLog.timestamp).limit(data.limit).to_list()
+    except OperationFailure as e:
+        # Mongo rad etgan geometriya (takroriy nuqtalar va h.k.) - mijoz xatosi
+        raise HTTPException(status_code=400, detail=f"Ko'pburchak yaroqsiz: {e.details.get('errmsg') if e.details else e}")
+    
+    return [
+        GeoLocationResponse(
+            **location_to_response(loc).model_dump(),
+            user_id=loc.user_id,
+            telegram_id=loc.telegram_id
+        )
+        for loc in locations
+    ]
+
+
+# ============ Admin: shubhali pinglar ============
+
+@router.get("/admin/flagged", response_model=List[FlaggedLocationResponse])
+async def admin_flagged(
+    date_str: Optional[str] = Query(default=None, description="Sana (YYYY-MM-DD)"),
+    user_id: Optional[str] = None,
+    reviewed: Optional[bool] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    admin: User = Depends(get_admin_user)
+):
+    """Admin: ishonchlilik tekshiruvidan o'tmagan pinglar (yangilari birinchi)"""
+    if date_str:
+        parse_date(date_str)
+    flags = await plausibility_service.list_flagged(date_str, user_id, reviewed, limit)
+    return [flagged_to_response(f) for f in flags]
+
+
+@router.post("/admin/flagged/{flag_id}/review", response_model=FlaggedLocationResponse)
+async def admin_review_flagged(flag_id: str, admin: User = Depends(get_admin_user)):
+    """Admin: shubhali pingni ko'rib chiqilgan deb belgilash"""
+    if not ObjectId.is_valid(flag_id):
+        raise HTTPException(status_code=400, detail="Noto'g'ri ID formati")
+    flag = await plausibility_service.mark_reviewed(flag_id, admin)
+    if not flag:
+        raise HTTPException(status_code=404, detail="Yozuv topilmadi")
+    return flagged_to_response(flag)
@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List
+from bson import ObjectId
+from datetime import datetime
+
+from app.models import User, Office
+from app.schemas import OfficeCreate, OfficeResponse
+from app.auth import get_admin_user, invalidate_user
+from app.services.office_service import MAX_OFFICE_SPAN_DEG, invalidate_offices, office_bbox
+
+router = APIRouter(prefix="/offices", tags=["Offices"])
+
+
+def office_to_response(office: Office) -> OfficeResponse:
+    """Convert Office document to OfficeResponse"""
+    return OfficeResponse(
+        id=str(office.id),
+        name=office.name,
+        kind=office.kind,
+        latitude=office.latitude,
+        longitude=office.longitude,
+        radius=office.radius,
+        polygon=office.polygon,
+        is_active=office.is_active,
+        created_at=office.created_at
+    )
+
+
+def validate_office(data: OfficeCreate):
+    """Ofis geometriyasini tekshirish"""
+    if data.kind == "circle":
+        if data.latitude is None or data.longitude is None or not data.radius or data.radius <= 0:
+            raise HTTPException(status_code=400, detail="Doira uchun latitude, longitude va radius kerak")
+    elif data.kind == "polygon":
+        if not data.polygon or len(data.polygon) < 3 or any(len(p) != 2 for p in data.polygon):
+            raise HTTPException(status_code=400, detail="Ko'pburchak kamida 3 ta [lat, lon] nuqtadan iborat bo'lishi kerak")
+        if any(not (-90 <= lat <= 90 and -180 <= lon <= 180) for lat, lon in data.polygon):
+            raise HTTPException(status_code=400, detail="Koordinatalar: lat -90..90, lon -180..180")
+    else:
+        raise HTTPException(status_code=400, detail="Ofis turi: circle yoki polygon")
+
+    # Qutb yaqinidagi doira yoki mamlakat kattaligidagi ko'pburchak ofis emas (grid ham cheksiz o'sadi)
+    min_lat, min_lon, max_lat, max_lon = office_bbox(data.model_dump())
+    if max_lat - min_lat > MAX_OFFICE_SPAN_DEG or max_lon - min_lon > MAX_OFFICE_SPAN_DEG:
+        raise HTTPException(status_code=400, detail=f"Ofis hududi juda katta (ko'pi bilan {MAX_OFFICE_SPAN_DEG}°)")
+
+
+async def get_office_or_404(office_id: str) -> Office:
+    if not ObjectId.is_valid(office_id):
+        raise HTTPException(status_code=400, detail="Noto'g'ri ID formati")
+    
+    office = await Office.get(ObjectId(office_id))
+    
+    if not office:
+        raise HTTPException(status_code=404, detail="Ofis topilmadi")
+    
+    return office
+
+
+@router.get("/", response_model=List[OfficeResponse])
+async def get_offices(admin: User = Depends(get_admin_user)):
+    """Barcha ofislar"""
+    offices = await Office.find_all().sort(Office.name).to_list()
+    return [office_to_response(o) for o in offices]
+
+
+@router.post("/", response_model=OfficeResponse)
+async def create_office(
+    data: OfficeCreate,
+    admin: User = Depends(get_admin_user)
+):
+    """Yangi ofis (filial) qo'shish"""
+    validate_office(data)
+    
+    if await Office.find_one(Office.name == data.name):
+        raise HTTPException(status_code=400, detail="Bu nomli ofis mavjud")
+    
+    office = Office(**data.model_dump())
+    await office.insert()
+    await invalidate_offices()
+    
+    return office_to_response(office)
+
+
+@router.put("/{office_id}", response_model=OfficeResponse)
+async def update_office(
+    office_id: str,
+    data: OfficeCreate,
+    admin: User = Depends(get_admin_user)
+):
+    """Ofisni yangilash"""
+    validate_office(data)
+    office = await get_office_or_404(office_id)
+    
+    for field, value in data.model_dump().items():
+        setattr(office, field, value)
+    office.updated_at = datetime.utcnow()
+    await office.save()
+    await invalidate_offices()
+    
+    return office_to_response(office)
+
+
+@router.delete("/{office_id}")
+async def delete_office(
+    office_id: str,
+    admin: User = Depends(get_admin_user)
+):
+    """Ofisni o'chirish (hodimlar biriktiruvidan ham olib tashlanadi)"""
+    office = await get_office_or_404(office_id)
+    
+    assigned = await User.find({"office_ids": office_id}).to_list()
+    await office.delete()
+    await User.find({"office_ids": office_id}).update({"$pull": {"office_ids": office_id}})
+    for user in assigned:
+        await invalidate_user(user.telegram_id)
+    await invalidate_offices()
+    
+    return {"message": "Ofis o'chirildi"}
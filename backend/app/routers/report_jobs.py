@@ -0,0 +1,115 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List
+from bson import ObjectId
+import asyncio
+import json
+
+from app.models import User, ReportJob
+from app.schemas import ReportJobCreate, ReportJobResponse
+from app.auth import get_admin_user
+from app.services import job_service
+
+router = APIRouter(prefix="/reports/jobs", tags=["Report jobs"])
+
+TERMINAL_STATUSES = ("done", "failed")
+
+
+def job_to_response(job: ReportJob) -> ReportJobResponse:
+    """Convert ReportJob document to ReportJobResponse"""
+    return ReportJobResponse(
+        id=str(job.id),
+        kind=job.kind,
+        params=job.params,
+        status=job.status,
+        error=job.error,
+        result_size=job.result_size,
+        content_type=job.content_type,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        expires_at=job.expires_at
+    )
+
+
+async def get_job_or_404(job_id: str) -> ReportJob:
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Noto'g'ri ID formati")
+    job = await ReportJob.get(ObjectId(job_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Vazifa topilmadi")
+    return job
+
+
+@router.post("", response_model=ReportJobResponse, status_code=202)
+async def create_report_job(data: ReportJobCreate, admin: User = Depends(get_admin_user)):
+    """Admin: hisobotni fonda hisoblash (bir xil vazifa navbatda bo'lsa - o'sha qaytadi)"""
+    try:
+        job = await job_service.submit(data.kind, data.params, admin.telegram_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job_to_response(job)
+
+
+@router.get("", response_model=List[ReportJobResponse])
+async def list_report_jobs(
+    limit: int = Query(50, ge=1, le=200),
+    admin: User = Depends(get_admin_user)
+):
+    """Admin: oxirgi vazifalar"""
+    jobs = await ReportJob.find_all().sort(-ReportJob.created_at).limit(limit).to_list()
+    return [job_to_response(j) for j in jobs]
+
+
+@router.get("/{job_id}", response_model=ReportJobResponse)
+async def get_report_job(job_id: str, admin: User = Depends(get_admin_user)):
+    """Admin: vazifa holati"""
+    return job_to_response(await get_job_or_404(job_id))
+
+
+@router.get("/{job_id}/events")
+async def stream_report_job(job_id: str, request: Request, admin: User = Depends(get_admin_user)):
+    """Admin: vazifa holati o'zgarishlari (Server-Sent Events), tugaganda oqim yopiladi"""
+    job = await get_job_or_404(job_id)
+    
+    async def events():
+        last_status = None
+        current = job
+        while current is not None:
+            if current.status != last_status:
+                last_status = current.status
+                payload = job_to_response(current).model_dump_json()
+                yield f"event: status\ndata: {payload}\n\n"
+            if current.status in TERMINAL_STATUSES or await request.is_disconnected():
+                return
+            await asyncio.sleep(1)
+            current = await ReportJob.get(current.id)
+        yield f"event: status\ndata: {json.dumps({'id': job_id, 'status': 'expired'})}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/{job_id}/result")
+async def get_report_job_result(job_id: str, admin: User = Depends(get_admin_user)):
+    """Admin: tayyor hisobot (GridFS dan bo'laklab uzatiladi)"""
+    job = await get_job_or_404(job_id)
+    if job.status != "done" or not job.result_file_id:
+        raise HTTPException(status_code=409, detail=f"Hisobot tayyor emas (holat: {job.status})")
+    
+    stream = await job_service.open_result(job.result_file_id)
+    
+    async def chunks():
+        while True:
+            chunk = await stream.readchunk()
+            if not chunk:
+                break
+            yield chunk
+    
+    return StreamingResponse(
+        chunks(),
+        media_type=job.content_type,
+        headers={
+            "Content-Length": str(job.result_size),
+            "Content-Disposition": f'attachment; filename="{job.filename}"'
+        }
+    )
@@ -1,28 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from datetime import date, datetime, timedelta
 from typing import List, Optional
 from bson import ObjectId
+from beanie.operators import In
 
-from app.models import User, DailyWorkRecord
-from app.schemas import DailyReportResponse, MonthlyReportResponse
+from app import ndjson
+from app.config import settings
+from app.models import User, DailyWorkRecord, LocationLog, Office
+from app.schemas import DailyReportResponse, MonthlyReportResponse, SiteReportItem, TimelineResponse
 from app.auth import get_approved_user, get_admin_user
+from app.conditional import Validators, daily_records_validators
+from app.services.report_service import (
+    report_cache, report_key, record_to_response, build_range_report, iter_range_rows, load_range_records
+)
+from app.services import timesheet_service
+from app.services.location_service import get_day_timeline
+from app.timezone import day_bounds_utc, local_today
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
 
-def record_to_response(record: DailyWorkRecord) -> DailyReportResponse:
-    """Convert DailyWorkRecord to DailyReportResponse"""
-    return DailyReportResponse(
-        date=record.date,
-        work_start_time=record.work_start_time,
-        work_end_time=record.work_end_time,
-        total_work_hours=record.total_work_hours,
-        present_hours=record.present_hours,
-        absent_hours=record.absent_hours,
-        total_locations=record.total_locations,
-        valid_locations=record.valid_locations,
-        late_minutes=record.late_minutes
-    )
+def build_today_summary(today_str: str, users: List[User], records: List[DailyWorkRecord]) -> dict:
+    """Hodimlar va ularning bugungi yozuvlaridan umumiy holatni yig'ish"""
+    records_by_user = {r.user_id: r for r in records}
+    
+    summary = []
+    for user in users:
+        record = records_by_user.get(str(user.id))
+        
+        summary.append({
+            "user_id": str(user.id),
+            "full_name": user.full_name,
+            "username": user.username,
+            "work_hours": f"{user.work_start_hour}:00 - {user.work_end_hour}:00",
+            "locations_count": record.total_locations if record else 0,
+            "valid_locations": record.valid_locations if record else 0,
+            "present_hours": record.present_hours if record else 0,
+            "late_minutes": record.late_minutes if record else 0,
+            "flagged_locations": record.flagged_locations if record else 0,
+            "has_data": record is not None
+        })
+    
+    return {
+        "date": today_str,
+        "total_employees": len(users),
+        "employees_with_data": sum(1 for s in summary if s["has_data"]),
+        "employees": summary
+    }
+
+
+async def range_report_response(request: Request, response: Response, user_id: str, start_date: str, end_date: str):
+    """
+    Oraliq hisobot: ETag bilan birga keshlanadi, shuning uchun keshdagi
+    oraliq uchun 304 ham, to'liq javob ham bazaga murojaatsiz qaytadi.
+    `Accept: application/x-ndjson` - keshsiz, kunlar kursordan oqim bilan.
+    """
+    if ndjson.wants_ndjson(request):
+        validators = (await daily_records_validators(user_id, start_date, end_date)).variant("ndjson")
+        if validators.not_modified(request):
+            return validators.not_modified_response()
+        return ndjson.response(
+            iter_range_rows(user_id, start_date, end_date), headers={**validators.headers(), "Vary": "Accept"}
+        )
+    
+    response.headers["Vary"] = "Accept"
+    key = await report_key(user_id, start_date, end_date)
+    cached = await report_cache.get(key)
+    if cached is None:
+        # Kalit (hodim avlodi) yozuvlardan oldin olingan: orada ping kelsa
+        # invalidate_reports avlodni oshiradi va bu eskirgan qiymat o'qilmaydi
+        validators = await daily_records_validators(user_id, start_date, end_date)
+        records = await load_range_records(user_id, start_date, end_date)
+        cached = {
+            **validators.to_dict(),
+            "report": build_range_report(start_date, end_date, records).model_dump(mode="json"),
+        }
+        await report_cache.set(key, cached)
+    
+    validators = Validators.from_dict(cached)
+    if validators.not_modified(request):
+        return validators.not_modified_response()
+    validators.apply(response)
+    return cached["report"]
 
 
 @router.get("/daily", response_model=Optional[DailyReportResponse])
@@ -32,7 +91,7 @@ async def get_daily_report(
 ):
     """Kunlik hisobot (o'zim uchun)"""
     if date_str is None:
-        date_str = date.today().isoformat()
+        date_str = local_today().isoformat()
     
     record = await DailyWorkRecord.find_one(
         DailyWorkRecord.user_id == str(user.id),
@@ -45,38 +104,31 @@ async def get_daily_report(
     return record_to_response(record)
 
 
+@router.get("/timeline", response_model=Optional[TimelineResponse])
+async def get_timeline(
+    date_str: str = Query(default=None, description="Sana (YYYY-MM-DD)"),
+    user: User = Depends(get_approved_user)
+):
+    """Kunlik vaqt chizig'i: ofisda / tashqarida / ping yo'q oraliqlari (o'zim uchun)"""
+    return await get_day_timeline(str(user.id), date_str or local_today().isoformat())
+
+
 @router.get("/range", response_model=MonthlyReportResponse)
 async def get_range_report(
+    request: Request,
+    response: Response,
     start_date: str = Query(..., description="Boshlanish sanasi (YYYY-MM-DD)"),
     end_date: str = Query(..., description="Tugash sanasi (YYYY-MM-DD)"),
     user: User = Depends(get_approved_user)
 ):
     """Sana oralig'idagi hisobot (o'zim uchun)"""
-    records = await DailyWorkRecord.find(
-        DailyWorkRecord.user_id == str(user.id),
-        DailyWorkRecord.date >= start_date,
-        DailyWorkRecord.date <= end_date
-    ).sort(DailyWorkRecord.date).to_list()
-    
-    total_work = sum(r.total_work_hours for r in records)
-    total_present = sum(r.present_hours for r in records)
-    total_absent = sum(r.absent_hours for r in records)
-    efficiency = (total_present / total_work * 100) if total_work > 0 else 0
-    
-    return MonthlyReportResponse(
-        start_date=start_date,
-        end_date=end_date,
-        total_days=len(records),
-        total_work_hours=round(total_work, 2),
-        total_present_hours=round(total_present, 2),
-        total_absent_hours=round(total_absent, 2),
-        efficiency_percent=round(efficiency, 1),
-        daily_details=[record_to_response(r) for r in records]
-    )
+    return await range_report_response(request, response, str(user.id), start_date, end_date)
 
 
 @router.get("/monthly", response_model=MonthlyReportResponse)
 async def get_monthly_report(
+    request: Request,
+    response: Response,
     year: int = Query(...),
     month: int = Query(...),
     user: User = Depends(get_approved_user)
@@ -92,27 +144,7 @@ async def get_monthly_report(
     end_dt = datetime.strptime(end_date, "%Y-%m-%d") - timedelta(days=1)
     end_date = end_dt.strftime("%Y-%m-%d")
     
-    records = await DailyWorkRecord.find(
-        DailyWorkRecord.user_id == str(user.id),
-        DailyWorkRecord.date >= start_date,
-        DailyWorkRecord.date <= end_date
-    ).sort(DailyWorkRecord.date).to_list()
-    
-    total_work = sum(r.total_work_hours for r in records)
-    total_present = sum(r.present_hours for r in records)
-    total_absent = sum(r.absent_hours for r in records)
-    efficiency = (total_present / total_work * 100) if total_work > 0 else 0
-    
-    return MonthlyReportResponse(
-        start_date=start_date,
-        end_date=end_date,
-        total_days=len(records),
-        total_work_hours=round(total_work, 2),
-        total_present_hours=round(total_present, 2),
-        total_absent_hours=round(total_absent, 2),
-        efficiency_percent=round(efficiency, 1),
-        daily_details=[record_to_response(r) for r in records]
-    )
+    return await range_report_response(request, response, str(user.id), start_date, end_date)
 
 
 # ============ Admin Reports ============
@@ -125,7 +157,7 @@ async def admin_get_user_daily_report(
 ):
     """Admin: Hodimning kunlik hisoboti"""
     if date_str is None:
-        date_str = date.today().isoformat()
+        date_str = local_today().isoformat()
     
     record = await DailyWorkRecord.find_one(
         DailyWorkRecord.user_id == user_id,
@@ -138,69 +170,115 @@ async def admin_get_user_daily_report(
     return record_to_response(record)
 
 
+@router.get("/admin/user/{user_id}/timeline", response_model=Optional[TimelineResponse])
+async def admin_get_user_timeline(
+    user_id: str,
+    date_str: str = Query(default=None),
+    admin: User = Depends(get_admin_user)
+):
+    """Admin: Hodimning kunlik vaqt chizig'i"""
+    return await get_day_timeline(user_id, date_str or local_today().isoformat())
+
+
 @router.get("/admin/user/{user_id}/range", response_model=MonthlyReportResponse)
 async def admin_get_user_range_report(
+    request: Request,
+    response: Response,
     user_id: str,
     start_date: str = Query(...),
     end_date: str = Query(...),
     admin: User = Depends(get_admin_user)
 ):
     """Admin: Hodimning sana oralig'idagi hisoboti"""
-    records = await DailyWorkRecord.find(
-        DailyWorkRecord.user_id == user_id,
-        DailyWorkRecord.date >= start_date,
-        DailyWorkRecord.date <= end_date
-    ).sort(DailyWorkRecord.date).to_list()
-    
-    total_work = sum(r.total_work_hours for r in records)
-    total_present = sum(r.present_hours for r in records)
-    total_absent = sum(r.absent_hours for r in records)
-    efficiency = (total_present / total_work * 100) if total_work > 0 else 0
-    
-    return MonthlyReportResponse(
-        start_date=start_date,
-        end_date=end_date,
-        total_days=len(records),
-        total_work_hours=round(total_work, 2),
-        total_present_hours=round(total_present, 2),
-        total_absent_hours=round(total_absent, 2),
-        efficiency_percent=round(efficiency, 1),
-        daily_details=[record_to_response(r) for r in records]
-    )
+    return await range_report_response(request, response, user_id, start_date, end_date)
 
 
 @router.get("/admin/today-summary")
 async def admin_get_today_summary(admin: User = Depends(get_admin_user)):
     """Admin: Bugungi umumiy holat"""
-    today_str = date.today().isoformat()
+    today_str = local_today().isoformat()
     
     users = await User.find(
         User.is_approved == True,
         User.is_admin == False
     ).to_list()
     
-    summary = []
-    for user in users:
-        record = await DailyWorkRecord.find_one(
-            DailyWorkRecord.user_id == str(user.id),
-            DailyWorkRecord.date == today_str
+    # Bitta so'rov bilan barcha bugungi yozuvlar (har bir hodim uchun alohida emas)
+    records = await DailyWorkRecord.find(
+        In(DailyWorkRecord.user_id, [str(u.id) for u in users]),
+        DailyWorkRecord.date == today_str
+    ).to_list()
+    
+    return build_today_summary(today_str, users, records)
+
+
+@router.get("/admin/sites", response_model=List[SiteReportItem])
+async def admin_get_sites_report(
+    start_date: str = Query(...),
+    end_date: str = Query(...),
+    admin: User = Depends(get_admin_user)
+):
+    """Admin: ofislar (filiallar) bo'yicha pinglar, hodimlar va kunlar soni"""
+    try:
+        day_start = day_bounds_utc(datetime.strptime(start_date, "%Y-%m-%d").date())[0]
+        day_end = day_bounds_utc(datetime.strptime(end_date, "%Y-%m-%d").date())[1]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Noto'g'ri sana formati. YYYY-MM-DD formatida kiriting.")
+    
+    pipeline = [
+        {"$match": {"timestamp": {"$gte": day_start, "$lte": day_end}, "is_valid": True}},
+        {"$group": {
+            "_id": "$office_id",
+            "total_locations": {"$sum": 1},
+            "employees": {"$addToSet": "$user_id"},
+            "days": {"$addToSet": {"$ifNull": [
+                "$day", {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp", "timezone": settings.TIMEZONE}}
+            ]}},
+        }},
+        {"$sort": {"total_locations": -1}},
+    ]
+    rows = await LocationLog.get_motor_collection().aggregate(pipeline).to_list(length=None)
+    
+    office_names = {str(o.id): o.name for o in await Office.find_all().to_list()}
+    
+    return [
+        SiteReportItem(
+            office_id=r["_id"],
+            name=office_names.get(r["_id"]) if r["_id"] else None,
+            total_locations=r["total_locations"],
+            employees=len(r["employees"]),
+            days=len(r["days"])
         )
-        
-        summary.append({
-            "user_id": str(user.id),
-            "full_name": user.full_name,
-            "username": user.username,
-            "work_hours": f"{user.work_start_hour}:00 - {user.work_end_hour}:00",
-            "locations_count": record.total_locations if record else 0,
-            "valid_locations": record.valid_locations if record else 0,
-            "present_hours": record.present_hours if record else 0,
-            "late_minutes": record.late_minutes if record else 0,
-            "has_data": record is not None
-        })
+        for r in rows
+    ]
+
+
+@router.get("/admin/timesheet")
+async def admin_get_timesheet(
+    year: int = Query(...),
+    month: int = Query(...),
+    overtime_rate: float = Query(1.5, ge=0),
+    late_grace_minutes: float = Query(0, ge=0),
+    workdays: str = Query("0,1,2,3,4", description="Ish kunlari (0 - dushanba)"),
+    format: str = Query("json", pattern="^(json|csv)$"),
+    admin: User = Depends(get_admin_user)
+):
+    """Admin: barcha hodimlar uchun oylik tabel (payroll)"""
+    try:
+        days = timesheet_service.parse_workdays(workdays)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Ish kunlari 0-6 oralig'ida, vergul bilan kiritilishi kerak")
+    try:
+        timesheet_service.check_period(year, month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return {
-        "date": today_str,
-        "total_employees": len(users),
-        "employees_with_data": sum(1 for s in summary if s["has_data"]),
-        "employees": summary
-    }
+    sheet = await timesheet_service.build_timesheet(year, month, overtime_rate, late_grace_minutes, days)
+    
+    if format == "csv":
+        return Response(
+            content=timesheet_service.timesheet_csv(sheet),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="timesheet-{year}-{month:02d}.csv"'}
+        )
+    return sheet
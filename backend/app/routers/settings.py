@@ -1,40 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
-import json
 
-from app.models import User, Settings
+from app.models import User
 from app.schemas import (
     WorkSettingsResponse, OfficeLocationSettings, 
     OfficeAreaSettings, LocationIntervalUpdate
 )
 from app.auth import get_admin_user, get_approved_user
+from app.services.settings_service import get_setting, set_setting
 
 router = APIRouter(prefix="/settings", tags=["Settings"])
 
 
-async def get_setting(key: str) -> dict:
-    """Get setting by key"""
-    setting = await Settings.find_one(Settings.key == key)
-    if setting:
-        try:
-            return json.loads(setting.value)
-        except json.JSONDecodeError:
-            return {}
-    return {}
-
-
-async def set_setting(key: str, value: dict):
-    """Set or update setting"""
-    from datetime import datetime
-    setting = await Settings.find_one(Settings.key == key)
-    if setting:
-        setting.value = json.dumps(value)
-        setting.updated_at = datetime.utcnow()
-        await setting.save()
-    else:
-        setting = Settings(key=key, value=json.dumps(value))
-        await setting.insert()
-
-
 @router.get("/office", response_model=WorkSettingsResponse)
 async def get_office_settings(user: User = Depends(get_approved_user)):
     """Ofis sozlamalarini olish (barcha foydalanuvchilar uchun)"""
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional
 from bson import ObjectId
 from datetime import datetime
 
-from app.models import User
-from app.schemas import UserResponse, UserApprove, UserWorkHoursUpdate
-from app.auth import get_admin_user
+from app.models import User, Office
+from app.schemas import (
+    UserResponse, UserApprove, UserWorkHoursUpdate, UserOfficesUpdate,
+    UserSelection, UserBulkApprove, UserBulkWorkHours, BulkUserResult, UserSearchPage
+)
+from app.auth import get_admin_user, invalidate_user
+from app.services import user_service
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -22,6 +26,7 @@ def user_to_response(user: User) -> UserResponse:
         is_admin=user.is_admin,
         work_start_hour=user.work_start_hour,
         work_end_hour=user.work_end_hour,
+        office_ids=user.office_ids,
         created_at=user.created_at
     )
 
@@ -54,6 +59,68 @@ async def get_all_users(admin: User = Depends(get_admin_user)):
     return [user_to_response(u) for u in users]
 
 
+@router.get("/search", response_model=UserSearchPage)
+async def search_users(
+    q: Optional[str] = Query(default=None, max_length=100, description="Ism, username yoki telegram_id boshi"),
+    status_filter: str = Query(default="all", alias="status", description="pending | approved | active | inactive | all"),
+    after: Optional[str] = Query(default=None, description="Oldingi sahifaning `next` qiymati"),
+    limit: int = Query(default=50, ge=1, le=200),
+    admin: User = Depends(get_admin_user)
+):
+    """Hodimlarni qidirish (indeks bo'yicha, sahifalab)"""
+    try:
+        users, next_after = await user_service.search_users(q, status_filter, after, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return UserSearchPage(items=[user_to_response(u) for u in users], next=next_after)
+
+
+# ============ Ommaviy amallar ============
+
+def check_work_hours(start: int, end: int):
+    if start >= end:
+        raise HTTPException(status_code=400, detail="Boshlanish vaqti tugash vaqtidan kichik bo'lishi kerak")
+
+
+async def run_bulk(operation) -> BulkUserResult:
+    try:
+        return await operation
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/bulk/approve", response_model=BulkUserResult)
+async def bulk_approve_users(data: UserBulkApprove, admin: User = Depends(get_admin_user)):
+    """Bir nechta foydalanuvchini tasdiqlash"""
+    check_work_hours(data.work_start_hour, data.work_end_hour)
+    return await run_bulk(user_service.bulk_update(
+        data,
+        {"is_approved": True, "work_start_hour": data.work_start_hour, "work_end_hour": data.work_end_hour},
+        [user_service.skip_approved]
+    ))
+
+
+@router.post("/bulk/revoke", response_model=BulkUserResult)
+async def bulk_revoke_users(data: UserSelection, admin: User = Depends(get_admin_user)):
+    """Bir nechta foydalanuvchi ruxsatini bekor qilish (faqat user_ids bo'yicha)"""
+    return await run_bulk(user_service.bulk_update(data, {"is_approved": False}, filters=None))
+
+
+@router.post("/bulk/reject", response_model=BulkUserResult)
+async def bulk_reject_users(data: UserSelection, admin: User = Depends(get_admin_user)):
+    """Bir nechta foydalanuvchini rad etish (o'chirish): user_ids yoki status=pending + expected_count"""
+    return await run_bulk(user_service.bulk_delete(data))
+
+
+@router.put("/bulk/work-hours", response_model=BulkUserResult)
+async def bulk_update_work_hours(data: UserBulkWorkHours, admin: User = Depends(get_admin_user)):
+    """Bir nechta hodim ish vaqtini yangilash"""
+    check_work_hours(data.work_start_hour, data.work_end_hour)
+    return await run_bulk(user_service.bulk_update(
+        data, {"work_start_hour": data.work_start_hour, "work_end_hour": data.work_end_hour}
+    ))
+
+
 @router.post("/{user_id}/approve", response_model=UserResponse)
 async def approve_user(
     user_id: str,
@@ -77,6 +144,7 @@ async def approve_user(
     user.work_end_hour = data.work_end_hour
     user.updated_at = datetime.utcnow()
     await user.save()
+    await invalidate_user(user.telegram_id)
     
     return user_to_response(user)
 
@@ -93,6 +161,7 @@ async def reject_user(user_id: str, admin: User = Depends(get_admin_user)):
         raise HTTPException(status_code=404, detail="Foydalanuvchi topilmadi")
     
     await user.delete()
+    await invalidate_user(user.telegram_id)
     
     return {"message": "Foydalanuvchi o'chirildi"}
 
@@ -114,6 +183,7 @@ async def revoke_user(user_id: str, admin: User = Depends(get_admin_user)):
     user.is_approved = False
     user.updated_at = datetime.utcnow()
     await user.save()
+    await invalidate_user(user.telegram_id)
     
     return {"message": "Ruxsat bekor qilindi"}
 
@@ -140,6 +210,35 @@ async def update_work_hours(
     user.work_end_hour = data.work_end_hour
     user.updated_at = datetime.utcnow()
     await user.save()
+    await invalidate_user(user.telegram_id)
+    
+    return user_to_response(user)
+
+
+@router.put("/{user_id}/offices", response_model=UserResponse)
+async def update_user_offices(
+    user_id: str,
+    data: UserOfficesUpdate,
+    admin: User = Depends(get_admin_user)
+):
+    """Hodimni ofislarga biriktirish"""
+    if not ObjectId.is_valid(user_id) or not all(ObjectId.is_valid(i) for i in data.office_ids):
+        raise HTTPException(status_code=400, detail="Noto'g'ri ID formati")
+    
+    user = await User.get(ObjectId(user_id))
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="Foydalanuvchi topilmadi")
+    
+    office_ids = list(dict.fromkeys(data.office_ids))
+    found = await Office.find({"_id": {"$in": [ObjectId(i) for i in office_ids]}}).count()
+    if found != len(office_ids):
+        raise HTTPException(status_code=404, detail="Ofis topilmadi")
+    
+    user.office_ids = office_ids
+    user.updated_at = datetime.utcnow()
+    await user.save()
+    await invalidate_user(user.telegram_id)
     
     return user_to_response(user)
 
@@ -0,0 +1,381 @@
+"""
+Davriy fon vazifalari - barcha workerlar va hostlar uchun bitta nusxada.
+
+Rahbarlik (leader election): har bir API jarayoni `scheduler_leases` dagi
+bitta hujjatni egallashga urinadi. Egasi (leader) uni har LEASE/3 soniyada
+yangilaydi (heartbeat); jarayon o'lsa yoki tarmoqdan uzilsa lease muddati
+o'tadi va boshqa worker uni oladi (failover SCHEDULER_LEASE_SECONDS ichida).
+To'xtatilganda lease darhol bo'shatiladi - deploy paytida kutilmaydi.
+
+Faqat leader:
+- `services` - doimiy fon vazifalari (ping monitor): rahbarlik olinganda
+  ishga tushadi, yo'qolganda to'xtatiladi;
+- `jobs` - cron (`"30 0 * * *"`, TIMEZONE bo'yicha) yoki interval bo'yicha.
+
+Vazifaning navbatdagi vaqti `scheduled_jobs.next_run_at` da; slot uni atomar
+surish orqali olinadi - soat farqi yoki uzilish tufayli qisqa vaqt ikki leader
+bo'lib qolsa ham bitta slot bir marta bajariladi. O'tkazib yuborilgan slotlar
+(hech kim leader bo'lmagan vaqt) bitta ishga tushirish bilan qoplanadi.
+Oxirgi natija, xatolik va davomiylik shu hujjatda (GET /api/health/scheduler).
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Union
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.cache import WORKER_ID
+from app.config import settings
+from app.models import ScheduledJob, SchedulerLease
+from app.timezone import org_tz, to_local
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "scheduler"
+HOST = f"{socket.gethostname()}:{os.getpid()}"
+MAX_ERROR_LENGTH = 500
+
+
+# ============ Jadval ============
+
+def _parse_field(part: str, low: int, high: int) -> Set[int]:
+    """'*', '5', '1-5', '*/15', '0-30/10', '1,15' -> qiymatlar to'plami"""
+    values = set()
+    for item in part.split(","):
+        step = 1
+        if "/" in item:
+            item, step_str = item.split("/", 1)
+            step = int(step_str)
+            if step < 1:
+                raise ValueError(f"Noto'g'ri qadam: {part}")
+        if item == "*":
+            start, end = low, high
+        elif "-" in item:
+            start, end = (int(v) for v in item.split("-", 1))
+        else:
+            start = int(item)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"{part}: qiymat {low}-{high} oralig'ida bo'lishi kerak")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class Cron:
+    """5 maydonli cron ifodasi: daqiqa soat kun oy hafta_kuni (0/7 - yakshanba)"""
+
+    def __init__(self, expr: str):
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron 5 ta maydondan iborat bo'lishi kerak: {expr!r}")
+        self.expr = expr
+        self.minutes = _parse_field(parts[0], 0, 59)
+        self.hours = _parse_field(parts[1], 0, 23)
+        self.days = _parse_field(parts[2], 1, 31)
+        self.months = _parse_field(parts[3], 1, 12)
+        self.weekdays = {d % 7 for d in _parse_field(parts[4], 0, 7)}
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    def __str__(self) -> str:
+        return self.expr
+
+    def _day_matches(self, day: datetime) -> bool:
+        in_days = day.day in self.days
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        # Klassik cron: kun va hafta kuni ikkalasi berilsa - biri mos kelishi yetarli
+        if self._any_day:
+            return in_weekdays
+        if self._any_weekday:
+            return in_days
+        return in_days or in_weekdays
+
+    def first_run(self, now: datetime) -> datetime:
+        return self.next_after(now)
+
+    def next_after(self, after: datetime) -> datetime:
+        """Naive UTC `after` dan keyingi birinchi mos daqiqa (naive UTC)"""
+        local = to_local(after).replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        limit = local.year + 5
+        while local.year <= limit:
+            if local.month not in self.months:
+                local = (local.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(local):
+                local = local.replace(hour=0, minute=0) + timedelta(days=1)
+            elif local.hour not in self.hours:
+                local = local.replace(minute=0) + timedelta(hours=1)
+            elif local.minute not in self.minutes:
+                local += timedelta(minutes=1)
+            else:
+                return local.replace(tzinfo=org_tz()).astimezone(timezone.utc).replace(tzinfo=None)
+        raise ValueError(f"Cron hech qachon bajarilmaydi: {self.expr!r}")
+
+
+class Every:
+    """Qat'iy interval; birinchi marta - darhol"""
+
+    def __init__(self, interval: timedelta):
+        if interval.total_seconds() <= 0:
+            raise ValueError("Interval musbat bo'lishi kerak")
+        self.interval = interval
+
+    def __str__(self) -> str:
+        return f"every {int(self.interval.total_seconds())}s"
+
+    def first_run(self, now: datetime) -> datetime:
+        return now
+
+    def next_after(self, after: datetime) -> datetime:
+        return after + self.interval
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Awaitable[object]]
+    schedule: Union[Cron, Every]
+    timeout: Optional[float] = None
+
+
+# ============ Rejalashtiruvchi ============
+
+class Scheduler:
+    def __init__(self, lease_name: str = LEASE_NAME):
+        self.lease_name = lease_name
+        self.worker_id = WORKER_ID
+        self.jobs: Dict[str, Job] = {}
+        self.services: Dict[str, Callable[[], Awaitable[None]]] = {}
+        self.is_leader = False
+        self._lease_valid_until = 0.0  # monotonic: oxirgi muvaffaqiyatli heartbeat + lease
+        self._job_tasks: Dict[str, asyncio.Task] = {}
+        self._service_tasks: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[object]],
+        cron: Optional[str] = None,
+        every: Optional[timedelta] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if (cron is None) == (every is None):
+            raise ValueError("cron yoki every dan bittasi kerak")
+        self.jobs[name] = Job(name, func, Cron(cron) if cron else Every(every), timeout)
+
+    def add_service(self, name: str, run: Callable[[], Awaitable[None]]) -> None:
+        """Faqat leader'da ishlaydigan doimiy vazifa (rahbarlik yo'qolsa bekor qilinadi)"""
+        self.services[name] = run
+
+    @property
+    def lease_seconds(self) -> int:
+        return settings.SCHEDULER_LEASE_SECONDS
+
+    # ---- lease ----
+
+    async def _heartbeat(self) -> bool:
+        """Lease'ni olish yoki yangilash; boshqa jarayonda bo'lsa False"""
+        now = datetime.utcnow()
+        fields = {"holder": self.worker_id, "host": HOST, "heartbeat_at": now,
+                  "expires_at": now + timedelta(seconds=self.lease_seconds)}
+        if not self.is_leader:
+            fields["acquired_at"] = now
+        started = time.monotonic()
+        try:
+            await SchedulerLease.get_motor_collection().update_one(
+                {"_id": self.lease_name, "$or": [{"holder": self.worker_id}, {"expires_at": {"$lte": now}}]},
+                {"$set": fields},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Hujjat bor, lekin boshqa jarayonniki va muddati o'tmagan
+            return False
+        self._lease_valid_until = started + self.lease_seconds
+        return True
+
+    async def _release(self) -> None:
+        await SchedulerLease.get_motor_collection().update_one(
+            {"_id": self.lease_name, "holder": self.worker_id},
+            {"$set": {"expires_at": datetime.utcnow()}},
+        )
+
+    async def _become_leader(self) -> None:
+        await self._sync_jobs()
+        self.is_leader = True
+        print(f"👑 Scheduler: leader ({HOST}), {len(self.jobs)} vazifa, {len(self.services)} servis")
+
+    async def _step_down(self) -> None:
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        tasks = list(self._service_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._service_tasks = {}
+
+    def _ensure_services(self) -> None:
+        for name, run in self.services.items():
+            task = self._service_tasks.get(name)
+            if task is not None and not task.done():
+                continue
+            if task is not None and not task.cancelled() and task.exception() is not None:
+                logger.error("Scheduler service %s crashed, restarting", name, exc_info=task.exception())
+            self._service_tasks[name] = asyncio.create_task(run())
+
+    # ---- jobs ----
+
+    async def _sync_jobs(self) -> None:
+        """Yangi vazifalar uchun hujjat; jadvali o'zgarganlar uchun navbatdagi vaqt qayta hisoblanadi"""
+        collection = ScheduledJob.get_motor_collection()
+        now = datetime.utcnow()
+        for job in self.jobs.values():
+            schedule = str(job.schedule)
+            await collection.update_one(
+                {"_id": job.name},
+                {"$setOnInsert": {"schedule": schedule, "next_run_at": job.schedule.first_run(now),
+                                  "runs": 0, "failures": 0}},
+                upsert=True,
+            )
+            await collection.update_one(
+                {"_id": job.name, "schedule": {"$ne": schedule}},
+                {"$set": {"schedule": schedule, "next_run_at": job.schedule.first_run(now)}},
+            )
+
+    async def _run_due(self) -> Optional[datetime]:
+        """Vaqti kelgan slotlarni olish va bajarish; eng yaqin navbatdagi vaqtni qaytaradi"""
+        collection = ScheduledJob.get_motor_collection()
+        now = datetime.utcnow()
+        upcoming = []
+        async for doc in collection.find({"_id": {"$in": list(self.jobs)}}, {"next_run_at": 1}):
+            job = self.jobs[doc["_id"]]
+            if doc["next_run_at"] > now:
+                upcoming.append(doc["next_run_at"])
+                continue
+            running = self._job_tasks.get(job.name)
+            if running is not None and not running.done():
+                continue
+            next_run_at = job.schedule.next_after(now)
+            claimed = await collection.find_one_and_update(
+                {"_id": job.name, "next_run_at": doc["next_run_at"]},
+                {"$set": {"next_run_at": next_run_at, "last_started_at": now,
+                          "last_status": "running", "last_holder": HOST}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if claimed is None:
+                # Slotni boshqa leader olib ulgurdi
+                continue
+            upcoming.append(next_run_at)
+            self._job_tasks[job.name] = asyncio.create_task(self._execute(job))
+        return min(upcoming) if upcoming else None
+
+    async def _execute(self, job: Job) -> None:
+        started = time.perf_counter()
+        status, error, result = "ok", None, None
+        try:
+            result = await asyncio.wait_for(job.func(), timeout=job.timeout)
+        except asyncio.CancelledError:
+            status, error = "failed", "cancelled"
+            raise
+        except Exception as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"[:MAX_ERROR_LENGTH]
+            logger.exception("Scheduled job %s failed", job.name)
+        finally:
+            duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            try:
+                await ScheduledJob.get_motor_collection().update_one(
+                    {"_id": job.name},
+                    {"$set": {
+                        "last_status": status,
+                        "last_error": error,
+                        "last_result": None if result is None else str(result),
+                        "last_finished_at": datetime.utcnow(),
+                        "last_duration_ms": duration_ms,
+                    }, "$inc": {"runs": 1, "failures": int(status == "failed")}},
+                )
+            except Exception:
+                logger.exception("Scheduled job %s status could not be saved", job.name)
+
+    # ---- loop ----
+
+    async def _tick(self) -> Optional[datetime]:
+        try:
+            leader = await self._heartbeat()
+        except Exception:
+            logger.exception("Scheduler heartbeat failed")
+            # Baza vaqtincha ishlamasa lease muddati tugaguncha leader bo'lib qolinadi
+            leader = self.is_leader and time.monotonic() < self._lease_valid_until - 1
+        if leader and not self.is_leader:
+            await self._become_leader()
+        elif not leader:
+            if self.is_leader:
+                logger.warning("Scheduler leadership lost on %s", HOST)
+            await self._step_down()
+            return None
+        self._ensure_services()
+        return await self._run_due()
+
+    async def run(self) -> None:
+        heartbeat = max(self.lease_seconds / 3, 1)
+        try:
+            while True:
+                try:
+                    next_run_at = await self._tick()
+                except Exception:
+                    logger.exception("Scheduler tick failed")
+                    next_run_at = None
+                sleep = heartbeat
+                if next_run_at is not None:
+                    sleep = min(sleep, (next_run_at - datetime.utcnow()).total_seconds())
+                await asyncio.sleep(max(sleep, 0.05))
+        finally:
+            await self._step_down()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        jobs = list(self._job_tasks.values())
+        for task in jobs:
+            task.cancel()
+        await asyncio.gather(self._task, *jobs, return_exceptions=True)
+        self._task = None
+        self._job_tasks = {}
+        try:
+            await self._release()
+        except Exception:
+            logger.exception("Scheduler lease release failed")
+
+    async def status(self) -> dict:
+        lease = await SchedulerLease.get_motor_collection().find_one({"_id": self.lease_name})
+        jobs: List[dict] = []
+        async for doc in ScheduledJob.get_motor_collection().find({}).sort("_id", 1):
+            doc["name"] = doc.pop("_id")
+            doc["registered"] = doc["name"] in self.jobs
+            jobs.append(doc)
+        if lease is not None:
+            lease.pop("_id")
+            lease["active"] = lease["expires_at"] > datetime.utcnow()
+        return {
+            "worker": HOST,
+            "is_leader": self.is_leader,
+            "leader": lease,
+            "services": {
+                name: "running" if name in self._service_tasks and not self._service_tasks[name].done() else "stopped"
+                for name in self.services
+            },
+            "jobs": jobs,
+        }
+
+
+scheduler = Scheduler()
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -34,12 +34,18 @@ class UserResponse(UserBase):
     is_admin: bool
     work_start_hour: int
     work_end_hour: int
+    office_ids: List[str] = []
     created_at: datetime
     
     class Config:
         from_attributes = True
 
 
+class UserSearchPage(BaseModel):
+    items: List[UserResponse]
+    next: Optional[str] = None  # keyingi sahifa uchun `after`
+
+
 class UserApprove(BaseModel):
     work_start_hour: int = 9
     work_end_hour: int = 18
@@ -50,10 +56,68 @@ class UserWorkHoursUpdate(BaseModel):
     work_end_hour: int
 
 
+class UserOfficesUpdate(BaseModel):
+    office_ids: List[str]  # bo'sh ro'yxat - istalgan ofis
+
+
+class UserSelection(BaseModel):
+    """Ommaviy amallar uchun: `user_ids` yoki filter (status/office_id)"""
+    user_ids: Optional[List[str]] = None
+    status: Optional[str] = None  # pending | approved | all
+    office_id: Optional[str] = None
+    # Filter bilan o'chirishda majburiy: filter tanlagan hodimlar soni
+    expected_count: Optional[int] = None
+
+
+class UserBulkApprove(UserSelection):
+    work_start_hour: int = 9
+    work_end_hour: int = 18
+
+
+class UserBulkWorkHours(UserSelection):
+    work_start_hour: int
+    work_end_hour: int
+
+
+class BulkUserItem(BaseModel):
+    user_id: str
+    status: str  # ok | skipped | not_found | invalid_id
+    detail: Optional[str] = None
+
+
+class BulkUserResult(BaseModel):
+    matched: int
+    modified: int
+    results: List[BulkUserItem]
+
+
 # ============ Location ============
 class LocationCreate(BaseModel):
     latitude: float
     longitude: float
+    accuracy: Optional[float] = Field(None, ge=0)  # metr (coords.accuracy)
+
+
+class LocationPing(LocationCreate):
+    timestamp: Optional[datetime] = None  # berilmasa - qabul qilingan vaqt
+
+
+class LocationBatch(BaseModel):
+    """Klient navbatidagi pinglar (tarmoq yo'qligida yig'ilgan)"""
+    pings: List[LocationPing] = Field(..., max_length=1000)
+
+
+class LocationBatchItem(BaseModel):
+    status: str  # ok | outside_hours | stale | rejected
+    id: Optional[str] = None
+    is_valid: Optional[bool] = None
+    distance: Optional[float] = None
+    flags: Optional[List[str]] = None
+
+
+class LocationBatchResult(BaseModel):
+    accepted: int
+    results: List[LocationBatchItem]
 
 
 class LocationResponse(BaseModel):
@@ -63,11 +127,56 @@ class LocationResponse(BaseModel):
     distance: Optional[float]
     is_valid: bool
     timestamp: datetime
+    flags: Optional[List[str]] = None
     
     class Config:
         from_attributes = True
 
 
+class FlaggedLocationResponse(BaseModel):
+    id: str
+    user_id: str
+    telegram_id: int
+    latitude: float
+    longitude: float
+    accuracy: Optional[float]
+    timestamp: datetime
+    day: str
+    reasons: List[str]
+    speed_kmh: Optional[float]
+    distance_from_prev: Optional[float]
+    prev_timestamp: Optional[datetime]
+    rejected: bool
+    location_id: Optional[str]
+    reviewed: bool
+    reviewed_by: Optional[int]
+    reviewed_at: Optional[datetime]
+
+
+class GeoPolygonQuery(BaseModel):
+    points: List[List[float]] = Field(..., max_length=500)  # [[lat, lon], ...] - kamida 3 ta nuqta
+    start_date: str
+    end_date: str
+    user_id: Optional[str] = None
+    limit: int = Field(1000, ge=1, le=10000)
+
+
+class GeoLocationResponse(LocationResponse):
+    user_id: str
+    telegram_id: int
+
+
+class NearbyUserResponse(BaseModel):
+    user_id: str
+    telegram_id: int
+    full_name: Optional[str]
+    username: Optional[str]
+    pings: int
+    min_distance: float
+    first_seen: datetime
+    last_seen: datetime
+
+
 # ============ Reports ============
 class DailyReportResponse(BaseModel):
     date: str
@@ -79,11 +188,29 @@ class DailyReportResponse(BaseModel):
     total_locations: int
     valid_locations: int
     late_minutes: int
+    flagged_locations: int = 0
     
     class Config:
         from_attributes = True
 
 
+class PresenceSegmentResponse(BaseModel):
+    kind: str  # office | outside | gap
+    start: datetime
+    end: datetime
+    pings: int
+
+
+class TimelineResponse(BaseModel):
+    """Kunlik vaqt chizig'i: DailyWorkRecord dagi tayyor segmentlar"""
+    date: str
+    work_start_time: Optional[datetime]
+    work_end_time: Optional[datetime]
+    present_hours: float
+    absent_hours: float
+    segments: List[PresenceSegmentResponse]
+
+
 class MonthlyReportResponse(BaseModel):
     start_date: str
     end_date: str
@@ -106,6 +233,11 @@ class TodayStatusResponse(BaseModel):
     work_end_hour: int
 
 
+class TodayDeltaResponse(TodayStatusResponse):
+    cursor: Optional[str]  # keyingi so'rov uchun `since` (oxirgi yozilgan ping ID si)
+    locations: List[LocationResponse]  # faqat `since` dan keyin yozilgan pinglar
+
+
 # ============ Settings ============
 class OfficeLocationSettings(BaseModel):
     latitude: float
@@ -133,5 +265,116 @@ class LocationIntervalUpdate(BaseModel):
     grace_period: int = 5
 
 
+# ============ Offices ============
+class OfficeBase(BaseModel):
+    name: str
+    kind: str = "circle"  # circle | polygon
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    radius: Optional[float] = None
+    polygon: Optional[List[List[float]]] = None  # [[lat, lon], ...]
+    is_active: bool = True
+
+
+class OfficeCreate(OfficeBase):
+    # Chegaralar faqat kiritishda: bazadagi eski ofislar ro'yxatda baribir ko'rinadi
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    radius: Optional[float] = Field(None, gt=0, le=10_000)  # metr
+    polygon: Optional[List[List[float]]] = Field(None, max_length=500)
+
+
+class OfficeResponse(OfficeBase):
+    id: str
+    created_at: datetime
+
+
+class SiteReportItem(BaseModel):
+    office_id: Optional[str]
+    name: Optional[str]
+    total_locations: int
+    employees: int
+    days: int
+
+
+# ============ Bot ============
+class BotRecipient(BaseModel):
+    id: str
+    telegram_id: int
+    full_name: Optional[str]
+    work_start_hour: int
+
+
+class BotRecipientsPage(BaseModel):
+    items: List[BotRecipient]
+    next: Optional[str] = None  # keyingi sahifa uchun `after`
+
+
+class BotConfig(BaseModel):
+    location_interval_minutes: int
+    live_min_gap_seconds: int  # live location pinglari orasidagi eng kichik oraliq
+
+
+class BotPing(BaseModel):
+    telegram_id: int
+    latitude: float
+    longitude: float
+    timestamp: Optional[datetime] = None  # berilmasa - qabul qilingan vaqt
+    accuracy: Optional[float] = Field(None, ge=0)  # metr (horizontal_accuracy)
+    live: bool = True  # live location (throttle qilinadi) yoki bir martalik lokatsiya
+
+
+class BotPingBatch(BaseModel):
+    pings: List[BotPing] = Field(..., max_length=1000)
+
+
+class BotPingResult(BaseModel):
+    telegram_id: int
+    status: str  # ok | throttled | unknown_user | not_approved | outside_hours | stale | rejected
+    is_valid: Optional[bool] = None
+    distance: Optional[float] = None
+    flags: Optional[List[str]] = None  # ishonchlilik tekshiruvi belgilari (PLAUSIBILITY_MODE=flag)
+
+
+class BotPingBatchResult(BaseModel):
+    accepted: int
+    results: List[BotPingResult]
+
+
+# ============ Report jobs ============
+class RangeJobParams(BaseModel):
+    user_id: str
+    start_date: str
+    end_date: str
+
+
+class TimesheetJobParams(BaseModel):
+    year: int = Field(..., ge=2000, le=2100)
+    month: int = Field(..., ge=1, le=12)
+    overtime_rate: float = Field(1.5, ge=0)
+    late_grace_minutes: float = Field(0, ge=0)
+    workdays: str = "0,1,2,3,4"
+    format: str = Field("json", pattern="^(json|csv)$")
+
+
+class ReportJobCreate(BaseModel):
+    kind: str  # range | timesheet
+    params: dict
+
+
+class ReportJobResponse(BaseModel):
+    id: str
+    kind: str
+    params: dict
+    status: str
+    error: Optional[str] = None
+    result_size: Optional[int] = None
+    content_type: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+
 # Update forward reference
 Token.model_rebuild()
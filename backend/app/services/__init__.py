@@ -1 +1 @@
-# Services module - currently empty, logic moved to routers
+# Services - routerlar uchun umumiy biznes logika
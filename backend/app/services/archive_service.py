@@ -0,0 +1,284 @@
+"""
+Eski LocationLog'larni ustunli arxivga (Arrow IPC) ko'chirish va o'qish.
+
+    {ARCHIVE_DIR}/location_logs/2024-03/<user_id>.arrow
+    {ARCHIVE_DIR}/location_logs/2024-03/_archived.json
+
+Har bir hodim fayli yozib bo'lingach (tmp + rename) uning pinglari hot
+kolleksiyadan partiyalab o'chiriladi. Qayta ishga tushirish xavfsiz: mavjud
+fayl yangi qatorlar bilan birlashtiriladi (id bo'yicha takrorlanmaydi).
+O'qish `pa.memory_map` orqali; ARCHIVE_COMPRESSION=none bo'lsa nusxa olinmaydi.
+
+Arxivlash API jarayonidagi scheduler leader'ida ham ishlaydi: pinglar
+kursordan `batch_size` tadan o'qilib darhol Arrow partiyalariga aylantiriladi
+(oylik hujjatlar ro'yxati xotirada yig'ilmaydi), pyarrow o'qish/yozish esa
+`asyncio.to_thread` da - event loop boshqa so'rovlar uchun bo'sh qoladi.
+So'rovlardagi o'qish (read_archived, archive_signature) ham thread'da;
+ARCHIVE_DIR sozlanmagan bo'lsa thread'ga o'tilmaydi.
+"""
+import asyncio
+import json
+import os
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.config import settings
+from app.models import LocationLog
+from app.timezone import local_day, local_today
+
+MARKER_FILE = "_archived.json"
+
+
+def _pa():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+    except ImportError as e:  # pragma: no cover - ixtiyoriy bog'liqlik
+        raise RuntimeError("Arxiv uchun pyarrow o'rnatilishi kerak: pip install pyarrow") from e
+    return pyarrow
+
+
+def _schema():
+    pa = _pa()
+    return pa.schema([
+        ("id", pa.string()),
+        ("telegram_id", pa.int64()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("distance", pa.float64()),
+        ("is_valid", pa.bool_()),
+        ("timestamp", pa.timestamp("us")),
+        ("office_id", pa.string()),
+        ("flags", pa.list_(pa.string())),
+    ])
+
+
+def archive_root() -> Optional[str]:
+    if not settings.ARCHIVE_DIR:
+        return None
+    return os.path.join(settings.ARCHIVE_DIR, "location_logs")
+
+
+def month_bounds(month: str) -> Tuple[datetime, datetime]:
+    """'2024-03' -> [2024-03-01, 2024-04-01)"""
+    year, mon = (int(x) for x in month.split("-"))
+    start = datetime(year, mon, 1)
+    end = datetime(year + 1, 1, 1) if mon == 12 else datetime(year, mon + 1, 1)
+    return start, end
+
+
+def user_file(month: str, user_id: str) -> Optional[str]:
+    root = archive_root()
+    if root is None:
+        return None
+    return os.path.join(root, month, f"{user_id}.arrow")
+
+
+def months_between(start: datetime, end: datetime) -> List[str]:
+    """[start, end] oralig'i qamraydigan oylar (fayllar UTC oy bo'yicha bo'lingan)"""
+    months = []
+    year, mon = start.year, start.month
+    while (year, mon) <= (end.year, end.month):
+        months.append(f"{year:04d}-{mon:02d}")
+        year, mon = (year + 1, 1) if mon == 12 else (year, mon + 1)
+    return months
+
+
+async def archive_signature(user_id: str, start: datetime, end: datetime) -> Optional[str]:
+    """Conditional GET uchun: arxiv fayli o'zgarsa ETag ham o'zgaradi (arxiv yo'q bo'lsa None)"""
+    if archive_root() is None:
+        return None
+    return await asyncio.to_thread(_archive_signature, user_id, start, end)
+
+
+def _archive_signature(user_id: str, start: datetime, end: datetime) -> Optional[str]:
+    parts = []
+    for month in months_between(start, end):
+        path = user_file(month, user_id)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            parts.append(f"{month}:{stat.st_mtime_ns}:{stat.st_size}")
+    return "|".join(parts) or None
+
+
+# ============ O'qish ============
+
+def _read_table(path: str):
+    pa = _pa()
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+async def read_archived(user_id: str, start: datetime, end: datetime) -> List[LocationLog]:
+    """[start, end] oralig'idagi arxivlangan pinglar (timestamp bo'yicha tartiblangan)"""
+    if archive_root() is None:
+        return []
+    return await asyncio.to_thread(_read_archived, user_id, start, end)
+
+
+def _read_archived(user_id: str, start: datetime, end: datetime) -> List[LocationLog]:
+    """read_archived ning sinxron qismi (memory_map + filter + to_pylist - thread'da)"""
+    pa = _pa()
+
+    result = []
+    for month in months_between(start, end):
+        path = user_file(month, user_id)
+        if os.path.exists(path):
+            table = _read_table(path)
+            ts = table.column("timestamp")
+            mask = pa.compute.and_(
+                pa.compute.greater_equal(ts, pa.scalar(start, pa.timestamp("us"))),
+                pa.compute.less_equal(ts, pa.scalar(end, pa.timestamp("us"))),
+            )
+            for row in table.filter(mask).to_pylist():
+                result.append(LocationLog.model_construct(
+                    id=ObjectId(row["id"]),
+                    user_id=user_id,
+                    telegram_id=row["telegram_id"],
+                    latitude=row["latitude"],
+                    longitude=row["longitude"],
+                    distance=row["distance"],
+                    is_valid=row["is_valid"],
+                    timestamp=row["timestamp"],
+                    office_id=row["office_id"],
+                    day=local_day(row["timestamp"]),
+                    # `flags` ustunisiz eski fayllar ham o'qiladi
+                    flags=row.get("flags"),
+                ))
+    return result
+
+
+# ============ Yozish ============
+
+def _rows_to_batch(rows: List[dict]):
+    return _pa().RecordBatch.from_pylist(rows, schema=_schema())
+
+
+def _conform(table):
+    """Eski fayl jadvalini joriy sxemaga keltirish (yangi ustunlar - null)"""
+    pa = _pa()
+    schema = _schema()
+    for field in schema:
+        if field.name not in table.column_names:
+            table = table.append_column(field, pa.nulls(len(table), field.type))
+    return table.select(schema.names).cast(schema)
+
+
+def _merge_write(path: str, batches: list) -> None:
+    """Yangi partiyalarni mavjud fayl bilan birlashtirib yozish (sinxron - thread'da)"""
+    pa = _pa()
+    table = pa.Table.from_batches(batches, schema=_schema())
+    if os.path.exists(path):
+        existing = _conform(_read_table(path))
+        keep = pa.compute.invert(pa.compute.is_in(existing.column("id"), value_set=table.column("id")))
+        table = pa.concat_tables([existing.filter(keep), table])
+    _write_table(path, table)
+
+
+def _write_table(path: str, table) -> None:
+    pa = _pa()
+    table = table.sort_by("timestamp")
+    compression = None if settings.ARCHIVE_COMPRESSION == "none" else settings.ARCHIVE_COMPRESSION
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+ROW_PROJECTION = {
+    "_id": 1, "telegram_id": 1, "latitude": 1, "longitude": 1, "distance": 1,
+    "is_valid": 1, "timestamp": 1, "office_id": 1, "flags": 1,
+}
+
+
+def _doc_to_row(doc: dict) -> dict:
+    return {
+        "id": str(doc["_id"]),
+        "telegram_id": doc.get("telegram_id"),
+        "latitude": doc.get("latitude"),
+        "longitude": doc.get("longitude"),
+        "distance": doc.get("distance"),
+        "is_valid": doc.get("is_valid", False),
+        "timestamp": doc["timestamp"],
+        "office_id": doc.get("office_id"),
+        "flags": doc.get("flags"),
+    }
+
+
+async def archive_month(month: str, batch_size: int = 5000) -> dict:
+    """Bitta yopilgan oyni arxivlash. {"users": n, "rows": n}"""
+    root = archive_root()
+    if root is None:
+        raise RuntimeError("ARCHIVE_DIR sozlanmagan")
+    start, end = month_bounds(month)
+    # Fayllar UTC oy bo'yicha: oy UTC da tugamaguncha unga yozuvlar tushishi mumkin
+    if end > datetime.utcnow():
+        raise ValueError(f"{month} hali yopilmagan")
+
+    collection = LocationLog.get_motor_collection()
+    month_filter = {"timestamp": {"$gte": start, "$lt": end}}
+    os.makedirs(os.path.join(root, month), exist_ok=True)
+
+    user_ids = await collection.distinct("user_id", month_filter)
+    total_rows = 0
+    for user_id in user_ids:
+        cursor = collection.find({"user_id": user_id, **month_filter}, ROW_PROJECTION).batch_size(batch_size)
+        batches, ids = [], []
+        while docs := await cursor.to_list(length=batch_size):
+            batches.append(await asyncio.to_thread(_rows_to_batch, [_doc_to_row(d) for d in docs]))
+            ids.extend(d["_id"] for d in docs)
+        if not ids:
+            continue
+
+        await asyncio.to_thread(_merge_write, user_file(month, user_id), batches)
+        for i in range(0, len(ids), batch_size):
+            await collection.delete_many({"_id": {"$in": ids[i:i + batch_size]}})
+        total_rows += len(ids)
+
+    await asyncio.to_thread(_write_marker, os.path.join(root, month), month, total_rows)
+    return {"users": len(user_ids), "rows": total_rows}
+
+
+def _write_marker(month_dir: str, month: str, rows: int) -> None:
+    marker_path = os.path.join(month_dir, MARKER_FILE)
+    archived_rows = rows
+    if os.path.exists(marker_path):
+        with open(marker_path) as f:
+            archived_rows += json.load(f).get("rows", 0)
+    with open(marker_path, "w") as f:
+        json.dump({
+            "month": month,
+            "users": len([n for n in os.listdir(month_dir) if n.endswith(".arrow")]),
+            "rows": archived_rows,
+            "compression": settings.ARCHIVE_COMPRESSION,
+            "archived_at": datetime.utcnow().isoformat(),
+        }, f)
+
+
+def months_to_archive(oldest: date, keep_months: int) -> List[str]:
+    """`oldest` oyidan boshlab, oxirgi `keep_months` oydan oldingi oylar"""
+    today = local_today()
+    limit_index = today.year * 12 + today.month - 1 - keep_months
+    months = []
+    index = oldest.year * 12 + oldest.month - 1
+    while index < limit_index:
+        months.append(f"{index // 12:04d}-{index % 12 + 1:02d}")
+        index += 1
+    return months
+
+
+async def archive_due(batch_size: int = 5000) -> List[dict]:
+    """ARCHIVE_KEEP_MONTHS dan eski barcha yopilgan oylarni arxivlash"""
+    oldest = await LocationLog.find_all().sort(LocationLog.timestamp).limit(1).to_list()
+    if not oldest:
+        return []
+    results = []
+    for month in months_to_archive(oldest[0].timestamp.date(), settings.ARCHIVE_KEEP_MONTHS):
+        results.append({"month": month, **await archive_month(month, batch_size=batch_size)})
+    return results
@@ -0,0 +1,271 @@
+"""
+Fon hisobot vazifalari (ReportJob).
+
+- Admin vazifa yuboradi va darhol `id` oladi; natija keyin olinadi.
+- Navbat - `report_jobs` kolleksiyasi: har bir worker jarayonida
+  REPORT_JOB_WORKERS ta vazifa parallel bajariladi, vazifa
+  `find_one_and_update` bilan atomar olinadi (bir nechta worker/host bo'lsa ham
+  bitta vazifa bir marta bajariladi).
+- Bir xil parametrli navbatdagi/bajarilayotgan vazifa qayta yaratilmaydi:
+  `active_key` ustidagi unique indeks.
+- Natija GridFS (`report_results`) da REPORT_JOB_TTL_HOURS saqlanadi, keyin
+  `cleanup()` (app.periodic, leader'da) faylni ham, vazifani ham o'chiradi.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pydantic import BaseModel, ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.cache import WORKER_ID
+from app.config import settings
+from app.models import ReportJob
+from app.schemas import RangeJobParams, TimesheetJobParams
+from app.services import report_service, timesheet_service
+
+logger = logging.getLogger(__name__)
+
+BUCKET_NAME = "report_results"
+POLL_SECONDS = 5
+CLEANUP_SECONDS = 60  # app.periodic (leader'da)
+
+# (content, content_type, filename)
+JobResult = Tuple[bytes, str, str]
+
+
+def _json_bytes(data) -> bytes:
+    return json.dumps(data, default=str, ensure_ascii=False).encode("utf-8")
+
+
+async def run_range(params: RangeJobParams) -> JobResult:
+    records = await report_service.load_range_records(params.user_id, params.start_date, params.end_date)
+    report = report_service.build_range_report(params.start_date, params.end_date, records)
+    content = await asyncio.to_thread(_json_bytes, report.model_dump(mode="json"))
+    return content, "application/json", f"report-{params.start_date}-{params.end_date}.json"
+
+
+async def run_timesheet(params: TimesheetJobParams) -> JobResult:
+    sheet = await timesheet_service.build_timesheet(
+        params.year, params.month, params.overtime_rate, params.late_grace_minutes,
+        timesheet_service.parse_workdays(params.workdays)
+    )
+    name = f"timesheet-{params.year}-{params.month:02d}"
+    if params.format == "csv":
+        return timesheet_service.timesheet_csv(sheet).encode("utf-8"), "text/csv", f"{name}.csv"
+    return await asyncio.to_thread(_json_bytes, sheet), "application/json", f"{name}.json"
+
+
+# kind -> (parametrlar modeli, hisoblovchi)
+JOB_KINDS: Dict[str, Tuple[type, Callable[[BaseModel], Awaitable[JobResult]]]] = {
+    "range": (RangeJobParams, run_range),
+    "timesheet": (TimesheetJobParams, run_timesheet),
+}
+
+
+def normalize_params(kind: str, params: dict) -> dict:
+    """Parametrlarni tekshirish va standart ko'rinishga keltirish (ValueError)"""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Noma'lum hisobot turi: {kind}")
+    model, _ = JOB_KINDS[kind]
+    try:
+        normalized = model(**params)
+    except ValidationError as e:
+        raise ValueError(f"Noto'g'ri parametrlar: {e.errors()[0]['loc'][0]}")
+    if kind == "timesheet":
+        try:
+            timesheet_service.parse_workdays(normalized.workdays)
+        except ValueError:
+            raise ValueError("Ish kunlari 0-6 oralig'ida, vergul bilan kiritilishi kerak")
+    return normalized.model_dump()
+
+
+def params_hash(kind: str, params: dict) -> str:
+    raw = json.dumps({"kind": kind, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+# ============ GridFS ============
+
+def _bucket():
+    from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+    return AsyncIOMotorGridFSBucket(ReportJob.get_motor_collection().database, bucket_name=BUCKET_NAME)
+
+
+async def store_result(job_id: str, content: bytes, content_type: str) -> str:
+    file_id = await _bucket().upload_from_stream(
+        job_id, content, metadata={"job_id": job_id, "content_type": content_type}
+    )
+    return str(file_id)
+
+
+async def open_result(file_id: str):
+    """GridFS oqimi (`readchunk()` bilan bo'laklab o'qiladi)"""
+    return await _bucket().open_download_stream(ObjectId(file_id))
+
+
+async def delete_result(file_id: str) -> None:
+    from gridfs.errors import NoFile
+    try:
+        await _bucket().delete(ObjectId(file_id))
+    except NoFile:
+        pass
+
+
+# ============ Navbat ============
+
+async def submit(kind: str, params: dict, created_by: int) -> ReportJob:
+    """Vazifa yaratish; xuddi shunday vazifa navbatda/bajarilayotgan bo'lsa - o'sha qaytadi"""
+    params = normalize_params(kind, params)
+    key = params_hash(kind, params)
+
+    existing = await ReportJob.find_one(ReportJob.active_key == key)
+    if existing is not None:
+        return existing
+
+    job = ReportJob(
+        kind=kind,
+        params=params,
+        params_hash=key,
+        active_key=key,
+        created_by=created_by,
+        expires_at=datetime.utcnow() + timedelta(hours=settings.REPORT_JOB_TTL_HOURS),
+    )
+    try:
+        await job.insert()
+    except DuplicateKeyError:
+        # Parallel so'rov bizdan oldin yaratdi
+        existing = await ReportJob.find_one(ReportJob.active_key == key)
+        if existing is not None:
+            return existing
+        raise
+    job_runner.notify()
+    return job
+
+
+async def claim() -> Optional[ReportJob]:
+    """Navbatdagi eng eski vazifani atomar olish"""
+    doc = await ReportJob.get_motor_collection().find_one_and_update(
+        {"status": "queued"},
+        {"$set": {"status": "running", "worker_id": WORKER_ID, "started_at": datetime.utcnow()}},
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+    return await ReportJob.get(doc["_id"]) if doc else None
+
+
+async def _finish(job: ReportJob, fields: dict) -> None:
+    await ReportJob.get_motor_collection().update_one(
+        {"_id": job.id},
+        {"$set": {
+            **fields,
+            "finished_at": datetime.utcnow(),
+            "expires_at": datetime.utcnow() + timedelta(hours=settings.REPORT_JOB_TTL_HOURS),
+        }, "$unset": {"active_key": ""}},
+    )
+
+
+async def execute(job: ReportJob) -> None:
+    model, run = JOB_KINDS[job.kind]
+    try:
+        content, content_type, filename = await asyncio.wait_for(
+            run(model(**job.params)), timeout=settings.REPORT_JOB_TIMEOUT
+        )
+        file_id = await store_result(str(job.id), content, content_type)
+    except asyncio.CancelledError:
+        # Worker to'xtatilmoqda - vazifa boshqa worker uchun navbatga qaytadi
+        await ReportJob.get_motor_collection().update_one(
+            {"_id": job.id, "status": "running"},
+            {"$set": {"status": "queued", "worker_id": None, "started_at": None}},
+        )
+        raise
+    except asyncio.TimeoutError:
+        await _finish(job, {"status": "failed", "error": f"Vaqt tugadi ({settings.REPORT_JOB_TIMEOUT}s)"})
+        return
+    except Exception as e:
+        logger.exception("Report job %s failed", job.id)
+        await _finish(job, {"status": "failed", "error": str(e) or type(e).__name__})
+        return
+    await _finish(job, {
+        "status": "done",
+        "result_file_id": file_id,
+        "result_size": len(content),
+        "content_type": content_type,
+        "filename": filename,
+    })
+
+
+async def cleanup() -> int:
+    """Muddati o'tgan natijalarni o'chirish va osilib qolgan vazifalarni navbatga qaytarish"""
+    now = datetime.utcnow()
+    collection = ReportJob.get_motor_collection()
+    removed = 0
+    async for doc in collection.find({"expires_at": {"$lt": now}, "status": {"$in": ["done", "failed"]}},
+                                     {"result_file_id": 1}):
+        if doc.get("result_file_id"):
+            await delete_result(doc["result_file_id"])
+        await collection.delete_one({"_id": doc["_id"]})
+        removed += 1
+
+    # Worker jarayoni o'lgan bo'lsa (deploy, OOM) vazifa "running" holatida qoladi
+    stale_before = now - timedelta(seconds=2 * settings.REPORT_JOB_TIMEOUT)
+    await collection.update_many(
+        {"status": "running", "started_at": {"$lt": stale_before}},
+        {"$set": {"status": "queued", "worker_id": None, "started_at": None}},
+    )
+    return removed
+
+
+class ReportJobRunner:
+    def __init__(self):
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.running_jobs = 0
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job = await claim()
+            except Exception:
+                logger.exception("Report job claim failed")
+                job = None
+            if job is not None:
+                self.running_jobs += 1
+                try:
+                    await execute(job)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    # Holatni yozib bo'lmadi - cleanup() vazifani keyinroq navbatga qaytaradi
+                    logger.exception("Report job %s could not be finalized", job.id)
+                finally:
+                    self.running_jobs -= 1
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(settings.REPORT_JOB_WORKERS)]
+        print(f"📑 Hisobot vazifalari: {settings.REPORT_JOB_WORKERS} ta worker")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+job_runner = ReportJobRunner()
@@ -0,0 +1,110 @@
+"""
+Bugungi pinglar uchun delta va long-poll.
+
+Mijoz oxirgi ko'rgan pingning ID sini (`cursor`) yuboradi va undan keyingi
+pinglarni hamda yangilangan hisoblagichlarni oladi. Kursor `_id` bo'yicha:
+partiya va live location pinglari mijoz vaqti bilan (bir soatgacha orqada)
+yoziladi - `timestamp` bo'yicha kursor ularni o'tkazib yuborardi. ObjectId
+esa ingest_pings da yozilishdan oldin (bir necha await oldin, boshqa
+workerda boshqa soat bilan) yaratiladi, ya'ni kichikroq ID keyinroq yozilishi
+mumkin - shuning uchun kursordan CURSOR_OVERLAP oldingi pinglar ham qayta
+yuboriladi va mijoz ularni ID bo'yicha tashlab yuboradi. Long-poll
+so'rovi yangi ping kelguncha (yoki timeout) kutadi: log_location
+`ping` hodisasini cache shinasi orqali barcha workerlarga tarqatadi (uni
+leader'dagi ping_monitor ham tinglaydi).
+"""
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+
+from app import cache
+from app.models import DailyWorkRecord, LocationLog
+
+TOPIC = "pings"
+# ObjectId yaratilishi va yozilishi orasidagi eng uzoq vaqt (va workerlar soatlari farqi)
+CURSOR_OVERLAP = timedelta(seconds=60)
+
+
+class PingNotifier:
+    """user_id -> shu hodimning yangi pingini kutayotgan so'rovlar"""
+
+    def __init__(self):
+        self._waiters: Dict[str, Set[asyncio.Event]] = defaultdict(set)
+
+    @contextmanager
+    def listen(self, user_id: str):
+        event = asyncio.Event()
+        self._waiters[user_id].add(event)
+        try:
+            yield event
+        finally:
+            waiters = self._waiters.get(user_id)
+            if waiters is not None:
+                waiters.discard(event)
+                if not waiters:
+                    del self._waiters[user_id]
+
+    def notify(self, user_id: str) -> None:
+        for event in self._waiters.get(user_id, ()):
+            event.set()
+
+    def __len__(self) -> int:
+        return sum(len(w) for w in self._waiters.values())
+
+
+ping_notifier = PingNotifier()
+
+
+def _notify_pings(data: dict) -> None:
+    for ping in data.get("pings", ()):
+        ping_notifier.notify(ping["user_id"])
+
+
+cache.subscribe(TOPIC, _notify_pings)
+
+
+async def publish_pings(last_pings: Dict[Tuple[str, int], datetime]) -> None:
+    """
+    Partiyadagi pinglar - bitta hodisa. (user_id, telegram_id) -> hodimning
+    oxirgi pingi (naive UTC), hodisada epoch sekund.
+    """
+    if not last_pings:
+        return
+    await cache.publish_event(TOPIC, {"pings": [
+        {"user_id": user_id, "telegram_id": telegram_id, "timestamp": ts.replace(tzinfo=timezone.utc).timestamp()}
+        for (user_id, telegram_id), ts in last_pings.items()
+    ]})
+
+
+def parse_cursor(since: str) -> ObjectId:
+    """`since` - oxirgi ko'rilgan ping ID si"""
+    if not ObjectId.is_valid(since):
+        raise ValueError(since)
+    return ObjectId(since)
+
+
+async def locations_since(user_id: str, day: str, since: Optional[ObjectId]) -> List[LocationLog]:
+    """Kunning `since` (CURSOR_OVERLAP bilan) dan keyingi pinglari, `_id` tartibida"""
+    query = [LocationLog.user_id == user_id, LocationLog.day == day]
+    if since is not None:
+        query.append(LocationLog.id >= ObjectId.from_datetime(since.generation_time - CURSOR_OVERLAP))
+    return await LocationLog.find(*query).sort(LocationLog.id).to_list()
+
+
+async def last_location(user_id: str, day: str) -> Optional[LocationLog]:
+    found = await LocationLog.find(
+        LocationLog.user_id == user_id,
+        LocationLog.day == day
+    ).sort(-LocationLog.timestamp).limit(1).to_list()
+    return found[0] if found else None
+
+
+async def day_record(user_id: str, day: str) -> Optional[DailyWorkRecord]:
+    return await DailyWorkRecord.find_one(
+        DailyWorkRecord.user_id == user_id,
+        DailyWorkRecord.date == day
+    )
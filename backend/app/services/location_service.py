@@ -1,189 +1,601 @@
-from geopy.distance import geodesic
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from datetime import datetime, date
-from typing import Tuple, List, Optional
+from beanie.operators import Set
+from bson import ObjectId
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Optional, Tuple, List, Sequence
+import math
 
-from app.models import LocationLog, User, DailyWorkRecord
-from app.services import settings_service
+from app import ndjson
+from app.auth import get_user_by_telegram_id
+from app.config import settings
+from app.models import LocationLog, User, DailyWorkRecord, FlaggedLocation
+from app.schemas import (
+    BotPing, BotPingBatchResult, BotPingResult, LocationBatchItem, LocationBatchResult, TimelineResponse
+)
+from app.timezone import day_bounds_utc, local_day, local_to_utc, local_today, to_local
+from app.wire import WirePing
+from app.services import archive_service, live_service, office_service, plausibility_service, settings_service
+from app.services.report_service import invalidate_reports
 
 
+# Bot (live location) pinglari
+LIVE_THROTTLE_SLACK_SECONDS = 30
+# Kechikib yuborilgan (bot, klient navbati) pinglar shundan eski bo'lmasin
+MAX_PING_AGE = timedelta(hours=1)
+
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Ikki nuqta orasidagi masofani metrda hisoblash"""
+    from geopy.distance import geodesic  # lazy: cold start'da import qilinmaydi
     return geodesic((lat1, lon1), (lat2, lon2)).meters
 
 
-async def validate_location(db: AsyncSession, lat: float, lon: float) -> Tuple[bool, float]:
-    """Lokatsiya ofis hududida ekanligini tekshirish"""
-    use_area = await settings_service.is_area_mode(db)
-    
-    if use_area:
-        return await validate_location_area(db, lat, lon)
-    else:
-        return await validate_location_circle(db, lat, lon)
+def geo_point(lat: float, lon: float) -> dict:
+    """GeoJSON nuqta (MongoDB 2dsphere uchun [lon, lat] tartibida)"""
+    return {"type": "Point", "coordinates": [lon, lat]}
 
 
-async def validate_location_circle(db: AsyncSession, lat: float, lon: float) -> Tuple[bool, float]:
-    """Doira rejimida tekshirish"""
-    office = await settings_service.get_office_location(db)
+def check_circle(lat: float, lon: float, office: dict) -> Tuple[bool, float]:
+    """Nuqta ofis doirasi ichida ekanligini tekshirish"""
     distance = calculate_distance(lat, lon, office["latitude"], office["longitude"])
-    is_valid = distance <= office["radius"]
-    return is_valid, distance
+    return distance <= office["radius"], distance
 
 
-async def validate_location_area(db: AsyncSession, lat: float, lon: float) -> Tuple[bool, float]:
-    """To'rtburchak hudud rejimida tekshirish"""
-    area = await settings_service.get_office_area(db)
+def check_area(lat: float, lon: float, area: dict) -> Tuple[bool, float]:
+    """Nuqta to'rtburchak hudud ichida ekanligini tekshirish"""
     point1 = area["point1"]
     point2 = area["point2"]
-    
+
     min_lat = min(point1["lat"], point2["lat"])
     max_lat = max(point1["lat"], point2["lat"])
     min_lng = min(point1["lng"], point2["lng"])
     max_lng = max(point1["lng"], point2["lng"])
-    
+
     is_valid = (min_lat <= lat <= max_lat) and (min_lng <= lon <= max_lng)
-    
+
     # Markazgacha masofa
     center_lat = (min_lat + max_lat) / 2
     center_lng = (min_lng + max_lng) / 2
     distance = calculate_distance(lat, lon, center_lat, center_lng)
-    
+
     return is_valid, distance
 
 
-async def log_location(
-    db: AsyncSession, 
-    user_id: int, 
-    lat: float, 
-    lon: float
-) -> LocationLog:
-    """Lokatsiyani bazaga yozish"""
-    is_valid, distance = await validate_location(db, lat, lon)
-    
-    location = LocationLog(
-        user_id=user_id,
-        latitude=lat,
-        longitude=lon,
-        distance=distance,
-        is_valid=is_valid
+async def validate_location(lat: float, lon: float) -> Tuple[bool, float]:
+    """Lokatsiya ofis hududida ekanligini tekshirish"""
+    use_area = await settings_service.is_area_mode()
+
+    if use_area:
+        return await validate_location_area(lat, lon)
+    else:
+        return await validate_location_circle(lat, lon)
+
+
+async def validate_location_circle(lat: float, lon: float) -> Tuple[bool, float]:
+    """Doira rejimida tekshirish"""
+    office = await settings_service.get_office_location()
+    return check_circle(lat, lon, office)
+
+
+async def validate_location_area(lat: float, lon: float) -> Tuple[bool, float]:
+    """To'rtburchak hudud rejimida tekshirish"""
+    area = await settings_service.get_office_area()
+    return check_area(lat, lon, area)
+
+
+async def resolve_location(user: User, lat: float, lon: float) -> Tuple[bool, Optional[float], Optional[str]]:
+    """
+    (is_valid, distance, office_id). Ofislar registri bo'sh bo'lsa - eski
+    bitta ofis sozlamasi (doira/to'rtburchak) ishlatiladi.
+    """
+    grid = await office_service.get_office_grid()
+    if not len(grid):
+        is_valid, distance = await validate_location(lat, lon)
+        return is_valid, distance, None
+
+    office, distance = grid.locate(lat, lon, user.office_ids)
+    return office is not None, distance if math.isfinite(distance) else None, office["id"] if office else None
+
+
+SEGMENT_OFFICE = "office"
+SEGMENT_OUTSIDE = "outside"
+SEGMENT_GAP = "gap"
+
+
+def extend_segments(
+    segments: List[dict],
+    timestamps: Sequence[datetime],
+    valid_flags: Sequence[bool],
+    max_gap_minutes: float
+) -> List[dict]:
+    """
+    Vaqt tartibidagi pinglarni segmentlar oxiriga qo'shish (`segments` joyida o'zgaradi).
+    Holat keyingi pinggacha davom etadi; pinglar orasi `max_gap_minutes` dan uzun
+    bo'lsa, oxirgi pingdan max_gap o'tgach `gap` boshlanadi - gap'lar yig'indisi
+    aynan absent_hours.
+    """
+    max_gap = timedelta(minutes=max_gap_minutes)
+    for ts, valid in zip(timestamps, valid_flags):
+        kind = SEGMENT_OFFICE if valid else SEGMENT_OUTSIDE
+        if segments:
+            last = segments[-1]
+            if ts - last["end"] > max_gap:
+                gap_start = last["end"] + max_gap
+                last["end"] = gap_start
+                segments.append({"kind": SEGMENT_GAP, "start": gap_start, "end": ts, "pings": 0})
+            elif kind == last["kind"]:
+                last["end"] = ts
+                last["pings"] += 1
+                continue
+            else:
+                last["end"] = ts
+        segments.append({"kind": kind, "start": ts, "end": ts, "pings": 1})
+    return segments
+
+
+def segment_totals(segments: Sequence[dict]) -> dict:
+    """total/present/absent soatlar (birinchi pingdan oxirgisigacha)"""
+    total_seconds = (segments[-1]["end"] - segments[0]["start"]).total_seconds()
+    absent_seconds = sum(
+        (seg["end"] - seg["start"]).total_seconds() for seg in segments if seg["kind"] == SEGMENT_GAP
     )
-    db.add(location)
-    await db.commit()
-    await db.refresh(location)
-    
-    # Update daily record
-    await update_daily_record(db, user_id)
-    
-    return location
-
-
-async def get_today_locations(db: AsyncSession, user_id: int) -> List[LocationLog]:
-    """Bugungi lokatsiyalarni olish"""
-    today = date.today().isoformat()
-    result = await db.execute(
-        select(LocationLog)
-        .where(
-            and_(
-                LocationLog.user_id == user_id,
-                LocationLog.timestamp >= f"{today} 00:00:00"
+    return {
+        "total_work_hours": round(total_seconds / 3600, 2),
+        "present_hours": round((total_seconds - absent_seconds) / 3600, 2),
+        "absent_hours": round(absent_seconds / 3600, 2),
+    }
+
+
+def compute_day_stats(
+    timestamps: Sequence[datetime],
+    valid_flags: Sequence[bool],
+    work_start_hour: int,
+    max_gap_minutes: float,
+    work_start: Optional[datetime] = None
+) -> dict:
+    """
+    Kunlik ko'rsatkichlarni hisoblash (timestamps o'sish tartibida).
+    `work_start` - smena boshlanishi (naive UTC); berilmasa birinchi ping kunidagi `work_start_hour`.
+    """
+    first_ts = timestamps[0]
+    last_ts = timestamps[-1]
+
+    # Absent time = gaps > interval + grace (segmentlardan)
+    segments = extend_segments([], timestamps, valid_flags, max_gap_minutes)
+
+    # Calculate late minutes
+    if work_start is None:
+        work_start = first_ts.replace(hour=work_start_hour, minute=0, second=0, microsecond=0)
+    late_minutes = 0
+    if first_ts > work_start:
+        late_minutes = int((first_ts - work_start).total_seconds() / 60)
+
+    return {
+        "work_start_time": first_ts,
+        "work_end_time": last_ts,
+        **segment_totals(segments),
+        "total_locations": len(timestamps),
+        "valid_locations": sum(1 for v in valid_flags if v),
+        "late_minutes": late_minutes,
+        "segments": segments
+    }
+
+
+def is_work_time(user: User, utc_dt: datetime) -> bool:
+    """
+    Ping qabul qilinadimi (tashkilot zonasi bo'yicha): ish soatlari va undan
+    keyingi OVERTIME_MAX_HOURS - smenadan keyingi pinglar tabelda qo'shimcha ish.
+    """
+    return user.work_start_hour <= to_local(utc_dt).hour < user.work_end_hour + settings.OVERTIME_MAX_HOURS
+
+
+# (user, latitude, longitude, timestamp, accuracy)
+Ping = Tuple[User, float, float, datetime, Optional[float]]
+
+
+async def ingest_pings(pings: Sequence[Ping]) -> List[Optional[LocationLog]]:
+    """
+    Pinglarni yozish (web, bot, live location - hammasi shu yo'ldan).
+    Har bir ping ishonchlilikka tekshiriladi (vaqt tartibida); rad etilganlari
+    o'rniga None qaytadi. Bitta insert_many; kunlik yozuvlar bitta o'qish va
+    bitta bulk_write bilan yangilanadi (apply_day_pings), hisobot keshi va ping
+    hodisasi - butun partiya uchun bitta chaqiruv.
+    """
+    results: List[Optional[LocationLog]] = [None] * len(pings)
+    locations = []
+    flagged = []
+    users = {}
+    days = set()
+    for i in sorted(range(len(pings)), key=lambda i: pings[i][3]):
+        user, lat, lon, timestamp, accuracy = pings[i]
+        day = local_day(timestamp)
+        users[user.telegram_id] = user
+        days.add((user.telegram_id, day))
+
+        verdict = plausibility_service.check(str(user.id), lat, lon, timestamp, accuracy)
+        location = None
+        if verdict is None or not verdict["rejected"]:
+            is_valid, distance, office_id = await resolve_location(user, lat, lon)
+            location = LocationLog(
+                id=ObjectId(),
+                user_id=str(user.id),
+                telegram_id=user.telegram_id,
+                latitude=lat,
+                longitude=lon,
+                location=geo_point(lat, lon),
+                distance=round(distance, 2) if distance is not None else None,
+                is_valid=is_valid,
+                office_id=office_id,
+                timestamp=timestamp,
+                day=day,
+                flags=verdict["reasons"] if verdict else None
             )
+            locations.append(location)
+            results[i] = location
+        if verdict is not None:
+            flagged.append(FlaggedLocation(
+                user_id=str(user.id),
+                telegram_id=user.telegram_id,
+                latitude=lat,
+                longitude=lon,
+                accuracy=accuracy,
+                timestamp=timestamp,
+                day=day,
+                location_id=str(location.id) if location else None,
+                **verdict
+            ))
+
+    if flagged:
+        await FlaggedLocation.insert_many(flagged)
+    if locations:
+        await LocationLog.insert_many(locations)
+
+    # Update daily records (rad etilgan pinglar ham flagged_locations ga kiradi)
+    day_locations = {key: [] for key in days}
+    for location in locations:
+        day_locations[(location.telegram_id, location.day)].append(location)
+    day_flagged = {key: 0 for key in days}
+    for flag in flagged:
+        day_flagged[(flag.telegram_id, flag.day)] += 1
+    await apply_day_pings([
+        (users[telegram_id], day, day_locations[(telegram_id, day)], day_flagged[(telegram_id, day)])
+        for telegram_id, day in sorted(days)
+    ])
+    await invalidate_reports(*(str(user.id) for user in users.values()))
+    last_pings = {}
+    for location in locations:
+        key = (location.user_id, location.telegram_id)
+        last_pings[key] = max(location.timestamp, last_pings.get(key, location.timestamp))
+    await live_service.publish_pings(last_pings)
+
+    return results
+
+
+def ping_time(timestamp: Optional[datetime], now: datetime) -> datetime:
+    """Klient aytgan vaqt -> naive UTC (berilmasa yoki kelajakda bo'lsa - hozir)"""
+    if timestamp is None:
+        return now
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(timestamp, now)
+
+
+async def ingest_user_pings(user: User, pings: Sequence[WirePing]) -> LocationBatchResult:
+    """Hodimning o'zi yuborgan pinglar partiyasi (tarmoq yo'qligida klientda yig'ilganlar)"""
+    now = datetime.utcnow()
+    results: List[Optional[LocationBatchItem]] = [None] * len(pings)
+    accepted = []
+    for i, (lat, lon, timestamp, accuracy) in enumerate(pings):
+        timestamp = ping_time(timestamp, now)
+        if now - timestamp > MAX_PING_AGE:
+            results[i] = LocationBatchItem(status="stale")
+        elif not is_work_time(user, timestamp):
+            results[i] = LocationBatchItem(status="outside_hours")
+        else:
+            accepted.append((i, (user, lat, lon, timestamp, accuracy)))
+
+    locations = await ingest_pings([item for _, item in accepted])
+    for (i, _), location in zip(accepted, locations):
+        if location is None:
+            results[i] = LocationBatchItem(status="rejected")
+            continue
+        results[i] = LocationBatchItem(
+            status="ok", id=str(location.id), is_valid=location.is_valid,
+            distance=location.distance, flags=location.flags
         )
-        .order_by(LocationLog.timestamp)
+    return LocationBatchResult(accepted=sum(1 for loc in locations if loc is not None), results=results)
+
+
+async def live_min_gap_seconds() -> int:
+    """Live location uchun: sozlangan interval (bot va server soatlari farqi uchun biroz kam)"""
+    interval = await settings_service.get_location_interval()
+    return max(interval["minutes"] * 60 - LIVE_THROTTLE_SLACK_SECONDS, LIVE_THROTTLE_SLACK_SECONDS)
+
+
+async def ingest_bot_pings(pings: Sequence[BotPing]) -> BotPingBatchResult:
+    """
+    Botdan kelgan pinglar partiyasi: hodim va ish vaqti tekshiriladi, live
+    pinglar interval bo'yicha siyraklashtiriladi (oxirgi pinglar bitta
+    aggregation bilan olinadi), qolganlari ingest_pings orqali yoziladi.
+    """
+    now = datetime.utcnow()
+    min_gap = timedelta(seconds=await live_min_gap_seconds())
+    results: List[Optional[BotPingResult]] = [None] * len(pings)
+    candidates = []
+    for i, ping in enumerate(pings):
+        timestamp = ping_time(ping.timestamp, now)
+        if now - timestamp > MAX_PING_AGE:
+            results[i] = BotPingResult(telegram_id=ping.telegram_id, status="stale")
+            continue
+        
+        user = await get_user_by_telegram_id(ping.telegram_id)
+        if user is None:
+            status = "unknown_user"
+        elif not user.is_approved or not user.is_active or user.is_admin:
+            status = "not_approved"
+        elif not is_work_time(user, timestamp):
+            status = "outside_hours"
+        else:
+            candidates.append((i, user, ping, timestamp))
+            continue
+        results[i] = BotPingResult(telegram_id=ping.telegram_id, status=status)
+    
+    last_times = await last_ping_times(
+        {user.telegram_id for _, user, ping, _ in candidates if ping.live}, now - min_gap - MAX_PING_AGE
     )
-    return result.scalars().all()
-
-
-async def get_date_locations(db: AsyncSession, user_id: int, date_str: str) -> List[LocationLog]:
-    """Berilgan sanadagi lokatsiyalarni olish"""
-    result = await db.execute(
-        select(LocationLog)
-        .where(
-            and_(
-                LocationLog.user_id == user_id,
-                LocationLog.timestamp >= f"{date_str} 00:00:00",
-                LocationLog.timestamp < f"{date_str} 23:59:59"
-            )
+    accepted = []
+    for i, user, ping, timestamp in sorted(candidates, key=lambda c: c[3]):
+        last = last_times.get(user.telegram_id)
+        if ping.live and last is not None and timestamp - last < min_gap:
+            results[i] = BotPingResult(telegram_id=ping.telegram_id, status="throttled")
+            continue
+        last_times[user.telegram_id] = max(timestamp, last) if last else timestamp
+        accepted.append((i, (user, ping.latitude, ping.longitude, timestamp, ping.accuracy)))
+    
+    locations = await ingest_pings([item for _, item in accepted])
+    for (i, _), location in zip(accepted, locations):
+        if location is None:
+            results[i] = BotPingResult(telegram_id=pings[i].telegram_id, status="rejected")
+            continue
+        results[i] = BotPingResult(
+            telegram_id=location.telegram_id, status="ok", is_valid=location.is_valid,
+            distance=location.distance, flags=location.flags
         )
-        .order_by(LocationLog.timestamp)
-    )
-    return result.scalars().all()
+    return BotPingBatchResult(accepted=sum(1 for loc in locations if loc is not None), results=results)
+
+
+async def log_location(user: User, lat: float, lon: float, accuracy: Optional[float] = None) -> Optional[LocationLog]:
+    """Lokatsiyani bazaga yozish (ishonchlilik tekshiruvidan o'tmasa va rad etilsa - None)"""
+    return (await ingest_pings([(user, lat, lon, datetime.utcnow(), accuracy)]))[0]
+
+
+async def last_ping_times(telegram_ids: Sequence[int], since: datetime) -> dict:
+    """telegram_id -> `since` dan keyingi oxirgi ping vaqti (bitta aggregation)"""
+    pipeline = [
+        {"$match": {"telegram_id": {"$in": list(telegram_ids)}, "timestamp": {"$gte": since}}},
+        {"$group": {"_id": "$telegram_id", "last": {"$max": "$timestamp"}}},
+    ]
+    return {
+        row["_id"]: row["last"]
+        async for row in LocationLog.get_motor_collection().aggregate(pipeline)
+    }
+
+
+async def get_date_locations(user_id: str, date_str: str) -> List[LocationLog]:
+    """Berilgan (mahalliy) sanadagi lokatsiyalarni olish"""
+    locations = await LocationLog.find(
+        LocationLog.user_id == user_id,
+        LocationLog.day == date_str
+    ).sort(LocationLog.timestamp).to_list()
+
+    # Arxivlangan oy bo'lsa - fayldan o'qiladi (hot kolleksiyada qolganlari bilan birga)
+    day_start, day_end = day_bounds_utc(datetime.strptime(date_str, "%Y-%m-%d").date())
+    if await archive_service.archive_signature(user_id, day_start, day_end) is not None:
+        locations = sorted(
+            await archive_service.read_archived(user_id, day_start, day_end) + locations,
+            key=lambda loc: loc.timestamp
+        )
+    return locations
+
+
+# NDJSON tarixi uchun o'qiladigan maydonlar (LocationResponse)
+LOCATION_ROW_FIELDS = ("latitude", "longitude", "distance", "is_valid", "timestamp", "flags")
 
 
-async def update_daily_record(db: AsyncSession, user_id: int, date_str: str = None):
-    """Kunlik ish soatlarini yangilash"""
+async def iter_date_locations(user_id: str, date_str: str, batch_size: int = ndjson.BATCH_SIZE) -> AsyncIterator[List[dict]]:
+    """
+    get_date_locations ning oqimli varianti: hujjatlar (dict, `_id` bilan)
+    timestamp bo'yicha partiyalab. Arxivlangan kun bo'lsa - fayl va hot
+    kolleksiyadagi qoldiqlar birlashtiriladi (ular kam).
+    """
+    cursor = LocationLog.get_motor_collection().find(
+        {"user_id": user_id, "day": date_str},
+        {field: 1 for field in LOCATION_ROW_FIELDS}
+    ).sort("timestamp", 1)
+
+    day_start, day_end = day_bounds_utc(datetime.strptime(date_str, "%Y-%m-%d").date())
+    if await archive_service.archive_signature(user_id, day_start, day_end) is None:
+        async for batch in ndjson.cursor_batches(cursor, batch_size):
+            yield batch
+        return
+
+    archived = [
+        {"_id": loc.id, **{field: getattr(loc, field, None) for field in LOCATION_ROW_FIELDS}}
+        for loc in await archive_service.read_archived(user_id, day_start, day_end)
+    ]
+    docs = sorted(archived + await cursor.to_list(length=None), key=lambda doc: doc["timestamp"])
+    for i in range(0, len(docs), batch_size):
+        yield docs[i:i + batch_size]
+
+
+# (hodim, kun, kunning yangi pinglari vaqt tartibida, rad etilgan pinglar soni)
+DayPings = Tuple[User, str, Sequence[LocationLog], int]
+
+DAY_RECORD_FIELDS = {
+    "user_id": 1, "date": 1, "work_end_time": 1, "total_locations": 1, "valid_locations": 1, "segments": 1
+}
+
+
+async def apply_day_pings(batch: Sequence[DayPings]) -> None:
+    """
+    Yangi pinglarni kunlik yozuvlarga qo'shish: partiyadagi barcha (hodim, kun)
+    yozuvlari bitta `$in` so'rov bilan o'qiladi, o'zgarishlar bitta bulk_write
+    bilan yoziladi. Odatdagi holatda (pinglar yozuvdagi oxirgi pingdan keyin)
+    faqat oxirgi segment kengaytiriladi, kunning birinchi pinglaridan esa yozuv
+    yaratiladi - kunning pinglari qayta o'qilmaydi. Kechikkan ping, segmentsiz
+    eski yozuv yoki parallel yangilanishda (shart mos kelmagan qatorlar) -
+    to'liq qayta hisoblash (update_daily_record). Hisobot keshini chaqiruvchi
+    (ingest_pings) eskirtiradi.
+    """
+    from pymongo import UpdateOne
+
+    if not batch:
+        return
+    collection = DailyWorkRecord.get_motor_collection()
+    records = {}
+    async for record in collection.find({
+        "user_id": {"$in": list({str(user.id) for user, *_ in batch})},
+        "date": {"$in": list({date_str for _, date_str, *_ in batch})},
+    }, DAY_RECORD_FIELDS):
+        records[(record["user_id"], record["date"])] = record
+
+    interval_config = await settings_service.get_location_interval()
+    max_gap_minutes = interval_config["minutes"] + interval_config["grace_period"]
+    # Shu partiya yozganini aniqlash uchun (Mongo millisekundgacha saqlaydi)
+    now = datetime.utcnow()
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    inserts, updates, recompute = [], [], []
+    for user, date_str, locations, flagged in batch:
+        record = records.get((str(user.id), date_str))
+        if record is None:
+            # Kunning birinchi pinglari: yozuv faqat yo'q bo'lsa yaratiladi ($setOnInsert)
+            stats = {"flagged_locations": flagged}
+            if locations:
+                stats.update(compute_day_stats(
+                    [loc.timestamp for loc in locations],
+                    [loc.is_valid for loc in locations],
+                    user.work_start_hour,
+                    max_gap_minutes,
+                    work_start=local_to_utc(datetime.strptime(date_str, "%Y-%m-%d").date(), user.work_start_hour)
+                ))
+            doc = DailyWorkRecord(user_id=str(user.id), telegram_id=user.telegram_id, date=date_str, **stats)
+            inserts.append((user, date_str, UpdateOne(
+                {"user_id": str(user.id), "date": date_str},
+                {"$setOnInsert": doc.model_dump(exclude={"id", "revision_id"})},
+                upsert=True
+            )))
+            continue
+        if locations and (not record.get("segments") or locations[0].timestamp < record["work_end_time"]):
+            recompute.append((user, date_str))
+            continue
+
+        # Faqat o'qilgan holat o'zgarmagan bo'lsa yoziladi (boshqa worker ulgurmagan)
+        unchanged = {"_id": record["_id"], "work_end_time": record["work_end_time"],
+                     "total_locations": record["total_locations"]}
+        update = {"$inc": {"flagged_locations": flagged}, "$set": {"updated_at": now}}
+        if locations:
+            segments = extend_segments(
+                record["segments"],
+                [loc.timestamp for loc in locations],
+                [loc.is_valid for loc in locations],
+                max_gap_minutes
+            )
+            update["$set"].update({
+                "work_end_time": locations[-1].timestamp,
+                **segment_totals(segments),
+                "total_locations": record["total_locations"] + len(locations),
+                "valid_locations": record["valid_locations"] + sum(1 for loc in locations if loc.is_valid),
+                "segments": segments,
+            })
+        # Faqat rad etilgan pinglar bo'lsa - faqat $inc
+        updates.append((user, date_str, record["_id"], UpdateOne(unchanged, update)))
+
+    ops = [op for *_, op in inserts] + [op for *_, op in updates]
+    if ops:
+        result = await collection.bulk_write(ops, ordered=False)
+        # Parallel yaratilgan yozuv - upsert mos kelgan, lekin yozmagan
+        recompute += [(user, date_str) for i, (user, date_str, _) in enumerate(inserts) if i not in result.upserted_ids]
+        updates_matched = result.matched_count - (len(inserts) - len(result.upserted_ids))
+        if updates_matched < len(updates):
+            # Qaysi shart mos kelmaganini bilish uchun - faqat shu (kam uchraydigan) holatda
+            written = {doc["_id"] async for doc in collection.find(
+                {"_id": {"$in": [record_id for _, _, record_id, _ in updates]}, "updated_at": now}, {"_id": 1}
+            )}
+            recompute += [(user, date_str) for user, date_str, record_id, _ in updates if record_id not in written]
+
+    for user, date_str in recompute:
+        await update_daily_record(user, date_str, invalidate=False)
+
+
+async def update_daily_record(user: User, date_str: str = None, invalidate: bool = True):
+    """Kunlik ish soatlarini yangilash (`invalidate=False` - hisobot keshini chaqiruvchi eskirtiradi)"""
     if date_str is None:
-        date_str = date.today().isoformat()
-    
-    locations = await get_date_locations(db, user_id, date_str)
-    
+        date_str = local_today().isoformat()
+
+    locations = await get_date_locations(str(user.id), date_str)
+    flagged = await FlaggedLocation.find(
+        FlaggedLocation.user_id == str(user.id),
+        FlaggedLocation.day == date_str
+    ).count()
+
     if not locations:
+        if flagged:
+            # Kunning barcha pinglari rad etilgan - soni baribir yozuvda ko'rinadi
+            await DailyWorkRecord.find_one(
+                DailyWorkRecord.user_id == str(user.id),
+                DailyWorkRecord.date == date_str
+            ).upsert(
+                Set({"flagged_locations": flagged, "updated_at": datetime.utcnow()}),
+                on_insert=DailyWorkRecord(
+                    user_id=str(user.id),
+                    telegram_id=user.telegram_id,
+                    date=date_str,
+                    flagged_locations=flagged
+                )
+            )
+            if invalidate:
+                await invalidate_reports(str(user.id))
         return
-    
-    # Get user for work hours
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
-    if not user:
-        return
-    
-    first_loc = locations[0]
-    last_loc = locations[-1]
-    
-    # Calculate total time
-    total_seconds = (last_loc.timestamp - first_loc.timestamp).total_seconds()
-    total_hours = total_seconds / 3600
-    
-    # Calculate absent time (gaps > interval + grace)
-    interval_config = await settings_service.get_location_interval(db)
+
+    interval_config = await settings_service.get_location_interval()
     max_gap_minutes = interval_config["minutes"] + interval_config["grace_period"]
-    
-    absent_hours = 0
-    for i in range(len(locations) - 1):
-        gap_seconds = (locations[i+1].timestamp - locations[i].timestamp).total_seconds()
-        gap_minutes = gap_seconds / 60
-        if gap_minutes > max_gap_minutes:
-            absent_hours += (gap_minutes - max_gap_minutes) / 60
-    
-    present_hours = total_hours - absent_hours
-    
-    # Calculate late minutes
-    work_start = first_loc.timestamp.replace(hour=user.work_start_hour, minute=0, second=0)
-    late_minutes = 0
-    if first_loc.timestamp > work_start:
-        late_minutes = int((first_loc.timestamp - work_start).total_seconds() / 60)
-    
-    valid_count = sum(1 for loc in locations if loc.is_valid)
-    
-    # Update or create record
-    result = await db.execute(
-        select(DailyWorkRecord).where(
-            and_(DailyWorkRecord.user_id == user_id, DailyWorkRecord.date == date_str)
-        )
+
+    stats = compute_day_stats(
+        [loc.timestamp for loc in locations],
+        [loc.is_valid for loc in locations],
+        user.work_start_hour,
+        max_gap_minutes,
+        work_start=local_to_utc(datetime.strptime(date_str, "%Y-%m-%d").date(), user.work_start_hour)
     )
-    record = result.scalar_one_or_none()
-    
-    if record:
-        record.work_start_time = first_loc.timestamp
-        record.work_end_time = last_loc.timestamp
-        record.total_work_hours = round(total_hours, 2)
-        record.present_hours = round(present_hours, 2)
-        record.absent_hours = round(absent_hours, 2)
-        record.total_locations = len(locations)
-        record.valid_locations = valid_count
-        record.late_minutes = late_minutes
-    else:
-        record = DailyWorkRecord(
-            user_id=user_id,
+    stats["flagged_locations"] = flagged
+
+    # Faqat hisoblangan maydonlar yangilanadi - boshqa maydonlar ustidan yozilmaydi
+    await DailyWorkRecord.find_one(
+        DailyWorkRecord.user_id == str(user.id),
+        DailyWorkRecord.date == date_str
+    ).upsert(
+        Set({**stats, "updated_at": datetime.utcnow()}),
+        on_insert=DailyWorkRecord(
+            user_id=str(user.id),
+            telegram_id=user.telegram_id,
             date=date_str,
-            work_start_time=first_loc.timestamp,
-            work_end_time=last_loc.timestamp,
-            total_work_hours=round(total_hours, 2),
-            present_hours=round(present_hours, 2),
-            absent_hours=round(absent_hours, 2),
-            total_locations=len(locations),
-            valid_locations=valid_count,
-            late_minutes=late_minutes
+            **stats
         )
-        db.add(record)
-    
-    await db.commit()
+    )
+    if invalidate:
+        await invalidate_reports(str(user.id))
+
+
+async def get_day_timeline(user_id: str, date_str: str) -> Optional[TimelineResponse]:
+    """Kun segmentlari - bitta kichik hujjat o'qiladi, pinglar emas"""
+    collection = DailyWorkRecord.get_motor_collection()
+    query = {"user_id": user_id, "date": date_str}
+    projection = {"_id": 0, **{field: 1 for field in TimelineResponse.model_fields}, "total_locations": 1}
+    doc = await collection.find_one(query, projection)
+    if doc is None:
+        return None
+    if not doc.get("segments") and doc.get("total_locations") and ObjectId.is_valid(user_id):
+        # Segmentlardan oldingi yozuv - bir marta pinglardan qayta quriladi
+        user = await User.get(ObjectId(user_id))
+        if user is not None:
+            await update_daily_record(user, date_str)
+            doc = await collection.find_one(query, projection)
+    return TimelineResponse(**{**doc, "segments": doc.get("segments") or []})
@@ -0,0 +1,178 @@
+"""
+Filiallar (Office) registri va ping uchun ofisni topish.
+
+Har bir ofisning bounding box'i grid kataklariga yoziladi (OfficeGrid).
+Ping kelganda faqat o'z katagidagi nomzodlar aniq tekshiriladi -
+barcha ofislar ketma-ket tekshirilmaydi. MAX_CELLS_PER_OFFICE dan ko'p katak
+egallaydigan ofis (masalan radius xatosi) gridga yozilmaydi - u har bir
+pingda alohida kichik ro'yxatdan tekshiriladi, grid hajmi esa cheklangan qoladi.
+"""
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.cache import Cache
+from app.config import settings
+from app.models import Office
+
+# ~1.1 km (kenglik bo'yicha); ofislar odatda bir necha katakni egallaydi
+GRID_CELL_DEG = 0.01
+METERS_PER_DEG_LAT = 111_320.0
+# 30x30 katak (~33 km); yangi ofislar bundan kattasini validate_office'da o'tkazmaydi
+MAX_CELLS_PER_OFFICE = 900
+MAX_OFFICE_SPAN_DEG = 0.25
+
+_cache = Cache("offices", ttl=settings.SETTINGS_CACHE_TTL)
+
+
+def point_in_polygon(lat: float, lon: float, polygon: Sequence[Sequence[float]]) -> bool:
+    """Ray casting ([[lat, lon], ...]; kichik hududlar uchun tekislik yaqinlashuvi yetarli)"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lon_i > lon) != (lon_j > lon):
+            cross_lat = lat_i + (lon - lon_i) * (lat_j - lat_i) / (lon_j - lon_i)
+            if lat < cross_lat:
+                inside = not inside
+        j = i
+    return inside
+
+
+def _orientation(a: Sequence[float], b: Sequence[float], c: Sequence[float]) -> float:
+    return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+
+def _segments_cross(p1, p2, q1, q2) -> bool:
+    d1, d2 = _orientation(q1, q2, p1), _orientation(q1, q2, p2)
+    d3, d4 = _orientation(p1, p2, q1), _orientation(p1, p2, q2)
+    return ((d1 > 0) != (d2 > 0)) and ((d3 > 0) != (d4 > 0)) and 0 not in (d1, d2, d3, d4)
+
+
+def polygon_self_intersects(polygon: Sequence[Sequence[float]]) -> bool:
+    """Qo'shni bo'lmagan qirralar kesishadimi ([[lat, lon], ...], yopilmagan halqa)"""
+    edges = [(polygon[i], polygon[(i + 1) % len(polygon)]) for i in range(len(polygon))]
+    for i in range(len(edges)):
+        for j in range(i + 2, len(edges)):
+            if i == 0 and j == len(edges) - 1:
+                continue  # birinchi va oxirgi qirra umumiy nuqtaga ega
+            if _segments_cross(*edges[i], *edges[j]):
+                return True
+    return False
+
+
+def office_center(office: dict) -> Tuple[float, float]:
+    if office["kind"] == "polygon":
+        points = office["polygon"]
+        return sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points)
+    return office["latitude"], office["longitude"]
+
+
+def office_bbox(office: dict) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon)"""
+    if office["kind"] == "polygon":
+        lats = [p[0] for p in office["polygon"]]
+        lons = [p[1] for p in office["polygon"]]
+        return min(lats), min(lons), max(lats), max(lons)
+
+    d_lat = office["radius"] / METERS_PER_DEG_LAT
+    d_lon = office["radius"] / (METERS_PER_DEG_LAT * max(math.cos(math.radians(office["latitude"])), 1e-6))
+    return office["latitude"] - d_lat, office["longitude"] - d_lon, office["latitude"] + d_lat, office["longitude"] + d_lon
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return math.floor(lat / GRID_CELL_DEG), math.floor(lon / GRID_CELL_DEG)
+
+
+class OfficeGrid:
+    """Ofislar bounding box'lari bo'yicha uniform grid indeks"""
+
+    def __init__(self, offices: List[dict]):
+        self.offices = offices
+        self.cells: Dict[Tuple[int, int], List[dict]] = defaultdict(list)
+        # Gridga sig'maydigan (juda katta) ofislar - har bir nuqta uchun tekshiriladi
+        self.oversized: List[dict] = []
+        for office in offices:
+            min_lat, min_lon, max_lat, max_lon = office_bbox(office)
+            (lat0, lon0), (lat1, lon1) = _cell(min_lat, min_lon), _cell(max_lat, max_lon)
+            if (lat1 - lat0 + 1) * (lon1 - lon0 + 1) > MAX_CELLS_PER_OFFICE:
+                self.oversized.append(office)
+                continue
+            for i in range(lat0, lat1 + 1):
+                for j in range(lon0, lon1 + 1):
+                    self.cells[(i, j)].append(office)
+
+    def __len__(self) -> int:
+        return len(self.offices)
+
+    def candidates(self, lat: float, lon: float) -> List[dict]:
+        found = self.cells.get(_cell(lat, lon), [])
+        return found + self.oversized if self.oversized else found
+
+    def locate(self, lat: float, lon: float, allowed: Optional[Sequence[str]] = None) -> Tuple[Optional[dict], float]:
+        """
+        Nuqta tushgan ofis va uning markazigacha masofa. Hech biriga tushmasa -
+        (None, eng yaqin ruxsat etilgan ofis markazigacha masofa).
+        """
+        from app.services.location_service import calculate_distance
+
+        allowed_set = set(allowed) if allowed else None
+        best, best_distance = None, math.inf
+        for office in self.candidates(lat, lon):
+            if allowed_set is not None and office["id"] not in allowed_set:
+                continue
+            c_lat, c_lon = office_center(office)
+            distance = calculate_distance(lat, lon, c_lat, c_lon)
+            if office["kind"] == "polygon":
+                inside = point_in_polygon(lat, lon, office["polygon"])
+            else:
+                inside = distance <= office["radius"]
+            if inside and distance < best_distance:
+                best, best_distance = office, distance
+        if best is not None:
+            return best, best_distance
+
+        # Ofisdan tashqarida - masofa faqat hisobot uchun, shuning uchun tez (ekvirektangular) baho
+        nearest = math.inf
+        for office in self.offices:
+            if allowed_set is not None and office["id"] not in allowed_set:
+                continue
+            c_lat, c_lon = office_center(office)
+            d_lat = (lat - c_lat) * METERS_PER_DEG_LAT
+            d_lon = (lon - c_lon) * METERS_PER_DEG_LAT * math.cos(math.radians((lat + c_lat) / 2))
+            nearest = min(nearest, math.hypot(d_lat, d_lon))
+        return None, nearest
+
+
+def office_to_dict(office: Office) -> dict:
+    return {
+        "id": str(office.id),
+        "name": office.name,
+        "kind": office.kind,
+        "latitude": office.latitude,
+        "longitude": office.longitude,
+        "radius": office.radius,
+        "polygon": office.polygon,
+    }
+
+
+_grid: Optional[OfficeGrid] = None
+_grid_source: Optional[list] = None
+
+
+async def get_office_grid() -> OfficeGrid:
+    """Faol ofislar indeksi (keshdan; ofis o'zgarganda barcha workerlarda yangilanadi)"""
+    global _grid, _grid_source
+    offices = await _cache.get("active")
+    if offices is None:
+        offices = [office_to_dict(o) for o in await Office.find(Office.is_active == True).to_list()]
+        await _cache.set("active", offices)
+    if offices is not _grid_source:
+        _grid = OfficeGrid(offices)
+        _grid_source = offices
+    return _grid
+
+
+async def invalidate_offices():
+    await _cache.delete("active")
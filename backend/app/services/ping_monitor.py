@@ -0,0 +1,316 @@
+"""
+Kutilgan ping muddatlarini kuzatuvchi: har bir smenadagi hodim uchun keyingi
+ping muddati (oxirgi ping + interval + grace_period) min-heap da saqlanadi.
+
+- Monitor faqat scheduler leader'ida ishlaydi; pinglar barcha workerlardan
+  live_service.TOPIC hodisasi (cache shinasi) orqali keladi - O(1): faqat
+  hodimning oxirgi ping vaqti yangilanadi.
+- Fon vazifasi eng yaqin muddatgacha uxlaydi, bazani so'rab turmaydi. Muddat
+  o'tganda oxirgi ping xotiradan tekshiriladi: yangi ping bo'lsa - muddat
+  surilib heap ga qaytadi (O(log n), har bir interval uchun bir marta).
+- Xotiradagi ping ham eskirgan bo'lsa, ogohlantirishdan oldin (user_id, day,
+  timestamp) indeksi bo'yicha bazadan tekshiriladi (shina xabari qayta
+  ulanishda yo'qolgan bo'lishi mumkin), so'ng bot orqali ogohlantirish. Bir
+  vaqtda o'tgan muddatlar parallel tekshiriladi.
+- Xabarlar navbatga qo'yiladi va alohida vazifa SEND_RATE_PER_SECOND tezlikda
+  yuboradi - smena boshida N ta kechikkan hodim monitor siklini ushlab
+  turmaydi; adminlarga har bir siklda bitta umumiy xabar.
+- Restart'dan keyin oxirgi pinglar bitta aggregation bilan tiklanadi.
+- Smena faqat MISSED_PING_WORKDAYS dagi va MISSED_PING_HOLIDAYS da
+  bo'lmagan kunlarda bor - dam olish kunlari eslatma yuborilmaydi.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Collection, Dict, Iterator, List, Optional, Set, Tuple
+
+from beanie.operators import In
+
+from app import cache, telegram
+from app.auth import get_user_by_telegram_id
+from app.config import settings
+from app.models import LocationLog, User
+from app.services import live_service, settings_service
+from app.timezone import org_tz
+
+logger = logging.getLogger(__name__)
+
+CHECK_CONCURRENCY = 20
+# Telegram: botdan umumiy ~30 xabar/s
+SEND_RATE_PER_SECOND = 25
+MESSAGE_LIMIT = 4000
+ALL_WEEKDAYS = frozenset(range(7))
+# Keyingi smena shuncha kun ichida qidiriladi (uzun bayramlar uchun ham yetarli)
+MAX_LOOKAHEAD_DAYS = 31
+
+
+def to_epoch(utc_dt: datetime) -> float:
+    """Bazadagi naive UTC vaqtni epoch sekundga"""
+    return utc_dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+def shift_bounds(day: datetime, work_start_hour: int, work_end_hour: int) -> Tuple[float, float]:
+    """Tashkilot zonasidagi `day` uchun smena boshlanishi va tugashi (epoch)"""
+    start = day.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(hours=work_start_hour)
+    end = day.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(hours=work_end_hour)
+    return start.timestamp(), end.timestamp()
+
+
+def local_day_of(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, org_tz()).date().isoformat()
+
+
+def chunk_lines(header: str, lines: List[str], limit: int = MESSAGE_LIMIT) -> Iterator[str]:
+    """Qatorlarni Telegram xabar uzunligi chegarasidan oshmaydigan xabarlarga bo'lish"""
+    text = header
+    for line in lines:
+        if len(text) + len(line) + 1 > limit and text != header:
+            yield text
+            text = header
+        text += "\n" + line
+    if text != header:
+        yield text
+
+
+def next_deadline(last_ping: Optional[float], now: float, max_gap_seconds: float,
+                  work_start_hour: int, work_end_hour: int,
+                  workdays: Collection[int] = ALL_WEEKDAYS, holidays: Collection[str] = ()) -> float:
+    """
+    Keyingi ping kutiladigan vaqt. Smenadan tashqarida bo'lsa - keyingi
+    ish kunidagi smena boshlanishi + max_gap (birinchi ping shu vaqtgacha
+    kelishi kerak). `workdays` - hafta kunlari (0 - dushanba), `holidays` -
+    "YYYY-MM-DD" sanalar.
+    """
+    today = datetime.fromtimestamp(now, org_tz())
+    for day_offset in range(MAX_LOOKAHEAD_DAYS):
+        day = today + timedelta(days=day_offset)
+        if day.weekday() not in workdays or day.date().isoformat() in holidays:
+            continue
+        start, end = shift_bounds(day, work_start_hour, work_end_hour)
+        if end <= start:
+            break
+        candidate = start + max_gap_seconds
+        if last_ping is not None and last_ping >= start:
+            candidate = last_ping + max_gap_seconds
+        if candidate <= end and (candidate > now or day_offset == 0):
+            return candidate
+    return float("inf")
+
+
+class PingDeadlineMonitor:
+    def __init__(self):
+        self._heap: List[Tuple[float, int, int]] = []  # (deadline, seq, telegram_id)
+        self._current: Dict[int, int] = {}  # telegram_id -> amaldagi seq
+        self._last_ping: Dict[int, float] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._outbox: asyncio.Queue = asyncio.Queue()  # (chat_id, text)
+        self._sending: Set[asyncio.Task] = set()
+        self._tracking: Dict[int, asyncio.Task] = {}  # hali kuzatilmayotgan hodimlar uchun _track
+        self.running = False
+        self.alerts_sent = 0
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def _schedule(self, telegram_id: int, deadline: float) -> None:
+        if deadline == float("inf"):
+            self._current.pop(telegram_id, None)
+            return
+        seq = next(self._seq)
+        self._current[telegram_id] = seq
+        earliest = self._heap[0][0] if self._heap else float("inf")
+        heapq.heappush(self._heap, (deadline, seq, telegram_id))
+        if deadline < earliest:
+            self._wakeup.set()
+        # Lazy o'chirilgan yozuvlar ko'payib ketsa heap qayta quriladi
+        if len(self._heap) > 2 * len(self._current) + 1024:
+            self._heap = [item for item in self._heap if self._current.get(item[2]) == item[1]]
+            heapq.heapify(self._heap)
+
+    def forget(self, telegram_id: int) -> None:
+        self._current.pop(telegram_id, None)
+        self._last_ping.pop(telegram_id, None)
+
+    def on_pings(self, data: dict) -> None:
+        """live_service.TOPIC hodisasi (istalgan workerdagi ping partiyasi, cache shinasi orqali)"""
+        if not self.running:
+            return
+        for ping in data.get("pings", ()):
+            self.on_ping(ping["telegram_id"], ping["timestamp"])
+
+    def on_ping(self, telegram_id: int, at: float) -> None:
+        self._last_ping[telegram_id] = max(at, self._last_ping.get(telegram_id, 0))
+        # Kuzatilayotgan hodim uchun heap ga tegilmaydi - muddat o'tganda xotiradagi ping bilan suriladi
+        if telegram_id not in self._current and telegram_id not in self._tracking:
+            # Masalan rebuild dan keyin tasdiqlangan hodim
+            task = asyncio.create_task(self._track(telegram_id))
+            self._tracking[telegram_id] = task
+            task.add_done_callback(lambda _: self._tracking.pop(telegram_id, None))
+
+    async def _track(self, telegram_id: int) -> None:
+        try:
+            user = await get_user_by_telegram_id(telegram_id)
+            if user is None or not user.is_active or not user.is_approved or user.is_admin:
+                return
+            max_gap = await self._max_gap_seconds()
+            self._schedule(telegram_id, self._deadline(user, self._last_ping.get(telegram_id), time.time(), max_gap))
+        except Exception:
+            logger.exception("Ping monitor failed to track %s", telegram_id)
+
+    @staticmethod
+    def _deadline(user: User, last_ping: Optional[float], now: float, max_gap: float) -> float:
+        return next_deadline(
+            last_ping, now, max_gap, user.work_start_hour, user.work_end_hour,
+            settings.missed_ping_workdays, frozenset(settings.missed_ping_holidays)
+        )
+
+    async def _max_gap_seconds(self) -> float:
+        interval = await settings_service.get_location_interval()
+        # 0 minutli interval ogohlantirishlar oqimiga aylanmasligi uchun
+        return max((interval["minutes"] + interval["grace_period"]) * 60, 60)
+
+    async def rebuild(self) -> int:
+        """Faol hodimlar va ularning oxirgi pinglaridan heap ni qayta qurish"""
+        users = await User.find(
+            User.is_active == True,
+            User.is_approved == True,
+            User.is_admin == False
+        ).to_list()
+        since = datetime.utcnow() - timedelta(days=1)
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": since}}},
+            {"$group": {"_id": "$telegram_id", "last": {"$max": "$timestamp"}}},
+        ]
+        last_pings = {
+            row["_id"]: to_epoch(row["last"])
+            async for row in LocationLog.get_motor_collection().aggregate(pipeline)
+        }
+
+        self._heap = []
+        self._current = {}
+        # Aggregation paytida shina orqali kelgan pinglar yo'qolmasin
+        for telegram_id, last in last_pings.items():
+            self._last_ping[telegram_id] = max(last, self._last_ping.get(telegram_id, 0))
+        now = time.time()
+        max_gap = await self._max_gap_seconds()
+        for user in users:
+            last = self._last_ping.get(user.telegram_id)
+            deadline = self._deadline(user, last, now, max_gap)
+            if deadline < now:
+                # Restart paytida o'tib ketgan muddatlar - hammaga birdaniga xabar yubormaslik
+                deadline = now + max_gap
+            self._schedule(user.telegram_id, deadline)
+        return len(self._current)
+
+    async def _fetch_last_ping(self, user: User, days: List[str]) -> Optional[float]:
+        """Muddat kuni (va bugun) ichidagi oxirgi ping - (user_id, day, timestamp) indeksi"""
+        last = await LocationLog.find(
+            LocationLog.user_id == str(user.id),
+            In(LocationLog.day, days)
+        ).sort(-LocationLog.timestamp).limit(1).to_list()
+        return to_epoch(last[0].timestamp) if last else None
+
+    async def _handle_due(self, telegram_id: int, deadline: float) -> Optional[str]:
+        """Ogohlantirish yuborilsa - adminlar xabari uchun qator"""
+        user = await get_user_by_telegram_id(telegram_id)
+        if user is None or not user.is_active or not user.is_approved or user.is_admin:
+            self.forget(telegram_id)
+            return None
+
+        max_gap = await self._max_gap_seconds()
+        now = time.time()
+        expected = self._deadline(user, self._last_ping.get(telegram_id), deadline - 1, max_gap)
+        if expected <= now:
+            # Smena kunining boshidan oldingi pinglar muddatga ta'sir qilmaydi
+            last = await self._fetch_last_ping(user, sorted({local_day_of(deadline - 1), local_day_of(now)}))
+            if last is not None:
+                self._last_ping[telegram_id] = max(last, self._last_ping.get(telegram_id, 0))
+            expected = self._deadline(user, self._last_ping.get(telegram_id), deadline - 1, max_gap)
+        if expected > now:
+            # Ping kelgan (shina orqali yoki bazada) yoki ish soatlari/interval o'zgargan
+            self._schedule(telegram_id, expected)
+            return None
+
+        line = self._alert(user, self._last_ping.get(telegram_id))
+        # Keyingi eslatma yana bir intervaldan keyin (smena tugasa - ertaga)
+        self._schedule(telegram_id, self._deadline(user, now, now, max_gap))
+        return line
+
+    def _alert(self, user: User, last_ping: Optional[float]) -> str:
+        if last_ping is None:
+            since = "bugun hali lokatsiya yuborilmagan"
+        else:
+            since = f"oxirgi lokatsiya: {datetime.fromtimestamp(last_ping, org_tz()).strftime('%H:%M')}"
+        self._outbox.put_nowait((
+            user.telegram_id,
+            f"📍 Lokatsiya yuborish vaqti o'tdi ({since}).\nIltimos, lokatsiyangizni yuboring."
+        ))
+        self.alerts_sent += 1
+        return f"{user.full_name or user.username or user.telegram_id} ({since})"
+
+    async def _process_due(self, due: List[Tuple[int, float]]) -> None:
+        semaphore = asyncio.Semaphore(CHECK_CONCURRENCY)
+
+        async def check(telegram_id: int, deadline: float) -> Optional[str]:
+            async with semaphore:
+                try:
+                    return await self._handle_due(telegram_id, deadline)
+                except Exception:
+                    logger.exception("Missed ping check failed for %s", telegram_id)
+                    return None
+
+        lines = [line for line in await asyncio.gather(*(check(t, d) for t, d in due)) if line]
+        if lines and settings.MISSED_PING_NOTIFY_ADMINS:
+            for text in chunk_lines(f"⚠️ Lokatsiya kelmadi ({len(lines)} hodim):", lines):
+                for admin_id in settings.admin_ids_list:
+                    self._outbox.put_nowait((admin_id, text))
+
+    async def _send_loop(self) -> None:
+        """Navbatdagi xabarlarni SEND_RATE_PER_SECOND tezlikda yuborish (javobni kutmasdan)"""
+        while True:
+            chat_id, text = await self._outbox.get()
+            task = asyncio.create_task(telegram.send_message(chat_id, text))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+            await asyncio.sleep(1 / SEND_RATE_PER_SECOND)
+
+    def _pop_due(self, now: float) -> List[Tuple[int, float]]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, seq, telegram_id = heapq.heappop(self._heap)
+            if self._current.get(telegram_id) != seq:
+                continue  # eskirgan yozuv
+            del self._current[telegram_id]
+            due.append((telegram_id, deadline))
+        return due
+
+    async def run(self) -> None:
+        self.running = True
+        sender = asyncio.create_task(self._send_loop())
+        try:
+            count = await self.rebuild()
+            print(f"⏰ Ping monitor: {count} hodim kuzatilmoqda")
+            while True:
+                due = self._pop_due(time.time())
+                if due:
+                    await self._process_due(due)
+
+                timeout = self._heap[0][0] - time.time() if self._heap else 3600
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(min(timeout, 3600), 0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.running = False
+            sender.cancel()
+            for task in list(self._tracking.values()):
+                task.cancel()
+
+
+ping_monitor = PingDeadlineMonitor()
+cache.subscribe(live_service.TOPIC, ping_monitor.on_pings)
@@ -0,0 +1,114 @@
+"""
+Pinglarning ishonchliligini tekshirish (GPS spoofing, "teleport" sakrashlar).
+
+Har bir hodimning oxirgi qabul qilingan nuqtasi xotirada saqlanadi (LRU,
+PLAUSIBILITY_CACHE_SIZE ta hodim) - yangi ping faqat shu nuqta bilan
+solishtiriladi, bazadan oldingi LocationLog o'qilmaydi.
+
+- invalid_coordinates: lat/lon chegaradan tashqari yoki (0, 0) - doim rad etiladi
+- low_accuracy: qurilma aytgan aniqlik PING_MAX_ACCURACY_METERS dan katta
+- impossible_speed: oldingi nuqtadan tezlik PING_MAX_SPEED_KMH dan katta
+  (ikkala nuqtaning aniqligi masofadan ayiriladi)
+
+Keshda nuqta bo'lmasa (restart, boshqa worker) ping solishtirilmaydi va
+keyingilari uchun asos bo'ladi. Eskiroq nuqta bilan solishtirish noto'g'ri
+signal bermaydi: haqiqiy yo'l A -> B -> C uchun |AC| <= |AB| + |BC|.
+
+PLAUSIBILITY_MODE=flag - shubhali ping yoziladi va `flags` bilan belgilanadi;
+reject - LocationLog ga yozilmaydi. Ikkala holatda ham FlaggedLocation
+kolleksiyasiga (admin ko'rib chiqishi uchun) tushadi.
+"""
+import math
+from datetime import datetime
+from typing import List, Optional
+
+from bson import ObjectId
+
+from app.cache import TTLCache
+from app.config import settings
+from app.models import FlaggedLocation, User
+
+# Bundan eski nuqta bilan solishtirishdan foyda yo'q
+STATE_TTL_SECONDS = 12 * 3600
+MIN_DT_SECONDS = 1.0
+EARTH_RADIUS_M = 6371008.8
+
+# user_id -> (timestamp, latitude, longitude, accuracy)
+_last_points = TTLCache(ttl=STATE_TTL_SECONDS, maxsize=settings.PLAUSIBILITY_CACHE_SIZE)
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Ikki nuqta orasidagi masofa (metr, sfera) - geodesic dan ancha tez, tekshiruv uchun yetarli"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def check(
+    user_id: str, lat: float, lon: float, timestamp: datetime, accuracy: Optional[float] = None
+) -> Optional[dict]:
+    """
+    Pingni tekshirish. Hammasi joyida bo'lsa None (va nuqta eslab qolinadi),
+    aks holda {"reasons", "rejected", "speed_kmh", "distance_from_prev", "prev_timestamp"}.
+    """
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or (lat == 0 and lon == 0):
+        return {"reasons": ["invalid_coordinates"], "rejected": True}
+
+    reasons = []
+    if accuracy is not None and accuracy > settings.PING_MAX_ACCURACY_METERS:
+        reasons.append("low_accuracy")
+
+    verdict = {}
+    prev = _last_points.get(user_id)
+    if prev is not None:
+        prev_ts, prev_lat, prev_lon, prev_accuracy = prev
+        distance = haversine(prev_lat, prev_lon, lat, lon)
+        moved = max(distance - (prev_accuracy or 0) - (accuracy or 0), 0)
+        dt = max(abs((timestamp - prev_ts).total_seconds()), MIN_DT_SECONDS)
+        speed_kmh = moved / dt * 3.6
+        if speed_kmh > settings.PING_MAX_SPEED_KMH:
+            reasons.append("impossible_speed")
+            verdict = {
+                "speed_kmh": round(speed_kmh, 1),
+                "distance_from_prev": round(distance, 1),
+                "prev_timestamp": prev_ts,
+            }
+
+    if reasons:
+        return {"reasons": reasons, "rejected": settings.PLAUSIBILITY_MODE == "reject", **verdict}
+
+    # Faqat yangiroq va ishonchli nuqta asos bo'ladi (kechikib kelgan eski ping emas)
+    if prev is None or timestamp >= prev[0]:
+        _last_points.set(user_id, (timestamp, lat, lon, accuracy))
+    return None
+
+
+# ============ Ko'rib chiqish ============
+
+async def list_flagged(
+    day: Optional[str] = None,
+    user_id: Optional[str] = None,
+    reviewed: Optional[bool] = None,
+    limit: int = 100,
+) -> List[FlaggedLocation]:
+    query = {}
+    if day:
+        query["day"] = day
+    if user_id:
+        query["user_id"] = user_id
+    if reviewed is not None:
+        query["reviewed"] = reviewed
+    return await FlaggedLocation.find(query).sort(-FlaggedLocation.timestamp).limit(limit).to_list()
+
+
+async def mark_reviewed(flag_id: str, admin: User) -> Optional[FlaggedLocation]:
+    flag = await FlaggedLocation.get(ObjectId(flag_id))
+    if flag is None:
+        return None
+    flag.reviewed = True
+    flag.reviewed_by = admin.telegram_id
+    flag.reviewed_at = datetime.utcnow()
+    await flag.save()
+    return flag
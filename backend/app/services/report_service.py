@@ -0,0 +1,108 @@
+from typing import AsyncIterator, List
+
+from app import ndjson
+from app.cache import Cache
+from app.config import settings
+from app.models import DailyWorkRecord
+from app.schemas import DailyReportResponse, MonthlyReportResponse
+
+# "<user_id>:<avlod>:<start>:<end>" -> {"etag", "last_modified", "report"}
+report_cache = Cache("reports", ttl=settings.REPORT_CACHE_TTL, maxsize=settings.REPORT_CACHE_SIZE)
+
+
+async def report_key(user_id: str, start_date: str, end_date: str) -> str:
+    """Oraliq hisobot kaliti - yozuvlarni o'qishdan oldin olinadi"""
+    return await report_cache.group_key(user_id, start_date, end_date)
+
+
+async def invalidate_reports(*user_ids: str):
+    """Hodimlarning DailyWorkRecord'i o'zgarganda ularning barcha oraliq hisobotlarini eskirtirish"""
+    await report_cache.bump(*user_ids)
+
+
+def record_to_response(record: DailyWorkRecord) -> DailyReportResponse:
+    """Convert DailyWorkRecord to DailyReportResponse"""
+    return DailyReportResponse(
+        date=record.date,
+        work_start_time=record.work_start_time,
+        work_end_time=record.work_end_time,
+        total_work_hours=record.total_work_hours,
+        present_hours=record.present_hours,
+        absent_hours=record.absent_hours,
+        total_locations=record.total_locations,
+        valid_locations=record.valid_locations,
+        late_minutes=record.late_minutes,
+        flagged_locations=record.flagged_locations
+    )
+
+
+class RangeTotals:
+    """Oraliq hisobot yig'indilari - yozuvlar birma-bir qo'shiladi (NDJSON oqimi uchun ham)"""
+
+    def __init__(self, start_date: str, end_date: str):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.days = 0
+        self.work = 0.0
+        self.present = 0.0
+        self.absent = 0.0
+
+    def add(self, total_work_hours: float, present_hours: float, absent_hours: float, total_locations: int) -> None:
+        # Faqat rad etilgan pinglar bo'lgan kun (flagged_locations) ish kuni sanalmaydi
+        if total_locations:
+            self.days += 1
+        self.work += total_work_hours
+        self.present += present_hours
+        self.absent += absent_hours
+
+    def summary(self) -> dict:
+        efficiency = (self.present / self.work * 100) if self.work > 0 else 0
+        return {
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "total_days": self.days,
+            "total_work_hours": round(self.work, 2),
+            "total_present_hours": round(self.present, 2),
+            "total_absent_hours": round(self.absent, 2),
+            "efficiency_percent": round(efficiency, 1),
+        }
+
+
+def build_range_report(start_date: str, end_date: str, records: List[DailyWorkRecord]) -> MonthlyReportResponse:
+    """Kunlik yozuvlardan oraliq hisobotini yig'ish"""
+    totals = RangeTotals(start_date, end_date)
+    for r in records:
+        totals.add(r.total_work_hours, r.present_hours, r.absent_hours, r.total_locations)
+    
+    return MonthlyReportResponse(
+        **totals.summary(),
+        daily_details=[record_to_response(r) for r in records]
+    )
+
+
+async def iter_range_rows(user_id: str, start_date: str, end_date: str) -> AsyncIterator[List[dict]]:
+    """
+    NDJSON oraliq hisobot: har bir kun - DailyReportResponse qatori, oxirgi
+    qator - {"summary": {...}} (MonthlyReportResponse'ning daily_details'siz qismi).
+    """
+    cursor = DailyWorkRecord.get_motor_collection().find(
+        {"user_id": user_id, "date": {"$gte": start_date, "$lte": end_date}},
+        {"_id": 0, **{field: 1 for field in DailyReportResponse.model_fields}}
+    ).sort("date", 1)
+    totals = RangeTotals(start_date, end_date)
+    async for batch in ndjson.cursor_batches(cursor):
+        rows = []
+        for doc in batch:
+            row = record_to_response(DailyWorkRecord.model_construct(**doc)).model_dump(mode="json")
+            totals.add(row["total_work_hours"], row["present_hours"], row["absent_hours"], row["total_locations"])
+            rows.append(row)
+        yield rows
+    yield [{"summary": totals.summary()}]
+
+
+async def load_range_records(user_id: str, start_date: str, end_date: str) -> List[DailyWorkRecord]:
+    return await DailyWorkRecord.find(
+        DailyWorkRecord.user_id == user_id,
+        DailyWorkRecord.date >= start_date,
+        DailyWorkRecord.date <= end_date
+    ).sort(DailyWorkRecord.date).to_list()
@@ -1,7 +1,7 @@
 import json
-from typing import Optional
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from datetime import datetime
+from app.cache import Cache
+from app.config import settings
 from app.models import Settings
 
 
@@ -11,96 +11,92 @@ DEFAULT_SETTINGS = {
         "point1": {"lat": 41.2995, "lng": 69.2401},
         "point2": {"lat": 41.3005, "lng": 69.2411}
     },
-    "use_area_mode": False,
+    "use_area_mode": {"enabled": False},
     "location_interval": {"minutes": 30, "grace_period": 5}
 }
 
+# key -> dict (mavjud bo'lmagan kalitlar ham {} sifatida keshlanadi)
+_cache = Cache("settings", ttl=settings.SETTINGS_CACHE_TTL)
 
-async def get_setting(db: AsyncSession, key: str) -> Optional[str]:
-    result = await db.execute(select(Settings).where(Settings.key == key))
-    setting = result.scalar_one_or_none()
-    return setting.value if setting else None
+
+def _parse(value: str) -> dict:
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return {}
 
 
-async def set_setting(db: AsyncSession, key: str, value: str):
-    result = await db.execute(select(Settings).where(Settings.key == key))
-    setting = result.scalar_one_or_none()
+async def get_setting(key: str) -> dict:
+    """Get setting by key"""
+    cached = await _cache.get(key)
+    if cached is not None:
+        return cached
     
+    setting = await Settings.find_one(Settings.key == key)
+    value = _parse(setting.value) if setting else {}
+    await _cache.set(key, value)
+    return value
+
+
+async def set_setting(key: str, value: dict):
+    """Set or update setting"""
+    setting = await Settings.find_one(Settings.key == key)
     if setting:
-        setting.value = value
+        setting.value = json.dumps(value)
+        setting.updated_at = datetime.utcnow()
+        await setting.save()
     else:
-        setting = Settings(key=key, value=value)
-        db.add(setting)
-    
-    await db.commit()
+        setting = Settings(key=key, value=json.dumps(value))
+        await setting.insert()
+    # Boshqa workerlar eski qiymatni L1 dan o'chiradi
+    await _cache.delete(key)
+    await _cache.set(key, value)
 
 
-async def get_all_settings(db: AsyncSession) -> dict:
-    result = await db.execute(select(Settings))
-    settings_list = result.scalars().all()
-    
+async def warm_cache():
+    """Barcha sozlamalarni bitta so'rov bilan keshga yuklash"""
+    loaded = {s.key: _parse(s.value) for s in await Settings.find_all().to_list()}
+    for key in DEFAULT_SETTINGS:
+        loaded.setdefault(key, {})
+    for key, value in loaded.items():
+        await _cache.set(key, value)
+    return len(loaded)
+
+
+async def get_all_settings() -> dict:
+    settings_list = await Settings.find_all().to_list()
+
     settings_dict = {}
     for s in settings_list:
         try:
             settings_dict[s.key] = json.loads(s.value)
-        except:
+        except json.JSONDecodeError:
             settings_dict[s.key] = s.value
-    
+
     # Merge with defaults
     for key, value in DEFAULT_SETTINGS.items():
         if key not in settings_dict:
             settings_dict[key] = value
-    
-    return settings_dict
-
-
-async def get_office_location(db: AsyncSession) -> dict:
-    value = await get_setting(db, "office_location")
-    if value:
-        return json.loads(value)
-    return DEFAULT_SETTINGS["office_location"]
-
 
-async def get_office_area(db: AsyncSession) -> dict:
-    value = await get_setting(db, "office_area")
-    if value:
-        return json.loads(value)
-    return DEFAULT_SETTINGS["office_area"]
-
-
-async def is_area_mode(db: AsyncSession) -> bool:
-    value = await get_setting(db, "use_area_mode")
-    if value:
-        return json.loads(value)
-    return DEFAULT_SETTINGS["use_area_mode"]
+    return settings_dict
 
 
-async def get_location_interval(db: AsyncSession) -> dict:
-    value = await get_setting(db, "location_interval")
-    if value:
-        return json.loads(value)
-    return DEFAULT_SETTINGS["location_interval"]
+async def get_office_location() -> dict:
+    return await get_setting("office_location") or DEFAULT_SETTINGS["office_location"]
 
 
-async def update_office_location(db: AsyncSession, latitude: float, longitude: float, radius: int = 100):
-    await set_setting(db, "office_location", json.dumps({
-        "latitude": latitude,
-        "longitude": longitude,
-        "radius": radius
-    }))
-    await set_setting(db, "use_area_mode", json.dumps(False))
+async def get_office_area() -> dict:
+    return await get_setting("office_area") or DEFAULT_SETTINGS["office_area"]
 
 
-async def update_office_area(db: AsyncSession, point1: dict, point2: dict):
-    await set_setting(db, "office_area", json.dumps({
-        "point1": point1,
-        "point2": point2
-    }))
-    await set_setting(db, "use_area_mode", json.dumps(True))
+async def is_area_mode() -> bool:
+    value = await get_setting("use_area_mode") or DEFAULT_SETTINGS["use_area_mode"]
+    return bool(value.get("enabled", False))
 
 
-async def update_location_interval(db: AsyncSession, minutes: int, grace_period: int = 5):
-    await set_setting(db, "location_interval", json.dumps({
-        "minutes": minutes,
-        "grace_period": grace_period
-    }))
+async def get_location_interval() -> dict:
+    value = await get_setting("location_interval") or DEFAULT_SETTINGS["location_interval"]
+    return {
+        "minutes": value.get("minutes", 30),
+        "grace_period": value.get("grace_period", 5)
+    }
@@ -0,0 +1,200 @@
+"""
+Oylik tabel (payroll uchun): bir oylik DailyWorkRecord'lar barcha hodimlar
+uchun bitta so'rov bilan ustunli numpy massivlarga yuklanadi va ko'rsatkichlar
+vektorlashgan holda hisoblanadi (hodim bo'yicha np.bincount).
+
+- overtime_hours: work_end_hour dan keyin ishlangan soatlar (pinglar smenadan
+  keyin OVERTIME_MAX_HOURS gacha qabul qilinadi)
+- regular_hours: min(present_hours - overtime + kechikishning grace qismi,
+  smena davomiyligi). present_hours birinchi pingdan boshlanadi, ya'ni
+  kechikish unda allaqachon ushlangan - alohida ayirilmaydi, faqat
+  late_grace_minutes ichidagisi qaytariladi.
+- late_deduction_hours: (late_minutes - late_grace_minutes) / 60 - shu tarzda
+  ushlangan vaqt (ma'lumot uchun, payable_hours dan qayta ayirilmaydi)
+- absent_days: ish kunlari (workdays) ichida yozuvi yo'q kunlar (dam olish
+  kunidagi yozuvlar days_worked ga kiradi, lekin ishlanmagan ish kunini qoplamaydi)
+- payable_hours: regular_hours + overtime_hours * overtime_rate
+"""
+import calendar
+import csv
+import io
+from datetime import date, datetime
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from app.models import DailyWorkRecord, User
+from app.timezone import local_today, to_local
+
+MIN_YEAR, MAX_YEAR = 2000, 2100
+
+PROJECTION = {
+    "_id": 0, "user_id": 1, "date": 1, "work_end_time": 1,
+    "present_hours": 1, "absent_hours": 1, "late_minutes": 1,
+}
+
+
+def check_period(year: int, month: int) -> None:
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        raise ValueError(f"Yil {MIN_YEAR}-{MAX_YEAR} oralig'ida bo'lishi kerak")
+    if not 1 <= month <= 12:
+        raise ValueError("Oy 1-12 oralig'ida bo'lishi kerak")
+
+
+def month_range(year: int, month: int) -> tuple:
+    last_day = calendar.monthrange(year, month)[1]
+    return f"{year}-{month:02d}-01", f"{year}-{month:02d}-{last_day:02d}"
+
+
+def expected_workdays(year: int, month: int, workdays: Sequence[int], until: date = None) -> int:
+    """Oydagi ish kunlari soni (0 - dushanba); joriy oy uchun bugungacha"""
+    last_day = calendar.monthrange(year, month)[1]
+    if until is not None and (until.year, until.month) == (year, month):
+        last_day = until.day
+    return sum(1 for d in range(1, last_day + 1) if date(year, month, d).weekday() in workdays)
+
+
+def is_scheduled_workday(date_str: str, workdays: Sequence[int], until: date) -> bool:
+    day = date.fromisoformat(date_str)
+    return day <= until and day.weekday() in workdays
+
+
+async def load_month(
+    year: int, month: int, workdays: Sequence[int] = (0, 1, 2, 3, 4), until: date = None
+) -> Dict[str, np.ndarray]:
+    """Oylik yozuvlar va hodimlarni ustunli massivlarga yuklash"""
+    until = until or date.max
+    users = await User.find(User.is_admin == False, User.is_approved == True).to_list()
+    user_index = {str(u.id): i for i, u in enumerate(users)}
+
+    start_date, end_date = month_range(year, month)
+    cursor = DailyWorkRecord.get_motor_collection().find(
+        # Faqat rad etilgan pinglar bo'lgan kunlar ishlangan kun emas
+        {"date": {"$gte": start_date, "$lte": end_date}, "total_locations": {"$gt": 0}}, PROJECTION
+    ).batch_size(10000)
+
+    idx, end_hour, present, absent, late, workday = [], [], [], [], [], []
+    async for doc in cursor:
+        i = user_index.get(doc["user_id"])
+        if i is None:
+            continue
+        idx.append(i)
+        end_time = to_local(doc["work_end_time"]) if doc.get("work_end_time") else None
+        end_hour.append(end_time.hour + end_time.minute / 60 + end_time.second / 3600 if end_time else np.nan)
+        present.append(doc.get("present_hours", 0))
+        absent.append(doc.get("absent_hours", 0))
+        late.append(doc.get("late_minutes", 0))
+        workday.append(is_scheduled_workday(doc["date"], workdays, until))
+
+    return {
+        "user_ids": np.array([str(u.id) for u in users], dtype=object),
+        "full_names": np.array([u.full_name or u.username or str(u.telegram_id) for u in users], dtype=object),
+        "work_start_hour": np.array([u.work_start_hour for u in users], dtype=np.float64),
+        "work_end_hour": np.array([u.work_end_hour for u in users], dtype=np.float64),
+        "record_user": np.array(idx, dtype=np.int64),
+        "record_end_hour": np.array(end_hour, dtype=np.float64),
+        "record_present": np.array(present, dtype=np.float64),
+        "record_absent": np.array(absent, dtype=np.float64),
+        "record_late": np.array(late, dtype=np.float64),
+        "record_workday": np.array(workday, dtype=bool),
+    }
+
+
+def compute_timesheet(
+    data: Dict[str, np.ndarray],
+    workdays_in_month: int,
+    overtime_rate: float = 1.5,
+    late_grace_minutes: float = 0,
+) -> Dict[str, np.ndarray]:
+    """Hodim bo'yicha ko'rsatkichlar (har bir massiv uzunligi - hodimlar soni)"""
+    n_users = len(data["user_ids"])
+    user = data["record_user"]
+
+    shift_hours = (data["work_end_hour"] - data["work_start_hour"])[user]
+    present = data["record_present"]
+
+    overtime = np.nan_to_num(data["record_end_hour"] - data["work_end_hour"][user], nan=0.0)
+    overtime = np.clip(overtime, 0, None)
+    overtime = np.minimum(overtime, present)
+
+    late_deduction = np.clip(data["record_late"] - late_grace_minutes, 0, None) / 60
+    late_grace = np.minimum(data["record_late"], late_grace_minutes) / 60
+    regular = np.clip(np.minimum(present - overtime + late_grace, shift_hours), 0, None)
+
+    def per_user(values: np.ndarray) -> np.ndarray:
+        return np.bincount(user, weights=values, minlength=n_users)
+
+    days_worked = np.bincount(user, minlength=n_users)
+    workdays_worked = np.bincount(user, weights=data["record_workday"], minlength=n_users)
+    regular_hours = per_user(regular)
+    overtime_hours = per_user(overtime)
+
+    return {
+        "days_worked": days_worked,
+        "absent_days": np.clip(workdays_in_month - workdays_worked, 0, None),
+        "present_hours": per_user(present),
+        "absent_hours": per_user(data["record_absent"]),
+        "late_minutes": per_user(data["record_late"]),
+        "late_deduction_hours": per_user(late_deduction),
+        "regular_hours": regular_hours,
+        "overtime_hours": overtime_hours,
+        "payable_hours": regular_hours + overtime_hours * overtime_rate,
+    }
+
+
+def timesheet_rows(data: Dict[str, np.ndarray], result: Dict[str, np.ndarray]) -> List[dict]:
+    rounded = {key: np.round(values, 2).tolist() for key, values in result.items()}
+    rows = []
+    for i, user_id in enumerate(data["user_ids"]):
+        row = {"user_id": user_id, "full_name": data["full_names"][i]}
+        for key, values in rounded.items():
+            row[key] = values[i]
+        rows.append(row)
+    return rows
+
+
+async def build_timesheet(
+    year: int,
+    month: int,
+    overtime_rate: float = 1.5,
+    late_grace_minutes: float = 0,
+    workdays: Sequence[int] = (0, 1, 2, 3, 4),
+) -> dict:
+    check_period(year, month)
+    today = local_today()
+    data = await load_month(year, month, workdays, until=today)
+    workdays_in_month = expected_workdays(year, month, workdays, until=today)
+    result = compute_timesheet(data, workdays_in_month, overtime_rate, late_grace_minutes)
+    start_date, end_date = month_range(year, month)
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "workdays": workdays_in_month,
+        "overtime_rate": overtime_rate,
+        "late_grace_minutes": late_grace_minutes,
+        "generated_at": datetime.utcnow(),
+        "total_payable_hours": round(float(result["payable_hours"].sum()), 2),
+        "employees": timesheet_rows(data, result),
+    }
+
+
+CSV_COLUMNS = (
+    "user_id", "full_name", "days_worked", "absent_days", "present_hours", "absent_hours",
+    "late_minutes", "late_deduction_hours", "regular_hours", "overtime_hours", "payable_hours",
+)
+
+
+def timesheet_csv(sheet: dict) -> str:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(sheet["employees"])
+    return out.getvalue()
+
+
+def parse_workdays(value: str) -> tuple:
+    """'0,1,2,3,4' -> (0, 1, 2, 3, 4)"""
+    days = tuple(sorted({int(x) for x in value.split(",") if x.strip()}))
+    if not days or any(d < 0 or d > 6 for d in days):
+        raise ValueError(value)
+    return days
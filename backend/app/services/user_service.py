@@ -0,0 +1,238 @@
+"""
+Hodimlar ustida ommaviy amallar: tanlangan hodimlar bitta so'rov bilan
+o'qiladi, har bir ID uchun natija aniqlanadi va o'zgarish bitta
+update_many/delete_many bilan yoziladi.
+
+Qidiruv: `User.search_tokens` - ism so'zlari, username va telegram_id ning
+normallashtirilgan shakli (kichik harf, apostrofsiz, kirill -> lotin);
+`User.search_prefixes` - ularning MAX_PREFIX_LEN gacha barcha boshlanishlari.
+So'rovdagi har bir so'z prefikslardan biriga teng bo'lishi kerak. Tenglik
+(regex oralig'i emas) bo'lgani uchun [search_prefixes, _id] indeksida mos
+yozuvlar `_id` tartibida yotadi: filtr ham, keyset sahifalash (`after`) ham
+bitta IXSCAN, xotirada saralash yo'q va `limit` ta kalitdan keyin to'xtaydi.
+"""
+import asyncio
+import re
+import unicodedata
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.auth import invalidate_user
+from app.models import User
+from app.schemas import BulkUserItem, BulkUserResult, UserSelection
+
+PROJECTION = {"_id": 1, "telegram_id": 1, "is_admin": 1, "is_approved": 1}
+
+STATUS_FILTERS = {
+    "pending": {"is_approved": False, "is_active": True},
+    "approved": {"is_approved": True, "is_active": True},
+    "all": {},
+}
+# O'chirish faqat kutayotganlar uchun filter bilan mumkin (tasdiqlanganlarni - faqat user_ids bilan)
+REJECT_FILTERS = {"pending": STATUS_FILTERS["pending"]}
+
+# doc -> o'tkazib yuborish sababi (None - amal qo'llanadi)
+SkipRule = Callable[[dict], Optional[str]]
+
+
+def _skip_admin(doc: dict) -> Optional[str]:
+    return "Admin" if doc.get("is_admin") else None
+
+
+async def select_users(
+    selection: UserSelection,
+    filters: Optional[dict] = STATUS_FILTERS,
+    confirm: bool = False,
+) -> Tuple[List[dict], List[BulkUserItem]]:
+    """
+    Tanlangan hodimlar va topilmagan/noto'g'ri ID lar uchun natijalar.
+    `filters=None` - faqat user_ids; `confirm` - filter tanlagan hodimlar soni
+    `expected_count` ga teng bo'lishi shart (xavfli amallar uchun).
+    """
+    collection = User.get_motor_collection()
+    if selection.user_ids is not None:
+        ids = list(dict.fromkeys(selection.user_ids))
+        errors = [BulkUserItem(user_id=i, status="invalid_id", detail="Noto'g'ri ID formati")
+                  for i in ids if not ObjectId.is_valid(i)]
+        object_ids = [ObjectId(i) for i in ids if ObjectId.is_valid(i)]
+        docs = await collection.find({"_id": {"$in": object_ids}}, PROJECTION).to_list(length=None)
+        found = {str(d["_id"]) for d in docs}
+        errors += [BulkUserItem(user_id=str(i), status="not_found", detail="Foydalanuvchi topilmadi")
+                   for i in object_ids if str(i) not in found]
+        return docs, errors
+
+    if filters is None:
+        raise ValueError("Bu amal uchun user_ids berilishi kerak")
+    if selection.status is None and selection.office_id is None:
+        raise ValueError("user_ids yoki filter (status/office_id) berilishi kerak")
+    status = selection.status or "all"
+    if status not in STATUS_FILTERS:
+        raise ValueError(f"Noma'lum status: {status}")
+    if status not in filters:
+        raise ValueError(f"Bu amal uchun filter faqat status: {', '.join(filters)} bilan ishlaydi")
+
+    query = {"is_admin": False, **filters[status]}
+    if selection.office_id is not None:
+        query["office_ids"] = selection.office_id
+    docs = await collection.find(query, PROJECTION).to_list(length=None)
+    if confirm and selection.expected_count != len(docs):
+        raise ValueError(f"Filter {len(docs)} ta hodimni tanladi; tasdiqlash uchun expected_count={len(docs)} yuboring")
+    return docs, []
+
+
+async def _apply(
+    selection: UserSelection,
+    skip_rules: List[SkipRule],
+    write: Callable[[List[ObjectId]], Awaitable[int]],
+    filters: Optional[dict] = STATUS_FILTERS,
+    confirm: bool = False,
+) -> BulkUserResult:
+    docs, results = await select_users(selection, filters, confirm)
+    targets = []
+    for doc in docs:
+        reason = next((r for r in (rule(doc) for rule in skip_rules) if r), None)
+        if reason:
+            results.append(BulkUserItem(user_id=str(doc["_id"]), status="skipped", detail=reason))
+        else:
+            targets.append(doc)
+
+    modified = await write([d["_id"] for d in targets]) if targets else 0
+    await asyncio.gather(*(invalidate_user(d["telegram_id"]) for d in targets))
+    results = [BulkUserItem(user_id=str(d["_id"]), status="ok") for d in targets] + results
+    return BulkUserResult(matched=len(docs), modified=modified, results=results)
+
+
+async def bulk_update(
+    selection: UserSelection,
+    fields: dict,
+    skip_rules: List[SkipRule] = (),
+    filters: Optional[dict] = STATUS_FILTERS,
+) -> BulkUserResult:
+    """Tanlangan hodimlarga bitta update_many bilan `fields` ni yozish (adminlar o'tkazib yuboriladi)"""
+    async def write(ids: List[ObjectId]) -> int:
+        result = await User.get_motor_collection().update_many(
+            {"_id": {"$in": ids}, "is_admin": False},
+            {"$set": {**fields, "updated_at": datetime.utcnow()}}
+        )
+        return result.modified_count
+
+    return await _apply(selection, [_skip_admin, *skip_rules], write, filters)
+
+
+async def bulk_delete(selection: UserSelection) -> BulkUserResult:
+    """
+    Tanlangan hodimlarni bitta delete_many bilan o'chirish (adminlar o'tkazib
+    yuboriladi). Filter faqat status=pending va expected_count bilan.
+    """
+    async def write(ids: List[ObjectId]) -> int:
+        result = await User.get_motor_collection().delete_many({"_id": {"$in": ids}, "is_admin": False})
+        return result.deleted_count
+
+    return await _apply(selection, [_skip_admin], write, REJECT_FILTERS, confirm=True)
+
+
+def skip_approved(doc: dict) -> Optional[str]:
+    return "Foydalanuvchi allaqachon tasdiqlangan" if doc.get("is_approved") else None
+
+
+# ============ Qidiruv ============
+
+SEARCH_STATUSES = {
+    **STATUS_FILTERS,
+    "active": {"is_active": True},
+    "inactive": {"is_active": False},
+}
+MAX_QUERY_WORDS = 5
+MAX_PREFIX_LEN = 16
+
+_CYRILLIC = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "ғ": "g", "д": "d", "е": "e", "ё": "yo", "ж": "j",
+    "з": "z", "и": "i", "й": "y", "к": "k", "қ": "q", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ў": "o", "ф": "f", "х": "x", "ҳ": "h",
+    "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "", "ы": "i", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya",
+}
+# O'zbek lotinidagi o', g' va ularning tipografik variantlari
+_APOSTROPHES = {ord(c): None for c in "'`\u02bb\u02bc\u2018\u2019"}
+_WORD = re.compile(r"[0-9a-z]+")
+
+
+def normalize_words(text: Optional[str]) -> List[str]:
+    """'G‘ulomov Ёқуб' -> ['gulomov', 'yoqub']"""
+    if not text:
+        return []
+    text = "".join(_CYRILLIC.get(c, c) for c in text.casefold().translate(_APOSTROPHES))
+    text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return _WORD.findall(text)
+
+
+def search_tokens(full_name: Optional[str], username: Optional[str], telegram_id: int) -> List[str]:
+    tokens = normalize_words(full_name)
+    if username:
+        # "ali_valiyev" - ham butun holda, ham qismlari bo'yicha
+        tokens += ["".join(normalize_words(username))] + normalize_words(username)
+    tokens.append(str(telegram_id))
+    return list(dict.fromkeys(t for t in tokens if t))
+
+
+def search_prefixes(tokens: List[str]) -> List[str]:
+    """['ali'] -> ['a', 'al', 'ali']"""
+    return sorted({token[:n] for token in tokens for n in range(1, min(len(token), MAX_PREFIX_LEN) + 1)})
+
+
+def search_fields(full_name: Optional[str], username: Optional[str], telegram_id: int) -> dict:
+    tokens = search_tokens(full_name, username, telegram_id)
+    return {"search_tokens": tokens, "search_prefixes": search_prefixes(tokens)}
+
+
+def set_search_tokens(user: User) -> None:
+    fields = search_fields(user.full_name, user.username, user.telegram_id)
+    user.search_tokens = fields["search_tokens"]
+    user.search_prefixes = fields["search_prefixes"]
+
+
+def search_query(q: Optional[str], status: str = "all", after: Optional[str] = None) -> dict:
+    """Qidiruv filtri; noto'g'ri status/after uchun ValueError"""
+    if status not in SEARCH_STATUSES:
+        raise ValueError(f"Noma'lum status: {status}")
+    query = {"is_admin": False, **SEARCH_STATUSES[status]}
+    words = sorted(set(normalize_words(q)), key=len, reverse=True)[:MAX_QUERY_WORDS]
+    if words:
+        # Eng uzun (eng tanlovchan) so'z birinchi - indeks chegarasi shundan
+        query["search_prefixes"] = {"$all": [word[:MAX_PREFIX_LEN] for word in words]}
+        long_words = [word for word in words if len(word) > MAX_PREFIX_LEN]
+        if long_words:
+            query["$and"] = [{"search_tokens": {"$regex": f"^{re.escape(word)}"}} for word in long_words]
+    if after is not None:
+        if not ObjectId.is_valid(after):
+            raise ValueError("Noto'g'ri ID formati")
+        query["_id"] = {"$gt": ObjectId(after)}
+    return query
+
+
+async def search_users(
+    q: Optional[str], status: str = "all", after: Optional[str] = None, limit: int = 50
+) -> Tuple[List[User], Optional[str]]:
+    """Bir sahifa hodim va keyingi sahifa uchun `after` (oxirgi sahifada None)"""
+    users = await User.find(search_query(q, status, after)).sort("_id").limit(limit).to_list()
+    return users, str(users[-1].id) if len(users) == limit else None
+
+
+async def backfill_search_tokens(batch_size: int = 1000) -> int:
+    """Barcha foydalanuvchilarning search_tokens/search_prefixes maydonlarini qayta hisoblash"""
+    from pymongo import UpdateOne
+    
+    collection = User.get_motor_collection()
+    total = 0
+    batch = []
+    async for doc in collection.find({}, {"full_name": 1, "username": 1, "telegram_id": 1}):
+        fields = search_fields(doc.get("full_name"), doc.get("username"), doc["telegram_id"])
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields}))
+        if len(batch) >= batch_size:
+            total += (await collection.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        total += (await collection.bulk_write(batch, ordered=False)).modified_count
+    return total
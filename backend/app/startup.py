@@ -0,0 +1,31 @@
+"""
+Ilova ishga tushish vaqtlarini o'lchash (cold start hisoboti)
+"""
+import time
+from typing import Dict
+
+
+class StartupTimer:
+    """app.main import qilingandan boshlab bosqichlar vaqtini (ms) yozib boradi"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps: Dict[str, float] = {}
+        self.background: Dict[str, str] = {}
+
+    def mark(self, step: str) -> float:
+        elapsed = round((time.perf_counter() - self.started) * 1000, 1)
+        self.steps[step] = elapsed
+        return elapsed
+
+    def set_status(self, task: str, status: str) -> None:
+        self.background[task] = status
+
+    def report(self) -> dict:
+        return {"steps_ms": dict(self.steps), "background": dict(self.background)}
+
+    def summary(self) -> str:
+        return ", ".join(f"{step}={ms:.0f}ms" for step, ms in self.steps.items())
+
+
+startup_timer = StartupTimer()
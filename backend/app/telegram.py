@@ -0,0 +1,54 @@
+"""
+Backend'dan Telegram Bot API ga to'g'ridan-to'g'ri xabar yuborish (bot.py alohida jarayon)
+"""
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(base_url=f"{TELEGRAM_API_URL}/bot{settings.BOT_TOKEN}", timeout=10.0)
+    return _client
+
+
+async def send_message(chat_id: int, text: str, retries: int = 2) -> bool:
+    """Xabar yuborish. 429 da `retry_after` kutib qayta uriniladi"""
+    if not settings.BOT_TOKEN:
+        logger.warning("BOT_TOKEN not set, telegram message to %s skipped", chat_id)
+        return False
+
+    for _ in range(retries + 1):
+        try:
+            response = await _get_client().post("/sendMessage", json={"chat_id": chat_id, "text": text})
+        except httpx.HTTPError as e:
+            logger.error("Telegram sendMessage failed for %s: %s", chat_id, e)
+            return False
+
+        if response.status_code == 429:
+            retry_after = response.json().get("parameters", {}).get("retry_after", 1)
+            await asyncio.sleep(retry_after)
+            continue
+        if response.status_code != 200:
+            logger.error("Telegram sendMessage %s for %s: %s", response.status_code, chat_id, response.text)
+            return False
+        return True
+    return False
+
+
+async def close():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
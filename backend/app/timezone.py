@@ -0,0 +1,50 @@
+"""
+Tashkilot vaqt zonasi (TIMEZONE) bo'yicha kun chegaralari.
+
+Bazada vaqtlar naive UTC (`datetime.utcnow()`) saqlanadi; "kun" esa doim
+tashkilotning mahalliy kuni - LocationLog.day va DailyWorkRecord.date shu
+zonadagi `YYYY-MM-DD`.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Tuple
+from zoneinfo import ZoneInfo
+
+from app.config import settings
+
+
+@lru_cache(maxsize=None)
+def org_tz() -> ZoneInfo:
+    return ZoneInfo(settings.TIMEZONE)
+
+
+def local_now() -> datetime:
+    """Tashkilot zonasidagi joriy vaqt (tz-aware)"""
+    return datetime.now(org_tz())
+
+
+def local_today() -> date:
+    return local_now().date()
+
+
+def to_local(utc_dt: datetime) -> datetime:
+    """Naive UTC -> tashkilot zonasidagi tz-aware vaqt"""
+    return utc_dt.replace(tzinfo=timezone.utc).astimezone(org_tz())
+
+
+def local_day(utc_dt: datetime) -> str:
+    """Naive UTC vaqt qaysi mahalliy kunga tegishli ('YYYY-MM-DD')"""
+    return to_local(utc_dt).date().isoformat()
+
+
+def local_to_utc(day: date, hour: int = 0) -> datetime:
+    """Mahalliy kun + soat -> naive UTC"""
+    local = datetime.combine(day, time()).replace(tzinfo=org_tz()) + timedelta(hours=hour)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def day_bounds_utc(day: date) -> Tuple[datetime, datetime]:
+    """Mahalliy kunning naive UTC chegaralari: [start, end] (end - keyingi kun boshidan 1 mks oldin)"""
+    start = local_to_utc(day)
+    end = local_to_utc(day + timedelta(days=1)) - timedelta(microseconds=1)
+    return start, end
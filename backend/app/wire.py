@@ -0,0 +1,174 @@
+"""
+Pinglar uchun ixcham so'rov formatlari (Content-Type bo'yicha tanlanadi).
+
+    application/json      {"latitude", "longitude", "accuracy"} /
+                          {"pings": [{"latitude", "longitude", "timestamp", "accuracy"}]}
+    application/msgpack   [lat, lon, accuracy?] /
+                          [[lat, lon, ts_ms?, accuracy?], ...]
+    application/x-pings   qat'iy formatdagi yozuvlar (little-endian, 28 bayt):
+                          float64 lat, float64 lon, int64 ts_ms (0 - hozir), float32 accuracy (NaN - yo'q)
+
+`ts_ms` - Unix vaqti (UTC, millisekund). JSON Pydantic orqali tekshiriladi;
+binar formatlar Pydantic'siz to'g'ridan-to'g'ri tuple'larga dekodlanadi
+(x-pings - bitta `struct.iter_unpack`). Taqqoslash: `python -m benchmarks.wire`.
+"""
+import math
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from app.schemas import LocationBatch, LocationCreate
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+FRAME = "application/x-pings"
+MEDIA_TYPES = (JSON, MSGPACK, FRAME)
+_ALIASES = {"application/x-msgpack": MSGPACK, "": JSON}
+
+MAX_BATCH = 1000
+RECORD = struct.Struct("<ddqf")
+EPOCH = datetime(1970, 1, 1)
+
+# (latitude, longitude, timestamp (naive UTC, None - hozir), accuracy)
+WirePing = Tuple[float, float, Optional[datetime], Optional[float]]
+
+
+class UnsupportedMediaType(ValueError):
+    pass
+
+
+def media_type(content_type: Optional[str]) -> str:
+    """'application/msgpack; charset=...' -> 'application/msgpack'"""
+    value = (content_type or "").split(";")[0].strip().lower()
+    value = _ALIASES.get(value, value)
+    if value not in MEDIA_TYPES:
+        raise UnsupportedMediaType(value)
+    return value
+
+
+def from_ms(ts_ms: Optional[int]) -> Optional[datetime]:
+    if not ts_ms:
+        return None
+    try:
+        return EPOCH + timedelta(milliseconds=ts_ms)
+    except OverflowError as e:
+        # Kelajak/o'tmish oynasi ingest da tekshiriladi; bu yerda faqat datetime ga sig'maydiganlar
+        raise ValueError("ts_ms juda katta") from e
+
+
+def to_ms(timestamp: Optional[datetime]) -> int:
+    return int((timestamp - EPOCH).total_seconds() * 1000) if timestamp else 0
+
+
+def _ping(lat, lon, ts_ms=None, accuracy=None) -> WirePing:
+    if type(lat) not in (float, int) or type(lon) not in (float, int):
+        raise ValueError("latitude/longitude son bo'lishi kerak")
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        raise ValueError("latitude/longitude chekli son bo'lishi kerak")
+    if ts_ms is not None and (type(ts_ms) is not int or ts_ms < 0):
+        raise ValueError("ts_ms musbat butun son bo'lishi kerak")
+    if accuracy is not None and (type(accuracy) not in (float, int) or not accuracy >= 0):
+        raise ValueError("accuracy manfiy bo'lmagan son bo'lishi kerak")
+    return float(lat), float(lon), from_ms(ts_ms), accuracy
+
+
+# ============ x-pings ============
+
+def decode_frame(body: bytes) -> List[WirePing]:
+    if len(body) % RECORD.size:
+        raise ValueError(f"Tana uzunligi {RECORD.size} ga karrali bo'lishi kerak")
+    if len(body) // RECORD.size > MAX_BATCH:
+        raise ValueError(f"Bir so'rovda ko'pi bilan {MAX_BATCH} ta ping")
+    pings = []
+    for lat, lon, ts_ms, accuracy in RECORD.iter_unpack(body):
+        if not (math.isfinite(lat) and math.isfinite(lon)) or ts_ms < 0:
+            raise ValueError("Noto'g'ri yozuv")
+        pings.append((lat, lon, from_ms(ts_ms), None if math.isnan(accuracy) else accuracy))
+    return pings
+
+
+def encode_frame(pings: List[WirePing]) -> bytes:
+    return b"".join(
+        RECORD.pack(lat, lon, to_ms(ts), math.nan if accuracy is None else accuracy)
+        for lat, lon, ts, accuracy in pings
+    )
+
+
+# ============ msgpack ============
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as e:  # pragma: no cover - ixtiyoriy bog'liqlik
+        raise UnsupportedMediaType(MSGPACK) from e
+    return msgpack
+
+
+def decode_msgpack(body: bytes, single: bool) -> List[WirePing]:
+    try:
+        data = _msgpack().unpackb(body, use_list=False, max_array_len=MAX_BATCH, max_map_len=0, max_str_len=0)
+    except UnsupportedMediaType:
+        raise
+    except Exception as e:
+        raise ValueError(f"MessagePack o'qilmadi: {e}") from e
+    if not isinstance(data, tuple):
+        raise ValueError("Massiv kutilgan")
+    try:
+        if single:
+            if not 2 <= len(data) <= 3:
+                raise ValueError("[lat, lon, accuracy?] kutilgan")
+            return [_ping(data[0], data[1], None, data[2] if len(data) == 3 else None)]
+        return [_ping(*item) for item in data]
+    except TypeError as e:
+        raise ValueError("[[lat, lon, ts_ms?, accuracy?], ...] kutilgan") from e
+
+
+def encode_msgpack(pings: List[WirePing], single: bool = False) -> bytes:
+    msgpack = _msgpack()
+    if single:
+        lat, lon, _, accuracy = pings[0]
+        return msgpack.packb([lat, lon] if accuracy is None else [lat, lon, accuracy])
+    return msgpack.packb([[lat, lon, to_ms(ts) or None, accuracy] for lat, lon, ts, accuracy in pings])
+
+
+# ============ JSON ============
+
+def decode_json(body: bytes, single: bool) -> List[WirePing]:
+    """Pydantic ValidationError o'zgarishsiz ko'tariladi (422 uchun)"""
+    if single:
+        data = LocationCreate.model_validate_json(body)
+        return [(data.latitude, data.longitude, None, data.accuracy)]
+    batch = LocationBatch.model_validate_json(body)
+    pings = []
+    for p in batch.pings:
+        timestamp = p.timestamp
+        if timestamp is not None and timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        pings.append((p.latitude, p.longitude, timestamp, p.accuracy))
+    return pings
+
+
+def decode(content_type: Optional[str], body: bytes, single: bool = False) -> List[WirePing]:
+    """
+    Content-Type bo'yicha dekodlash. UnsupportedMediaType (415), ValueError
+    (400) yoki JSON uchun pydantic ValidationError (422) ko'taradi.
+    """
+    kind = media_type(content_type)
+    if kind == JSON:
+        return decode_json(body, single)
+    pings = decode_frame(body) if kind == FRAME else decode_msgpack(body, single)
+    if single and len(pings) != 1:
+        raise ValueError("Bitta ping kutilgan")
+    return pings
+
+
+def request_body(single: bool) -> dict:
+    """OpenAPI (openapi_extra) uchun so'rov tanasi tavsifi"""
+    model = LocationCreate if single else LocationBatch
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {"requestBody": {"required": True, "content": {
+        JSON: {"schema": model.model_json_schema()},
+        MSGPACK: binary,
+        FRAME: binary,
+    }}}
+
@@ -0,0 +1 @@
+# Micro-benchmarks (python -m benchmarks.run)
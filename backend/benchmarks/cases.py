@@ -0,0 +1,311 @@
+"""
+Hot path benchmark holatlari.
+
+Har bir holat - `setup()` funksiyasi: sintetik ma'lumot tayyorlaydi va
+o'lchanadigan argumentsiz funksiyani qaytaradi. Ma'lumotlar seed bilan
+yaratiladi, shuning uchun natijalar commitlar orasida solishtiriladi.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from bson import ObjectId
+
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+PINGS_PER_DAY = (1, 50, 500)
+USER_COUNTS = (10, 500, 5000)
+RANGE_DAYS = (31, 366)
+OFFICE_COUNTS = (10, 1000)
+
+OFFICE = {"latitude": 41.2995, "longitude": 69.2401, "radius": 100}
+AREA = {
+    "point1": {"lat": 41.2995, "lng": 69.2401},
+    "point2": {"lat": 41.3005, "lng": 69.2411},
+}
+
+
+def case(name: str):
+    def decorator(setup):
+        CASES[name] = setup
+        return setup
+    return decorator
+
+
+def synthetic_pings(count: int, seed: int = 1):
+    """Bir kunlik pinglar: ~9:00 da kelish, interval bo'yicha, ba'zan uzun tanaffus"""
+    rng = random.Random(seed)
+    interval = max(1.0, 9 * 60 / max(count, 1))
+    ts = datetime(2024, 3, 4, 8, 45) + timedelta(minutes=rng.uniform(0, 30))
+    timestamps, valid = [], []
+    for _ in range(count):
+        timestamps.append(ts)
+        valid.append(rng.random() < 0.9)
+        gap = interval * rng.uniform(0.8, 1.2)
+        if rng.random() < 0.05:
+            gap += rng.uniform(30, 120)  # tushlik / yo'qlik
+        ts += timedelta(minutes=gap)
+    return timestamps, valid
+
+
+def synthetic_records(count: int, seed: int = 2):
+    from app.models import DailyWorkRecord
+
+    rng = random.Random(seed)
+    records = []
+    day = datetime(2024, 1, 1)
+    for i in range(count):
+        total = rng.uniform(6, 10)
+        absent = rng.uniform(0, 1.5)
+        records.append(DailyWorkRecord.model_construct(
+            id=ObjectId(),
+            user_id="65f000000000000000000001",
+            telegram_id=1,
+            date=(day + timedelta(days=i)).strftime("%Y-%m-%d"),
+            work_start_time=day + timedelta(days=i, hours=9),
+            work_end_time=day + timedelta(days=i, hours=18),
+            total_work_hours=round(total, 2),
+            present_hours=round(total - absent, 2),
+            absent_hours=round(absent, 2),
+            total_locations=rng.randint(10, 20),
+            valid_locations=rng.randint(5, 10),
+            late_minutes=rng.randint(0, 30),
+        ))
+    return records
+
+
+def synthetic_users(count: int, seed: int = 3):
+    from app.models import DailyWorkRecord, User
+
+    rng = random.Random(seed)
+    users: List[User] = []
+    records: List[DailyWorkRecord] = []
+    for i in range(count):
+        user = User.model_construct(
+            id=ObjectId(),
+            telegram_id=1_000_000 + i,
+            username=f"user{i}",
+            full_name=f"Hodim {i}",
+            is_approved=True,
+            work_start_hour=9,
+            work_end_hour=18,
+        )
+        users.append(user)
+        if rng.random() < 0.85:
+            records.append(DailyWorkRecord.model_construct(
+                user_id=str(user.id),
+                telegram_id=user.telegram_id,
+                date="2024-03-04",
+                total_locations=rng.randint(1, 20),
+                valid_locations=rng.randint(0, 20),
+                present_hours=rng.uniform(0, 9),
+                late_minutes=rng.randint(0, 60),
+            ))
+    return users, records
+
+
+# ============ Geo ============
+
+@case("calculate_distance")
+def _distance():
+    from app.services.location_service import calculate_distance
+    return lambda: calculate_distance(41.3001, 69.2405, OFFICE["latitude"], OFFICE["longitude"])
+
+
+@case("validate_location_circle")
+def _circle():
+    from app.services.location_service import check_circle
+    return lambda: check_circle(41.3001, 69.2405, OFFICE)
+
+
+@case("validate_location_area")
+def _area():
+    from app.services.location_service import check_area
+    return lambda: check_area(41.3001, 69.2405, AREA)
+
+
+def synthetic_offices(count: int, seed: int = 4) -> List[dict]:
+    """Toshkent atrofida tarqalgan doira va ko'pburchak ofislar"""
+    rng = random.Random(seed)
+    offices = []
+    for i in range(count):
+        lat = OFFICE["latitude"] + rng.uniform(-0.3, 0.3)
+        lon = OFFICE["longitude"] + rng.uniform(-0.3, 0.3)
+        if i % 2:
+            d = rng.uniform(0.0005, 0.002)
+            polygon = [[lat - d, lon - d], [lat + d, lon - d], [lat + d, lon + d], [lat - d, lon + d]]
+            offices.append({"id": str(i), "name": f"o{i}", "kind": "polygon", "polygon": polygon,
+                            "latitude": None, "longitude": None, "radius": None})
+        else:
+            offices.append({"id": str(i), "name": f"o{i}", "kind": "circle", "polygon": None,
+                            "latitude": lat, "longitude": lon, "radius": rng.uniform(50, 300)})
+    return offices
+
+
+def _office_locate_case(count: int):
+    def setup():
+        from app.services.office_service import OfficeGrid
+        offices = synthetic_offices(count)
+        grid = OfficeGrid(offices)
+        target = offices[count // 2]
+        lat, lon = target["latitude"] or target["polygon"][0][0] + 0.0001, target["longitude"] or target["polygon"][0][1] + 0.0001
+        return lambda: grid.locate(lat, lon)
+    return setup
+
+
+for _n in OFFICE_COUNTS:
+    case(f"office_grid.locate[{_n} offices]")(_office_locate_case(_n))
+
+
+# ============ Daily record ============
+
+def _day_stats_case(count: int):
+    def setup():
+        from app.services.location_service import compute_day_stats
+        timestamps, valid = synthetic_pings(count)
+        return lambda: compute_day_stats(timestamps, valid, 9, 35)
+    return setup
+
+
+def _day_extend_case(count: int):
+    """apply_day_pings: kunda `count` ping bor, bitta yangi ping qo'shiladi (to'liq qayta hisoblashsiz)"""
+    def setup():
+        import copy
+        from datetime import timedelta
+        from app.services.location_service import extend_segments, segment_totals
+        timestamps, valid = synthetic_pings(count)
+        base = extend_segments([], timestamps, valid, 35)
+        new_ts = [timestamps[-1] + timedelta(minutes=5)]
+
+        def run():
+            segments = copy.copy(base)
+            segments[-1] = dict(segments[-1])
+            extend_segments(segments, new_ts, [True], 35)
+            return segment_totals(segments)
+        return run
+    return setup
+
+
+for _n in PINGS_PER_DAY:
+    case(f"update_daily_record.stats[{_n} pings]")(_day_stats_case(_n))
+    case(f"apply_day_pings.extend[{_n} pings]")(_day_extend_case(_n))
+
+
+# ============ Reports ============
+
+def _range_case(days: int):
+    def setup():
+        from app.routers.reports import build_range_report
+        records = synthetic_records(days)
+        return lambda: build_range_report(records[0].date, records[-1].date, records)
+    return setup
+
+
+def _summary_case(count: int):
+    def setup():
+        from app.routers.reports import build_today_summary
+        users, records = synthetic_users(count)
+        return lambda: build_today_summary("2024-03-04", users, records)
+    return setup
+
+
+for _n in RANGE_DAYS:
+    case(f"reports.range[{_n} days]")(_range_case(_n))
+
+for _n in USER_COUNTS:
+    case(f"reports.today_summary[{_n} users]")(_summary_case(_n))
+
+
+# ============ Timesheet ============
+
+def synthetic_month_arrays(users: int, days: int = 22, seed: int = 5) -> dict:
+    """timesheet_service.load_month() natijasi shaklidagi massivlar"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    n = users * days
+    return {
+        "user_ids": np.array([f"u{i}" for i in range(users)], dtype=object),
+        "full_names": np.array([f"User {i}" for i in range(users)], dtype=object),
+        "work_start_hour": np.full(users, 9.0),
+        "work_end_hour": np.full(users, 18.0),
+        "record_user": np.repeat(np.arange(users), days),
+        "record_end_hour": rng.uniform(16.5, 20.0, n),
+        "record_present": rng.uniform(6, 10, n),
+        "record_absent": rng.uniform(0, 1.5, n),
+        "record_late": rng.integers(0, 45, n).astype(float),
+        "record_workday": rng.random(n) < 0.95,
+    }
+
+
+def _timesheet_case(users: int):
+    def setup():
+        from app.services.timesheet_service import compute_timesheet, timesheet_rows
+        data = synthetic_month_arrays(users)
+        return lambda: timesheet_rows(data, compute_timesheet(data, 22, 1.5, 5))
+    return setup
+
+
+for _n in USER_COUNTS:
+    case(f"timesheet.compute[{_n} users]")(_timesheet_case(_n))
+
+
+# ============ Wire format ============
+
+WIRE_BATCH_SIZES = (1, 100, 1000)
+
+
+def synthetic_wire_pings(count: int, seed: int = 6) -> list:
+    """(lat, lon, timestamp, accuracy) - app.wire.WirePing"""
+    rng = random.Random(seed)
+    start = datetime(2024, 3, 4, 4, 0)
+    return [
+        (OFFICE["latitude"] + rng.uniform(-0.01, 0.01), OFFICE["longitude"] + rng.uniform(-0.01, 0.01),
+         start + timedelta(seconds=30 * i, milliseconds=rng.randint(0, 999)), round(rng.uniform(3, 60), 1))
+        for i in range(count)
+    ]
+
+
+def wire_payloads(count: int) -> Dict[str, bytes]:
+    """Bir xil pinglar har bir Content-Type da (JSON - klient yuboradigan ko'rinishda)"""
+    import json
+    from app import wire
+
+    pings = synthetic_wire_pings(count)
+    as_json = {"pings": [
+        {"latitude": lat, "longitude": lon, "timestamp": ts.isoformat() + "Z", "accuracy": acc}
+        for lat, lon, ts, acc in pings
+    ]}
+    return {
+        wire.JSON: json.dumps(as_json).encode(),
+        wire.MSGPACK: wire.encode_msgpack(pings),
+        wire.FRAME: wire.encode_frame(pings),
+    }
+
+
+def _wire_case(media_type: str, count: int):
+    def setup():
+        from app import wire
+        body = wire_payloads(count)[media_type]
+        return lambda: wire.decode(media_type, body)
+    return setup
+
+
+for _n in WIRE_BATCH_SIZES:
+    for _media_type in ("application/json", "application/msgpack", "application/x-pings"):
+        case(f"wire.decode[{_media_type.split('/')[1]}, {_n} pings]")(_wire_case(_media_type, _n))
+
+
+# ============ JWT ============
+
+@case("jwt.create_access_token")
+def _jwt_encode():
+    from app.auth import create_access_token
+    return lambda: create_access_token({"sub": "123456789"})
+
+
+@case("jwt.verify_token")
+def _jwt_decode():
+    from app.auth import create_access_token, verify_token
+    token = create_access_token({"sub": "123456789"})
+    return lambda: verify_token(token)
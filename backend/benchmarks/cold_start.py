@@ -0,0 +1,77 @@
+"""
+Cold start benchmark: uvicorn jarayoni ishga tushgandan birinchi muvaffaqiyatli
+/api/health javobigacha bo'lgan vaqt.
+
+    cd backend
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --modes background,manual --runs 5
+
+Har bir INDEX_SYNC rejimi uchun median/min/max va server o'zi yozgan
+/api/health/startup bosqichlari chiqariladi.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_once(mode: str, port: int, mongodb_url: str, db_name: str, timeout: float) -> dict:
+    env = dict(os.environ, INDEX_SYNC=mode, MONGODB_URL=mongodb_url, DB_NAME=db_name)
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while time.perf_counter() - started < timeout:
+                try:
+                    if client.get("/api/health", timeout=1).status_code == 200:
+                        first_health = time.perf_counter() - started
+                        break
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.01)
+            else:
+                raise RuntimeError(f"Server {timeout}s ichida javob bermadi (INDEX_SYNC={mode})")
+            steps = client.get("/api/health/startup").json()
+    finally:
+        server.terminate()
+        server.wait(timeout=15)
+    return {"first_health_ms": round(first_health * 1000, 1), "server": steps}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--modes", default="startup,background", help="INDEX_SYNC rejimlari (vergul bilan)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=os.getenv("DB_NAME", "hr_tracker"))
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args(argv)
+
+    report = {}
+    for mode in args.modes.split(","):
+        runs = [measure_once(mode, args.port, args.mongodb_url, args.db_name, args.timeout) for _ in range(args.runs)]
+        times = [r["first_health_ms"] for r in runs]
+        report[mode] = {
+            "median_ms": statistics.median(times),
+            "min_ms": min(times),
+            "max_ms": max(times),
+            "last_server_steps": runs[-1]["server"],
+        }
+        print(f"INDEX_SYNC={mode:10s} median={report[mode]['median_ms']:.0f}ms "
+              f"min={report[mode]['min_ms']:.0f}ms max={report[mode]['max_ms']:.0f}ms")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
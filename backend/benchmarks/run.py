@@ -0,0 +1,105 @@
+"""
+Micro-benchmark runner.
+
+    cd backend
+    python -m benchmarks.run                  # baseline bilan solishtirish
+    python -m benchmarks.run --save           # baselines.json ni yangilash
+    python -m benchmarks.run -k reports       # faqat nomida "reports" borlar
+
+Har bir holat uchun timeit.autorange bilan takrorlar soni tanlanadi, so'ng
+--repeat marta o'lchanib eng yaxshi (minimal) natija olinadi. Natija
+baseline'dan --threshold ulushidan ko'p sekin bo'lsa, exit code 1 qaytadi.
+Baseline'lar mashinaga bog'liq - ularni bir xil muhitda yangilang.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+from benchmarks.cases import CASES
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+
+def measure(func, repeat: int) -> float:
+    """Bitta chaqiruvning eng yaxshi vaqti (sekund)"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def format_time(seconds: float) -> str:
+    if seconds < 1e-6:
+        return f"{seconds * 1e9:8.1f} ns"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.2f} us"
+    return f"{seconds * 1e3:8.2f} ms"
+
+
+def load_baselines() -> dict:
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baselines(results: dict) -> None:
+    with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="HR-Tracker V2 micro-benchmarks")
+    parser.add_argument("-k", dest="keyword", default=None, help="Nomida shu so'z bor holatlar")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.25, help="Ruxsat etilgan sekinlashish ulushi")
+    parser.add_argument("--save", action="store_true", help="Natijalarni baseline sifatida saqlash")
+    parser.add_argument("--json", dest="json_output", default=None, help="Natijalarni JSON faylga yozish")
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines()
+    results = {}
+    regressions = []
+
+    for name, setup in CASES.items():
+        if args.keyword and args.keyword not in name:
+            continue
+        seconds = measure(setup(), args.repeat)
+        results[name] = seconds
+
+        baseline = baselines.get(name)
+        if baseline:
+            ratio = seconds / baseline
+            marker = ""
+            if ratio > 1 + args.threshold:
+                marker = "  REGRESSION"
+                regressions.append(name)
+            print(f"{name:45s} {format_time(seconds)}   x{ratio:5.2f}{marker}")
+        else:
+            print(f"{name:45s} {format_time(seconds)}   (baseline yo'q)")
+
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save:
+        merged = {**baselines, **results}
+        save_baselines(merged)
+        print(f"\n✅ Baseline saqlandi: {BASELINE_FILE}")
+        return 0
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} ta regressiya (>{args.threshold:.0%}): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
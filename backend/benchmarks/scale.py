@@ -0,0 +1,413 @@
+"""
+Katta hajmdagi sintetik tashkilot va o'qish endpointlari benchmarki.
+
+    cd backend
+    # 1) Lokal mongod ga ma'lumot yozish (~1M ping)
+    python -m benchmarks.scale generate --db-name hr_tracker_scale_1m --users 2000 --pings 1000000
+    # 2) reports.py, locations.py va users.py dagi o'qish endpointlarini o'lchash
+    #    (natijada qidiruv filtrlari uchun explain() - "search_plans")
+    python -m benchmarks.scale query --db-name hr_tracker_scale_1m --output scale_1m.json
+
+Generator har bir hodimga kechikish va yo'qlik odatini beradi, kunlik
+pinglarni interval + jitter bilan yaratadi va DailyWorkRecord larni
+ilovadagi `compute_day_stats` bilan hisoblaydi. 10M/100M uchun --pings ni
+oshiring va har bir hajm uchun alohida --db-name ishlating.
+
+`query` endpointlarni ilovaning o'zi orqali (ASGI transport) chaqiradi,
+shuning uchun auth, so'rovlar, indekslar va serializatsiya birga o'lchanadi.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import List
+
+import httpx
+
+from loadtest.run import Stats, git_commit
+
+TELEGRAM_ID_BASE = 8_000_000_000
+ADMIN_TELEGRAM_ID = 8_999_999_999
+OFFICE = (41.2995, 69.2401)
+
+# /api/users/search uchun real ism taqsimoti (bir xil prefiksli ismlar ko'p)
+FIRST_NAMES = ["Alisher", "Aziz", "Bobur", "Dilshod", "Dilnoza", "Gulnora", "Jasur", "Kamola", "Laylo",
+               "Madina", "Nodir", "Otabek", "Rustam", "Sardor", "Shahlo", "Sherzod", "Umid", "Zarina"]
+LAST_NAMES = ["Abdullayev", "Aliyev", "Karimov", "Rahimov", "Tursunov", "Xolmatov", "Yusupov",
+              "Ergashev", "Nazarov", "Qodirov", "Sobirov", "To'xtayev", "G'ulomov", "Mirzayev"]
+
+
+async def connect(args):
+    """Ilova konfiguratsiyasini benchmark bazasiga yo'naltirib, Beanie ni ishga tushirish"""
+    from app.config import settings
+    from app.database import init_db
+
+    settings.MONGODB_URL = args.mongodb_url
+    settings.DB_NAME = args.db_name
+    await init_db()
+
+
+# ============ Generate ============
+
+def user_profile(rng: random.Random) -> dict:
+    """Hodim odatlari: ish boshlanishi, kechikish o'rtachasi, yo'qlik ehtimoli"""
+    return {
+        "work_start_hour": rng.choice([8, 9, 9, 9, 10]),
+        "late_mean": rng.choice([2, 5, 5, 10, 25]),
+        "absence_rate": rng.choice([0.01, 0.03, 0.05, 0.15]),
+        "gap_rate": rng.uniform(0.01, 0.05),
+    }
+
+
+def day_pings(rng: random.Random, day: date, profile: dict, interval: int) -> List[datetime]:
+    """Bir kunlik ping vaqtlari"""
+    from app.timezone import local_to_utc
+
+    start = local_to_utc(day, profile["work_start_hour"])
+    arrival = start + timedelta(minutes=rng.expovariate(1 / profile["late_mean"]) - 5)
+    leave = start + timedelta(hours=9, minutes=rng.gauss(0, 20))
+
+    timestamps = []
+    ts = arrival
+    while ts < leave:
+        timestamps.append(ts)
+        gap = interval * rng.uniform(0.8, 1.2)
+        if rng.random() < profile["gap_rate"]:
+            gap += rng.uniform(interval, 4 * interval)
+        ts += timedelta(minutes=gap)
+    return timestamps
+
+
+async def generate(args):
+    from app.models import DailyWorkRecord, LocationLog, User
+    from app.services.location_service import compute_day_stats, geo_point
+    from app.services.user_service import search_fields
+    from app.timezone import local_to_utc, local_today
+
+    await connect(args)
+    rng = random.Random(args.seed)
+
+    users_coll = User.get_motor_collection()
+    logs_coll = LocationLog.get_motor_collection()
+    records_coll = DailyWorkRecord.get_motor_collection()
+
+    if args.drop:
+        await users_coll.delete_many({"telegram_id": {"$gte": TELEGRAM_ID_BASE}})
+        await logs_coll.delete_many({"telegram_id": {"$gte": TELEGRAM_ID_BASE}})
+        await records_coll.delete_many({"telegram_id": {"$gte": TELEGRAM_ID_BASE}})
+
+    # Users
+    profiles = []
+    user_docs = []
+    now = datetime.utcnow()
+    for i in range(args.users):
+        profile = user_profile(rng)
+        profiles.append(profile)
+        full_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        user_docs.append({
+            "telegram_id": TELEGRAM_ID_BASE + i,
+            "username": f"scale_user_{i}",
+            "full_name": full_name,
+            **search_fields(full_name, f"scale_user_{i}", TELEGRAM_ID_BASE + i),
+            "is_approved": rng.random() > args.pending_rate,
+            "is_active": True,
+            "is_admin": False,
+            "work_start_hour": profile["work_start_hour"],
+            "work_end_hour": profile["work_start_hour"] + 9,
+            "created_at": now,
+            "updated_at": None,
+        })
+    result = await users_coll.insert_many(user_docs, ordered=False)
+    user_ids = [str(_id) for _id in result.inserted_ids]
+    print(f"👤 {len(user_ids)} ta hodim yaratildi")
+
+    # Kunlar sonini ping maqsadidan hisoblash (yakshanba - dam olish)
+    pings_per_day = 9 * 60 / args.interval
+    working_days = math.ceil(args.pings / (args.users * pings_per_day * 0.95))
+    if args.days:
+        working_days = args.days
+
+    days = []
+    day = local_today()
+    while len(days) < working_days:
+        if day.weekday() != 6:
+            days.append(day)
+        day -= timedelta(days=1)
+    days.reverse()
+    print(f"📅 {len(days)} ish kuni: {days[0]} .. {days[-1]}")
+
+    max_gap = args.interval + args.grace
+    total_pings = 0
+    started = time.perf_counter()
+    log_batch, record_batch = [], []
+
+    async def flush(force: bool = False):
+        nonlocal log_batch, record_batch
+        if log_batch and (force or len(log_batch) >= args.batch_size):
+            await logs_coll.insert_many(log_batch, ordered=False)
+            log_batch = []
+        if record_batch and (force or len(record_batch) >= args.batch_size):
+            await records_coll.insert_many(record_batch, ordered=False)
+            record_batch = []
+
+    for day in days:
+        date_str = day.isoformat()
+        for idx, user_id in enumerate(user_ids):
+            if not user_docs[idx]["is_approved"]:
+                continue
+            profile = profiles[idx]
+            if rng.random() < profile["absence_rate"]:
+                continue
+
+            timestamps = day_pings(rng, day, profile, args.interval)
+            if not timestamps:
+                continue
+
+            valid_flags = []
+            for ts in timestamps:
+                is_valid = rng.random() < 0.93
+                valid_flags.append(is_valid)
+                spread = 0.0005 if is_valid else 0.01
+                lat = OFFICE[0] + rng.uniform(-spread, spread)
+                lon = OFFICE[1] + rng.uniform(-spread, spread)
+                log_batch.append({
+                    "user_id": user_id,
+                    "telegram_id": TELEGRAM_ID_BASE + idx,
+                    "latitude": lat,
+                    "longitude": lon,
+                    "location": geo_point(lat, lon),
+                    "distance": round(rng.uniform(0, 90) if is_valid else rng.uniform(150, 1200), 2),
+                    "is_valid": is_valid,
+                    "timestamp": ts,
+                    "day": date_str,
+                })
+
+            stats = compute_day_stats(timestamps, valid_flags, profile["work_start_hour"], max_gap,
+                                      work_start=local_to_utc(day, profile["work_start_hour"]))
+            record_batch.append({
+                "user_id": user_id,
+                "telegram_id": TELEGRAM_ID_BASE + idx,
+                "date": date_str,
+                **stats,
+                "created_at": timestamps[0],
+                "updated_at": timestamps[-1],
+            })
+            total_pings += len(timestamps)
+            await flush()
+
+        elapsed = time.perf_counter() - started
+        print(f"  {date_str}: {total_pings:,} ping ({total_pings / max(elapsed, 1e-9):,.0f}/s)")
+        if total_pings >= args.pings and not args.days:
+            break
+
+    await flush(force=True)
+    print(f"✅ {total_pings:,} ping, {time.perf_counter() - started:.1f}s")
+
+
+# ============ Query ============
+
+async def collection_stats(db) -> dict:
+    stats = {}
+    for name in ("users", "location_logs", "daily_work_records"):
+        raw = await db.command("collStats", name)
+        stats[name] = {
+            "count": raw.get("count"),
+            "size_mb": round(raw.get("size", 0) / 1e6, 2),
+            "total_index_mb": round(raw.get("totalIndexSize", 0) / 1e6, 2),
+            "indexes_mb": {k: round(v / 1e6, 2) for k, v in raw.get("indexSizes", {}).items()},
+        }
+    return stats
+
+
+def plan_stages(plan: dict) -> List[dict]:
+    """winningPlan daraxtini yuqoridan pastga tekis ro'yxatga aylantirish"""
+    stages = []
+    while plan:
+        stages.append({"stage": plan.get("stage"), "index": plan.get("indexName")})
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return stages
+
+
+async def search_plans(queries: List[dict], limit: int = 50) -> dict:
+    """/api/users/search filtrlari uchun explain(): indeks, saralash va skan qilingan kalitlar"""
+    from app.models import User
+    from app.services.user_service import search_query
+
+    plans = {}
+    collection = User.get_motor_collection()
+    for params in queries:
+        cursor = collection.find(search_query(params.get("q"), params.get("status", "all"))).sort("_id", 1)
+        raw = await cursor.limit(limit).explain()
+        stages = plan_stages(raw["queryPlanner"]["winningPlan"])
+        execution = raw.get("executionStats", {})
+        names = [s["stage"] for s in stages]
+        plans[json.dumps(params, ensure_ascii=False)] = {
+            "stages": names,
+            "index": next((s["index"] for s in stages if s["index"]), None),
+            "in_memory_sort": "SORT" in names,
+            "collscan": "COLLSCAN" in names,
+            "keys_examined": execution.get("totalKeysExamined"),
+            "docs_examined": execution.get("totalDocsExamined"),
+            "returned": execution.get("nReturned"),
+        }
+    return plans
+
+
+async def query(args):
+    from app import database
+    from app.auth import create_access_token
+    from app.main import app
+    from app.models import DailyWorkRecord, User
+
+    await connect(args)
+    rng = random.Random(args.seed)
+
+    admin = await User.find_one(User.telegram_id == ADMIN_TELEGRAM_ID)
+    if not admin:
+        admin = User(telegram_id=ADMIN_TELEGRAM_ID, full_name="Scale Admin", is_admin=True, is_approved=True)
+        await admin.insert()
+
+    users = await User.find(
+        User.telegram_id >= TELEGRAM_ID_BASE,
+        User.is_approved == True,
+        User.is_admin == False
+    ).limit(args.samples * 20).to_list()
+    if not users:
+        raise SystemExit("❌ Avval `generate` ni ishga tushiring")
+    sample = rng.sample(users, min(args.samples, len(users)))
+
+    latest = await DailyWorkRecord.find_all().sort(-DailyWorkRecord.date).limit(1).to_list()
+    last_day = datetime.strptime(latest[0].date, "%Y-%m-%d").date() if latest else date.today()
+
+    def auth(user):
+        return {"Authorization": f"Bearer {create_access_token({'sub': str(user.telegram_id)})}"}
+
+    admin_headers = auth(admin)
+    month_start = last_day.replace(day=1)
+    year_start = last_day - timedelta(days=365)
+
+    # (nom, metod, url, params, headers) - har bir namunaviy hodim uchun
+    def requests_for(user) -> list:
+        uid = str(user.id)
+        h = auth(user)
+        return [
+            ("GET /api/reports/daily", "/api/reports/daily", {"date_str": last_day.isoformat()}, h),
+            ("GET /api/reports/range (30d)", "/api/reports/range",
+             {"start_date": (last_day - timedelta(days=30)).isoformat(), "end_date": last_day.isoformat()}, h),
+            ("GET /api/reports/monthly", "/api/reports/monthly",
+             {"year": month_start.year, "month": month_start.month}, h),
+            ("GET /api/reports/admin/user/{id}/daily", f"/api/reports/admin/user/{uid}/daily",
+             {"date_str": last_day.isoformat()}, admin_headers),
+            ("GET /api/reports/admin/user/{id}/range (365d)", f"/api/reports/admin/user/{uid}/range",
+             {"start_date": year_start.isoformat(), "end_date": last_day.isoformat()}, admin_headers),
+            ("GET /api/locations/today", "/api/locations/today", None, h),
+            ("GET /api/locations/status", "/api/locations/status", None, h),
+            ("GET /api/locations/history/{date}", f"/api/locations/history/{last_day.isoformat()}", None, h),
+            ("GET /api/users/{id}", f"/api/users/{uid}", None, admin_headers),
+        ]
+
+    org_requests = [
+        ("GET /api/reports/admin/today-summary", "/api/reports/admin/today-summary", None, admin_headers),
+        ("GET /api/users/pending", "/api/users/pending", None, admin_headers),
+        ("GET /api/users/approved", "/api/users/approved", None, admin_headers),
+        ("GET /api/users/all", "/api/users/all", None, admin_headers),
+        ("GET /api/users/search (q=ali)", "/api/users/search", {"q": "ali"}, admin_headers),
+        ("GET /api/users/search (q=karimov dil)", "/api/users/search", {"q": "karimov dil"}, admin_headers),
+        ("GET /api/users/search (status=pending)", "/api/users/search", {"status": "pending"}, admin_headers),
+        ("GET /api/users/search (telegram_id)", "/api/users/search",
+         {"q": str(TELEGRAM_ID_BASE + 1234)}, admin_headers),
+        ("GET /api/locations/admin/near (100m)", "/api/locations/admin/near",
+         {"lat": OFFICE[0], "lon": OFFICE[1], "radius": 100, "date_str": last_day.isoformat()}, admin_headers),
+    ]
+
+    stats = Stats()
+    sizes = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://scale") as client:
+        async def hit(name, url, params, headers):
+            started = time.perf_counter()
+            response = await client.get(url, params=params, headers=headers)
+            stats.record(name, time.perf_counter() - started, response.status_code)
+            sizes[name] = max(sizes.get(name, 0), len(response.content))
+
+        # Warm-up: birinchi so'rovlar ulanish va kesh xarajatini o'lchovga qo'shmasin
+        for name, url, params, headers in requests_for(sample[0]) + org_requests:
+            await client.get(url, params=params, headers=headers)
+
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            for user in sample:
+                for item in requests_for(user):
+                    await hit(*item)
+            for item in org_requests:
+                await hit(*item)
+        elapsed = time.perf_counter() - started
+
+    summary = stats.summary(elapsed)
+    for name, endpoint in summary["endpoints"].items():
+        endpoint["max_response_bytes"] = sizes.get(name, 0)
+
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "db_name": args.db_name,
+            "samples": len(sample),
+            "rounds": args.rounds,
+            "last_day": last_day.isoformat(),
+        },
+        "collections": await collection_stats(database.client[args.db_name]),
+        "query": summary,
+        "search_plans": await search_plans([
+            {"q": "ali"}, {"q": "karimov dil"}, {"status": "pending"}, {"q": str(TELEGRAM_ID_BASE + 1234)},
+        ]),
+    }
+    for params, plan in result["search_plans"].items():
+        if plan["in_memory_sort"] or plan["collscan"]:
+            print(f"⚠️ Qidiruv {params}: {' <- '.join(plan['stages'])}")
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"✅ Natija: {args.output}")
+    else:
+        print(output)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HR-Tracker V2 scale benchmark")
+    parser.add_argument("--mongodb-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="hr_tracker_scale")
+    parser.add_argument("--seed", type=int, default=7)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="Sintetik tashkilotni yaratish")
+    gen.add_argument("--users", type=int, default=2000)
+    gen.add_argument("--pings", type=int, default=1_000_000, help="Taxminiy umumiy ping soni")
+    gen.add_argument("--days", type=int, default=None, help="Ish kunlari soni (--pings o'rniga)")
+    gen.add_argument("--interval", type=int, default=30, help="Ping intervali (daqiqa)")
+    gen.add_argument("--grace", type=int, default=5, help="Grace period (daqiqa)")
+    gen.add_argument("--pending-rate", type=float, default=0.03, help="Tasdiqlanmagan hodimlar ulushi")
+    gen.add_argument("--batch-size", type=int, default=10_000)
+    gen.add_argument("--drop", action="store_true", help="Oldingi sintetik ma'lumotlarni o'chirish")
+
+    q = sub.add_parser("query", help="O'qish endpointlarini o'lchash")
+    q.add_argument("--samples", type=int, default=20, help="Namunaviy hodimlar soni")
+    q.add_argument("--rounds", type=int, default=3)
+    q.add_argument("--output", default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "generate":
+        asyncio.run(generate(args))
+    else:
+        asyncio.run(query(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Ping so'rov formatlarini solishtirish: tana hajmi va dekodlash vaqti.
+
+    cd backend
+    python -m benchmarks.wire
+    python -m benchmarks.wire --sizes 1,100,1000 --repeat 5
+
+Har bir format uchun bir xil pinglar (app.wire) ishlatiladi; JSON -
+Pydantic validatsiyasi bilan (endpoint'dagi kabi).
+"""
+import argparse
+import sys
+
+from benchmarks.cases import WIRE_BATCH_SIZES, wire_payloads
+from benchmarks.run import format_time, measure
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Ping wire format: JSON vs MessagePack vs x-pings")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in WIRE_BATCH_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from app import wire
+
+    print(f"{'pings':>6} {'format':22s} {'bytes':>9} {'bytes/ping':>11} {'decode':>11} {'per ping':>11} {'vs json':>8}")
+    for count in (int(x) for x in args.sizes.split(",")):
+        payloads = wire_payloads(count)
+        json_seconds = None
+        for media_type, body in payloads.items():
+            seconds = measure(lambda: wire.decode(media_type, body), args.repeat)
+            json_seconds = json_seconds or seconds
+            print(
+                f"{count:6d} {media_type:22s} {len(body):9d} {len(body) / count:11.1f} "
+                f"{format_time(seconds)} {format_time(seconds / count)} x{json_seconds / seconds:6.2f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
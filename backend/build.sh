@@ -14,4 +14,7 @@ cd ../backend
 rm -rf static
 cp -r ../frontend/dist static
 
+echo "Precompressing static assets (.br/.gz)..."
+python -m app.manage precompress-static --dir static
+
 echo "Build complete!"
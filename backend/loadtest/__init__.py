@@ -0,0 +1 @@
+# Load test harness (python -m loadtest.run)
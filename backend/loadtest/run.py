@@ -0,0 +1,383 @@
+"""
+HR-Tracker V2 - Load test
+
+Lokal `mongod` ga ulangan FastAPI ilovasini ishga tushiradi va hodimlar
+oqimini simulyatsiya qiladi:
+  - N ta hodim /api/auth/telegram orqali kiradi va admin tomonidan tasdiqlanadi
+  - har bir hodim 9:00 atrofida "keladi" (normal taqsimot) va sozlangan
+    interval bo'yicha jitter bilan /api/locations/send chaqiradi
+  - adminlar /api/reports/admin/today-summary va range hisobotlarini ochadi
+
+Simulyatsiya vaqti --time-scale marta tezlashtirilgan (60 = 1 real sekund
+1 simulyatsiya daqiqasiga teng). Natija har bir endpoint uchun throughput va
+p50/p95/p99 latency bilan JSON ko'rinishida chiqariladi.
+
+Misol:
+    cd backend
+    python -m loadtest.run --employees 500 --duration 120 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EMPLOYEE_ID_BASE = 7_000_000_000
+ADMIN_ID_BASE = 7_900_000_000
+DEFAULT_OFFICE = (41.2995, 69.2401)
+
+
+class Stats:
+    """Endpoint bo'yicha latency va xatolarni yig'ish"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint: str, seconds: float, status_code: int) -> None:
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status_code] += 1
+        if status_code >= 400:
+            self.errors[endpoint] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[endpoint] = {
+                "count": len(values),
+                "errors": self.errors[endpoint],
+                "status_codes": {str(k): v for k, v in sorted(self.statuses[endpoint].items())},
+                "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0,
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+        total = sum(e["count"] for e in endpoints.values())
+        return {
+            "elapsed_seconds": round(elapsed, 2),
+            "total_requests": total,
+            "total_errors": sum(e["errors"] for e in endpoints.values()),
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0,
+            "endpoints": endpoints,
+        }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (ro'yxat saralangan bo'lishi kerak)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def timed(stats: Stats, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs):
+    """So'rovni yuborish va latency ni yozib qo'yish"""
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        stats.record(endpoint, time.perf_counter() - started, 599)
+        return None
+    stats.record(endpoint, time.perf_counter() - started, response.status_code)
+    return response
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def reset_database(mongodb_url: str, db_name: str) -> None:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(mongodb_url)
+    try:
+        await client.drop_database(db_name)
+    finally:
+        client.close()
+
+
+def start_server(args, admin_ids: List[int]) -> subprocess.Popen:
+    """uvicorn ni alohida jarayonda ishga tushirish"""
+    env = dict(os.environ)
+    env.update({
+        "MONGODB_URL": args.mongodb_url,
+        "DB_NAME": args.db_name,
+        "ADMIN_IDS": ",".join(str(i) for i in admin_ids),
+        "SECRET_KEY": env.get("SECRET_KEY", "loadtest-secret-key"),
+    })
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(args.port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+
+async def wait_healthy(base_url: str, timeout: float = 60) -> float:
+    """/api/health javob berguncha kutish, kutilgan vaqtni qaytaradi"""
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() - started < timeout:
+            try:
+                response = await client.get("/api/health", timeout=2)
+                if response.status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server {timeout}s ichida ishga tushmadi: {base_url}")
+
+
+async def authenticate(stats: Stats, client: httpx.AsyncClient, telegram_id: int, name: str) -> dict:
+    response = await timed(
+        stats, client, "POST /api/auth/telegram", "POST", "/api/auth/telegram",
+        json={"telegram_id": telegram_id, "username": name, "full_name": name.replace("_", " ").title()},
+    )
+    if response is None or response.status_code != 200:
+        raise RuntimeError(f"Autentifikatsiya xatosi: {telegram_id}")
+    return response.json()
+
+
+async def setup_users(args, stats: Stats, client: httpx.AsyncClient, admin_ids: List[int]):
+    """Adminlar va hodimlarni ro'yxatdan o'tkazish, hodimlarni tasdiqlash"""
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def auth(telegram_id: int, name: str):
+        async with semaphore:
+            return await authenticate(stats, client, telegram_id, name)
+
+    admins = await asyncio.gather(*[auth(tid, f"admin_{i}") for i, tid in enumerate(admin_ids)])
+    employees = await asyncio.gather(*[
+        auth(EMPLOYEE_ID_BASE + i, f"employee_{i}") for i in range(args.employees)
+    ])
+
+    admin_headers = {"Authorization": f"Bearer {admins[0]['access_token']}"}
+
+    async def approve(employee: dict):
+        if employee["user"]["is_approved"]:
+            return
+        async with semaphore:
+            # 0-24: send_location ish vaqti tekshiruvi real soatga bog'liq bo'lmasin
+            await timed(
+                stats, client, "POST /api/users/{id}/approve", "POST",
+                f"/api/users/{employee['user']['id']}/approve",
+                json={"work_start_hour": 0, "work_end_hour": 24}, headers=admin_headers,
+            )
+
+    await asyncio.gather(*[approve(e) for e in employees])
+    return admins, employees
+
+
+async def employee_loop(args, stats, client, employee: dict, office, interval_minutes: float, clock, stop: asyncio.Event):
+    """Bitta hodim: 9:00 atrofida kelish, keyin interval + jitter bilan ping"""
+    headers = {"Authorization": f"Bearer {employee['access_token']}"}
+    rng = random.Random(employee["user"]["telegram_id"] + args.seed)
+
+    arrival = clock.sim_start_minute + 30 + rng.gauss(0, args.arrival_spread)
+    await clock.sleep_until(max(arrival, clock.sim_start_minute), stop)
+
+    while not stop.is_set():
+        lat = office[0] + rng.uniform(-0.0003, 0.0003)
+        lng = office[1] + rng.uniform(-0.0003, 0.0003)
+        await timed(
+            stats, client, "POST /api/locations/send", "POST", "/api/locations/send",
+            json={"latitude": lat, "longitude": lng}, headers=headers,
+        )
+        if rng.random() < args.status_ratio:
+            await timed(stats, client, "GET /api/locations/status", "GET", "/api/locations/status", headers=headers)
+
+        jitter = rng.uniform(-args.jitter, args.jitter)
+        await clock.sleep_sim(interval_minutes * (1 + jitter), stop)
+
+
+async def admin_loop(args, stats, client, admin: dict, employees: List[dict], stop: asyncio.Event):
+    """Admin: bugungi xulosa va tasodifiy hodimning range hisoboti"""
+    headers = {"Authorization": f"Bearer {admin['access_token']}"}
+    rng = random.Random(admin["user"]["telegram_id"] + args.seed)
+    end = date.today()
+    start = end - timedelta(days=args.range_days)
+
+    while not stop.is_set():
+        if rng.random() < 0.5:
+            await timed(
+                stats, client, "GET /api/reports/admin/today-summary", "GET",
+                "/api/reports/admin/today-summary", headers=headers,
+            )
+        else:
+            employee = rng.choice(employees)
+            await timed(
+                stats, client, "GET /api/reports/admin/user/{id}/range", "GET",
+                f"/api/reports/admin/user/{employee['user']['id']}/range",
+                params={"start_date": start.isoformat(), "end_date": end.isoformat()},
+                headers=headers,
+            )
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=rng.uniform(0.5, 1.5) * args.admin_period)
+        except asyncio.TimeoutError:
+            pass
+
+
+class SimClock:
+    """Real vaqtni tezlashtirilgan ish kuni vaqtiga (daqiqalarda) aylantirish"""
+
+    def __init__(self, time_scale: float, sim_start_minute: float):
+        self.time_scale = time_scale
+        self.sim_start_minute = sim_start_minute
+        self.real_start = time.perf_counter()
+
+    def now(self) -> float:
+        return self.sim_start_minute + (time.perf_counter() - self.real_start) * self.time_scale / 60
+
+    async def sleep_sim(self, minutes: float, stop: asyncio.Event) -> None:
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=max(0.0, minutes * 60 / self.time_scale))
+        except asyncio.TimeoutError:
+            pass
+
+    async def sleep_until(self, minute: float, stop: asyncio.Event) -> None:
+        await self.sleep_sim(minute - self.now(), stop)
+
+
+async def run(args) -> dict:
+    admin_ids = [ADMIN_ID_BASE + i for i in range(max(1, args.admins))]
+    server = None
+    base_url = args.base_url
+    startup_seconds = None
+
+    if base_url is None:
+        if not args.keep_db:
+            await reset_database(args.mongodb_url, args.db_name)
+        server = start_server(args, admin_ids)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        startup_seconds = await wait_healthy(base_url)
+
+        setup_stats = Stats()
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+            setup_started = time.perf_counter()
+            admins, employees = await setup_users(args, setup_stats, client, admin_ids)
+            setup_elapsed = time.perf_counter() - setup_started
+
+            office_response = await client.get(
+                "/api/settings/office", headers={"Authorization": f"Bearer {admins[0]['access_token']}"}
+            )
+            office_settings = office_response.json() if office_response.status_code == 200 else {}
+            office_location = office_settings.get("office_location") or {}
+            office = (
+                office_location.get("latitude", DEFAULT_OFFICE[0]),
+                office_location.get("longitude", DEFAULT_OFFICE[1]),
+            )
+            interval = args.interval or office_settings.get("location_interval_minutes", 30)
+
+            stats = Stats()
+            stop = asyncio.Event()
+            clock = SimClock(args.time_scale, sim_start_minute=8 * 60 + 30)
+            tasks = [
+                asyncio.create_task(employee_loop(args, stats, client, e, office, interval, clock, stop))
+                for e in employees
+            ]
+            tasks += [
+                asyncio.create_task(admin_loop(args, stats, client, a, employees, stop))
+                for a in admins
+            ]
+
+            started = time.perf_counter()
+            await asyncio.sleep(args.duration)
+            stop.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            elapsed = time.perf_counter() - started
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGINT)
+            try:
+                server.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.utcnow().isoformat() + "Z",
+            "base_url": base_url,
+            "startup_seconds": round(startup_seconds, 3) if startup_seconds is not None else None,
+            "params": {
+                "employees": args.employees,
+                "admins": len(admin_ids),
+                "duration": args.duration,
+                "time_scale": args.time_scale,
+                "interval_minutes": interval,
+                "jitter": args.jitter,
+                "arrival_spread_minutes": args.arrival_spread,
+                "workers": args.workers,
+                "concurrency": args.concurrency,
+                "seed": args.seed,
+            },
+        },
+        "setup": setup_stats.summary(setup_elapsed),
+        "load": stats.summary(elapsed),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HR-Tracker V2 load test")
+    parser.add_argument("--employees", type=int, default=200, help="Hodimlar soni")
+    parser.add_argument("--admins", type=int, default=2, help="Adminlar soni")
+    parser.add_argument("--duration", type=float, default=60, help="Yuklama davomiyligi (real sekund)")
+    parser.add_argument("--time-scale", type=float, default=60, help="Simulyatsiya tezligi (60 = 1s -> 1 daqiqa)")
+    parser.add_argument("--interval", type=float, default=None, help="Ping intervali (daqiqa), default: server sozlamasi")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Interval jitter ulushi (0.2 = +-20%%)")
+    parser.add_argument("--arrival-spread", type=float, default=10, help="9:00 dagi kelish sigma (daqiqa)")
+    parser.add_argument("--status-ratio", type=float, default=0.3, help="Pingdan keyin /locations/status ehtimoli")
+    parser.add_argument("--admin-period", type=float, default=2, help="Admin so'rovlari orasidagi o'rtacha pauza (s)")
+    parser.add_argument("--range-days", type=int, default=30, help="Admin range hisoboti uzunligi (kun)")
+    parser.add_argument("--concurrency", type=int, default=100, help="Maksimal ochiq ulanishlar")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-url", default=None, help="Ishlab turgan serverga ulanish (ishga tushirmasdan)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker soni")
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default="hr_tracker_loadtest")
+    parser.add_argument("--keep-db", action="store_true", help="Test bazasini tozalamaslik")
+    parser.add_argument("--output", default=None, help="JSON natija fayli (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = asyncio.run(run(args))
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        load = result["load"]
+        print(f"✅ {load['total_requests']} so'rov, {load['throughput_rps']} rps -> {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,18 @@ Bu bot alohida ishga tushiriladi va API ga ulanadi
 """
 import logging
 import httpx
-from datetime import timedelta
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 from telegram import Update
-from telegram.ext import Application, CommandHandler, ContextTypes
+from telegram.ext import (
+    AIORateLimiter, Application, CommandHandler, ContextTypes, MessageHandler, PicklePersistence, filters
+)
 import os
 from dotenv import load_dotenv
 
+import broadcast
+from live_location import LiveLocationIngestor
+
 load_dotenv()
 
 # Config
@@ -17,6 +23,20 @@ BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 ADMIN_IDS = [int(x.strip()) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip()]
 API_URL = os.getenv("API_URL", "http://localhost:8000")  # Backend API URL
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")  # Frontend URL
+BOT_API_TOKEN = os.getenv("BOT_API_TOKEN", "")  # backend dagi BOT_API_TOKEN bilan bir xil
+TIMEZONE = ZoneInfo(os.getenv("TIMEZONE", "Asia/Tashkent"))
+BOT_STATE_FILE = os.getenv("BOT_STATE_FILE", "bot_state.pickle")
+
+# Broadcast: parallel yuborish, umumiy tezlik - Telegram limiti (~30 xabar/s)
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "20"))
+BROADCAST_RATE = int(os.getenv("BROADCAST_RATE", "30"))
+
+# Live location pinglari shu oraliqda partiya bo'lib API ga yuboriladi
+LIVE_FLUSH_SECONDS = int(os.getenv("LIVE_FLUSH_SECONDS", "5"))
+
+# Ish boshlanishida (work_start_hour) "lokatsiya yuboring" eslatmasi
+REMINDERS_ENABLED = os.getenv("REMINDERS_ENABLED", "false").lower() == "true"
+REMINDER_WORKDAYS = [int(x) for x in os.getenv("REMINDER_WORKDAYS", "0,1,2,3,4").split(",") if x.strip()]
 
 # Logging
 logging.basicConfig(
@@ -26,6 +46,9 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+live_ingestor = LiveLocationIngestor(API_URL, BOT_API_TOKEN)
+
+
 def is_admin(user_id: int) -> bool:
     return user_id in ADMIN_IDS
 
@@ -113,11 +136,208 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Help komandasi"""
-    await update.message.reply_text(
+    text = (
         "📖 HR-Tracker V2\n\n"
         "/start - Saytga kirish\n"
-        "/help - Yordam"
+        "/help - Yordam\n\n"
+        "📍 Joriy lokatsiya yoki live location yuborsangiz, u ping sifatida yoziladi "
+        "(forward qilingan va xaritadan tanlangan nuqtalar qabul qilinmaydi)"
     )
+    if is_admin(update.effective_user.id):
+        text += (
+            "\n\n👑 Admin:\n"
+            "/broadcast <matn> - Barcha hodimlarga xabar (yoki xabarga javob sifatida)\n"
+            "/broadcast_status - Oxirgi xabar yuborish natijasi"
+        )
+    await update.message.reply_text(text)
+
+
+# ============ Lokatsiya ============
+
+LOCATION_STATUS_TEXT = {
+    "throttled": "⏳ Lokatsiya yaqinda qabul qilingan, keyingi intervalda yuboring.",
+    "unknown_user": "❌ Siz ro'yxatdan o'tmagansiz. /start ni bosing.",
+    "not_approved": "⏳ Hisobingiz hali tasdiqlanmagan.",
+    "outside_hours": "🕐 Hozir ish vaqti emas.",
+    "stale": "❌ Lokatsiya eskirgan.",
+    "rejected": "❌ Lokatsiya rad etildi: GPS ma'lumoti ishonchsiz.",
+}
+
+CURRENT_LOCATION_REQUIRED = (
+    "📍 Xaritadan tanlangan nuqta qabul qilinmaydi. "
+    "\"Joriy joylashuvni yuborish\" yoki live location dan foydalaning."
+)
+
+
+async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Lokatsiya (bir martalik) va live location yangilanishlari. Forward qilingan
+    xabarlar filterda chiqarib tashlangan (`message.date` - forward vaqti);
+    bir martalik pingda GPS aniqligi bo'lmasa - xaritadan tanlangan nuqta.
+    """
+    message = update.effective_message
+    location = message.location
+    tg_user = update.effective_user
+    at = message.edit_date or message.date
+    if message.forward_date is not None:
+        return
+    
+    # Live location: birinchi xabarda live_period bor, keyingi yangilanishlar - edited_message
+    if location.live_period or update.edited_message is not None:
+        live_ingestor.offer(tg_user.id, location.latitude, location.longitude, at, location.horizontal_accuracy)
+        return
+    
+    if location.horizontal_accuracy is None:
+        await message.reply_text(CURRENT_LOCATION_REQUIRED)
+        return
+    
+    result = await live_ingestor.send_now(
+        tg_user.id, location.latitude, location.longitude, at, location.horizontal_accuracy
+    )
+    if result is None:
+        await message.reply_text("❌ Serverga ulanishda xatolik. Keyinroq qayta urinib ko'ring.")
+    elif result["status"] == "ok":
+        if result["is_valid"]:
+            await message.reply_text("✅ Lokatsiya qabul qilindi! Siz ofis hududidasiz.")
+        else:
+            await message.reply_text(
+                f"⚠️ Lokatsiya qabul qilindi, lekin siz ofis hududida emassiz. Masofa: {result['distance'] or 0:.0f}m"
+            )
+    else:
+        await message.reply_text(LOCATION_STATUS_TEXT.get(result["status"], "❌ Lokatsiya qabul qilinmadi."))
+
+
+async def flush_locations(context: ContextTypes.DEFAULT_TYPE):
+    await live_ingestor.flush()
+
+
+async def on_shutdown(application: Application):
+    # Buferda qolgan live pinglar yo'qolmasin
+    await live_ingestor.flush()
+    logger.info(
+        f"Live location: {live_ingestor.received} qabul, {live_ingestor.throttled} throttled, "
+        f"{live_ingestor.sent} yozildi"
+    )
+
+
+# ============ Broadcast ============
+
+def make_sender(bot, state: dict):
+    """Broadcast holatidan bitta chatga yuboruvchi funksiya"""
+    if state.get("message_id"):
+        # Javob berilgan xabar (rasm, fayl va h.k.) nusxalanadi
+        return lambda chat_id: bot.copy_message(chat_id, state["from_chat_id"], state["message_id"])
+    return lambda chat_id: bot.send_message(chat_id, state["text"])
+
+
+async def run_broadcast(application: Application, state: dict):
+    """Yuborish; progress admin xabarida yangilanadi va persistence ga yoziladi"""
+    bot = application.bot
+    
+    async def on_progress(current: dict):
+        broadcast.remember(application.bot_data, current)
+        await application.update_persistence()
+        if current.get("admin_chat_id") and current.get("progress_message_id"):
+            try:
+                await bot.edit_message_text(
+                    broadcast.format_stats(current),
+                    chat_id=current["admin_chat_id"],
+                    message_id=current["progress_message_id"]
+                )
+            except Exception as e:
+                logger.debug(f"Progress xabari yangilanmadi: {e}")
+    
+    try:
+        await broadcast.deliver(state, make_sender(bot, state), on_progress, BROADCAST_CONCURRENCY)
+    except Exception as e:
+        logger.error(f"Broadcast {state['id']} xatosi: {e}")
+
+
+async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin: barcha tasdiqlangan hodimlarga xabar"""
+    if not is_admin(update.effective_user.id):
+        return
+    
+    reply = update.message.reply_to_message
+    text = " ".join(context.args).strip()
+    if not text and not reply:
+        await update.message.reply_text(
+            "Foydalanish: /broadcast <matn>\n"
+            "yoki yuboriladigan xabarga javob sifatida /broadcast"
+        )
+        return
+    
+    try:
+        chat_ids = await broadcast.fetch_recipients(API_URL, BOT_API_TOKEN)
+    except Exception as e:
+        logger.error(f"Recipients API xatosi: {e}")
+        await update.message.reply_text("❌ Hodimlar ro'yxatini olishda xatolik (BOT_API_TOKEN ni tekshiring)")
+        return
+    
+    if not chat_ids:
+        await update.message.reply_text("Tasdiqlangan hodimlar yo'q")
+        return
+    
+    state = broadcast.new_state(
+        "broadcast", chat_ids,
+        text=None if reply else text,
+        from_chat_id=update.effective_chat.id if reply else None,
+        message_id=reply.message_id if reply else None,
+        admin_chat_id=update.effective_chat.id,
+    )
+    progress = await update.message.reply_text(broadcast.format_stats(state))
+    state["progress_message_id"] = progress.message_id
+    broadcast.remember(context.bot_data, state)
+    
+    context.application.create_task(run_broadcast(context.application, state))
+
+
+async def broadcast_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin: oxirgi broadcast natijasi"""
+    if not is_admin(update.effective_user.id):
+        return
+    
+    items = [s for s in context.bot_data.get("broadcasts", {}).values() if s["kind"] == "broadcast"]
+    if not items:
+        await update.message.reply_text("Hali xabar yuborilmagan")
+        return
+    last = items[-1]
+    await update.message.reply_text(f"🆔 {last['id']} ({last['started_at']})\n" + broadcast.format_stats(last))
+
+
+async def send_reminders(context: ContextTypes.DEFAULT_TYPE):
+    """Har soat boshida: shu soatda ishi boshlanadigan hodimlarga eslatma"""
+    now = datetime.now(TIMEZONE)
+    if now.weekday() not in REMINDER_WORKDAYS:
+        return
+    
+    try:
+        chat_ids = await broadcast.fetch_recipients(API_URL, BOT_API_TOKEN, work_start_hour=now.hour)
+    except Exception as e:
+        logger.error(f"Recipients API xatosi: {e}")
+        return
+    if not chat_ids:
+        return
+    
+    state = broadcast.new_state(
+        "reminder", chat_ids,
+        text=f"📍 Ish vaqti boshlandi ({now.hour}:00).\nIltimos, lokatsiyangizni yuboring: {FRONTEND_URL}"
+    )
+    broadcast.remember(context.bot_data, state)
+    await run_broadcast(context.application, state)
+
+
+async def resume_broadcasts(context: ContextTypes.DEFAULT_TYPE):
+    """Bot qayta ishga tushganda tugallanmagan broadcastlarni davom ettirish"""
+    for state in broadcast.unfinished(context.bot_data):
+        logger.info(f"Broadcast {state['id']} davom ettirilmoqda: {len(state['pending'])} ta qoldi")
+        context.application.create_task(run_broadcast(context.application, state))
+
+
+def seconds_until_next_hour() -> float:
+    now = datetime.now(TIMEZONE)
+    next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+    return (next_hour - now).total_seconds()
 
 
 def main():
@@ -131,10 +351,26 @@ def main():
     print(f"🌐 API URL: {API_URL}")
     print(f"🌐 Frontend URL: {FRONTEND_URL}")
     
-    application = Application.builder().token(BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .rate_limiter(AIORateLimiter(overall_max_rate=BROADCAST_RATE, max_retries=3))
+        .persistence(PicklePersistence(filepath=BOT_STATE_FILE))
+        .post_shutdown(on_shutdown)
+        .build()
+    )
     
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("broadcast", broadcast_command))
+    application.add_handler(CommandHandler("broadcast_status", broadcast_status))
+    application.add_handler(MessageHandler(filters.LOCATION & ~filters.FORWARDED & ~filters.VENUE, handle_location))
+    
+    application.job_queue.run_repeating(flush_locations, interval=LIVE_FLUSH_SECONDS, first=LIVE_FLUSH_SECONDS)
+    application.job_queue.run_once(resume_broadcasts, when=1)
+    if REMINDERS_ENABLED:
+        application.job_queue.run_repeating(send_reminders, interval=3600, first=seconds_until_next_hour())
+        print(f"⏰ Eslatmalar: ish boshlanishida (kunlar: {REMINDER_WORKDAYS})")
     
     print("✅ Bot ishga tushdi!")
     application.run_polling(allowed_updates=Update.ALL_TYPES)
@@ -0,0 +1,150 @@
+"""
+Ommaviy xabar (broadcast) va ish boshlanishi eslatmalarini yuborish.
+
+Xabarlar BROADCAST_CONCURRENCY ta parallel vazifa bilan yuboriladi, tezlikni
+esa botning AIORateLimiter'i cheklaydi (umumiy ~30 xabar/s, guruhlarga
+20/min). 429 kelsa limiter barcha so'rovlarni `retry_after` ga to'xtatib
+qayta yuboradi; shunda ham o'tmasa - shu yerda yana kutiladi.
+
+Holat `bot_data["broadcasts"]` da (PicklePersistence) - bot qayta ishga
+tushsa tugallanmagan broadcast qolgan hodimlar uchun davom ettiriladi.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_SECONDS = 5
+MAX_ATTEMPTS = 3
+KEEP_BROADCASTS = 20
+
+# chat_id -> yuborish (telegram.error istisnolarini ko'taradi)
+SendOne = Callable[[int], Awaitable[object]]
+# holat o'zgarganda chaqiriladi (saqlash va admin uchun progress)
+OnProgress = Callable[[dict], Awaitable[None]]
+
+
+async def fetch_recipients(api_url: str, bot_api_token: str, work_start_hour: Optional[int] = None) -> List[int]:
+    """API dan tasdiqlangan hodimlarning telegram_id lari (sahifalab)"""
+    chat_ids = []
+    params = {"limit": 1000}
+    if work_start_hour is not None:
+        params["work_start_hour"] = work_start_hour
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        while True:
+            response = await client.get(
+                f"{api_url}/api/bot/recipients",
+                params=params,
+                headers={"X-Bot-Token": bot_api_token}
+            )
+            response.raise_for_status()
+            page = response.json()
+            chat_ids.extend(item["telegram_id"] for item in page["items"])
+            if not page.get("next"):
+                return chat_ids
+            params["after"] = page["next"]
+
+
+def new_state(kind: str, chat_ids: List[int], **fields) -> dict:
+    return {
+        "id": uuid.uuid4().hex[:8],
+        "kind": kind,  # broadcast | reminder
+        "pending": list(dict.fromkeys(chat_ids)),
+        "total": len(set(chat_ids)),
+        "sent": 0,
+        "failed": 0,
+        "blocked": 0,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "finished_at": None,
+        **fields,
+    }
+
+
+def remember(bot_data: dict, state: dict) -> None:
+    """Holatni bot_data ga yozish (oxirgi KEEP_BROADCASTS tasi saqlanadi)"""
+    broadcasts: Dict[str, dict] = bot_data.setdefault("broadcasts", {})
+    broadcasts[state["id"]] = state
+    for old_id in list(broadcasts)[:-KEEP_BROADCASTS]:
+        if broadcasts[old_id]["finished_at"]:
+            del broadcasts[old_id]
+
+
+def unfinished(bot_data: dict) -> List[dict]:
+    return [s for s in bot_data.get("broadcasts", {}).values() if not s["finished_at"] and s["pending"]]
+
+
+def format_stats(state: dict) -> str:
+    done = state["sent"] + state["failed"] + state["blocked"]
+    status = "✅ Yakunlandi" if state["finished_at"] else "⏳ Yuborilmoqda"
+    return (
+        f"{status} ({done}/{state['total']})\n"
+        f"📨 Yetkazildi: {state['sent']}\n"
+        f"🚫 Botni bloklagan: {state['blocked']}\n"
+        f"❌ Xatolik: {state['failed']}"
+    )
+
+
+async def send_with_retry(send_one: SendOne, chat_id: int) -> str:
+    """Natija: sent | blocked | failed"""
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            await send_one(chat_id)
+            return "sent"
+        except RetryAfter as e:
+            # Limiter qayta urinishlari tugagan - Telegram aytgan vaqtcha kutish
+            await asyncio.sleep(e.retry_after + 1)
+        except Forbidden:
+            return "blocked"
+        except BadRequest as e:
+            logger.warning(f"Broadcast {chat_id}: {e}")
+            return "failed"
+        except (TimedOut, NetworkError):
+            await asyncio.sleep(2 ** attempt)
+    return "failed"
+
+
+async def deliver(state: dict, send_one: SendOne, on_progress: OnProgress, concurrency: int) -> dict:
+    """`state["pending"]` dagi barcha chatlarga yuborish; progress har PROGRESS_SECONDS da saqlanadi"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for chat_id in state["pending"]:
+        queue.put_nowait(chat_id)
+    remaining = set(state["pending"])
+
+    async def worker():
+        while True:
+            try:
+                chat_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            result = await send_with_retry(send_one, chat_id)
+            state[result] += 1
+            remaining.discard(chat_id)
+
+    async def checkpoint():
+        while True:
+            await asyncio.sleep(PROGRESS_SECONDS)
+            state["pending"] = list(remaining)
+            await on_progress(state)
+
+    started = datetime.now()
+    progress = asyncio.create_task(checkpoint())
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, queue.qsize())))))
+    finally:
+        progress.cancel()
+        state["pending"] = list(remaining)
+
+    state["finished_at"] = datetime.now().isoformat(timespec="seconds")
+    await on_progress(state)
+    elapsed = (datetime.now() - started).total_seconds()
+    logger.info(
+        f"Broadcast {state['id']} ({state['kind']}): {state['sent']}/{state['total']} "
+        f"yetkazildi, {state['blocked']} bloklangan, {state['failed']} xato, {elapsed:.1f}s"
+    )
+    return state
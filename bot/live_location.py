@@ -0,0 +1,119 @@
+"""
+Telegram live location -> LocationLog pinglari.
+
+Live location har bir necha soniyada yangilanadi (edited_message). Bot har
+bir hodim uchun oxirgi yuborilgan ping vaqtini xotirada saqlaydi va faqat
+sozlangan interval (API dagi `live_min_gap_seconds`) o'tgandagina pingni
+qabul qiladi. Qabul qilinganlar buferda yig'iladi va LIVE_FLUSH_SECONDS da
+bir marta `/api/bot/locations` ga partiya bo'lib yuboriladi; server ham xuddi
+shu intervalni tekshiradi (bir nechta bot nusxasi bo'lsa ham).
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+MAX_BUFFER = 5000
+CONFIG_TTL_SECONDS = 600
+DEFAULT_MIN_GAP_SECONDS = 60
+
+
+class LiveLocationIngestor:
+    def __init__(self, api_url: str, bot_api_token: str):
+        self.api_url = api_url
+        self.headers = {"X-Bot-Token": bot_api_token}
+        self.min_gap = DEFAULT_MIN_GAP_SECONDS
+        self._config_loaded_at = 0.0
+        self._last_accepted: Dict[int, float] = {}  # telegram_id -> epoch
+        self._buffer: List[dict] = []
+        self.received = 0
+        self.throttled = 0
+        self.sent = 0
+
+    async def refresh_config(self, client: httpx.AsyncClient) -> None:
+        if time.monotonic() - self._config_loaded_at < CONFIG_TTL_SECONDS:
+            return
+        try:
+            response = await client.get(f"{self.api_url}/api/bot/config", headers=self.headers)
+            response.raise_for_status()
+            self.min_gap = response.json()["live_min_gap_seconds"]
+            self._config_loaded_at = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Bot config olinmadi: {e}")
+
+    def offer(
+        self, telegram_id: int, latitude: float, longitude: float, at: datetime, accuracy: Optional[float] = None
+    ) -> bool:
+        """Live ping: interval o'tmagan bo'lsa tashlanadi (bazaga ham, tarmoqqa ham bormaydi)"""
+        self.received += 1
+        epoch = at.timestamp()
+        last = self._last_accepted.get(telegram_id)
+        if last is not None and epoch - last < self.min_gap:
+            self.throttled += 1
+            return False
+        self._last_accepted[telegram_id] = epoch
+        self._buffer.append({
+            "telegram_id": telegram_id,
+            "latitude": latitude,
+            "longitude": longitude,
+            "timestamp": at.isoformat(),
+            "accuracy": accuracy,
+            "live": True,
+        })
+        return True
+
+    async def _post(self, client: httpx.AsyncClient, pings: List[dict]) -> dict:
+        response = await client.post(f"{self.api_url}/api/bot/locations", json={"pings": pings}, headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+
+    async def flush(self) -> int:
+        """Buferdagi pinglarni partiyalab yuborish; xatolikda keyingi safar qayta urinadi"""
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            await self.refresh_config(client)
+            accepted = 0
+            while self._buffer:
+                batch = self._buffer[:BATCH_SIZE]
+                try:
+                    result = await self._post(client, batch)
+                except Exception as e:
+                    logger.warning(f"Lokatsiyalar yuborilmadi ({len(self._buffer)} ta buferda): {e}")
+                    # API uzoq ishlamasa xotira cheksiz o'smasligi uchun eng eskilari tashlanadi
+                    del self._buffer[:-MAX_BUFFER]
+                    break
+                del self._buffer[:len(batch)]
+                accepted += result["accepted"]
+            self.sent += accepted
+
+        # Bir kundan beri ping yubormaganlar unutiladi
+        cutoff = time.time() - 86400
+        for telegram_id in [t for t, at in self._last_accepted.items() if at < cutoff]:
+            del self._last_accepted[telegram_id]
+        return accepted
+
+    async def send_now(
+        self, telegram_id: int, latitude: float, longitude: float, at: datetime, accuracy: Optional[float] = None
+    ) -> Optional[dict]:
+        """Bir martalik lokatsiya: darhol yuboriladi (natija hodimga ko'rsatiladi)"""
+        ping = {
+            "telegram_id": telegram_id,
+            "latitude": latitude,
+            "longitude": longitude,
+            "timestamp": at.isoformat(),
+            "accuracy": accuracy,
+            "live": False,
+        }
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            try:
+                result = await self._post(client, [ping])
+            except Exception as e:
+                logger.error(f"Lokatsiya yuborilmadi: {e}")
+                return None
+        if result["accepted"]:
+            self._last_accepted[telegram_id] = at.timestamp()
+        return result["results"][0]
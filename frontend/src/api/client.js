@@ -96,6 +96,16 @@ export const usersAPI = MOCK_MODE ? {
     getPending: () => mockResponse(mockPendingUsers),
     getApproved: () => mockResponse(mockApprovedUsers),
     getAll: () => mockResponse([...mockPendingUsers, ...mockApprovedUsers]),
+    search: (q, status, after, limit = 50) => {
+        const words = (q || '').toLowerCase().split(/\s+/).filter(Boolean);
+        const pool = status === 'pending' ? mockPendingUsers
+            : status === 'approved' ? mockApprovedUsers
+            : [...mockPendingUsers, ...mockApprovedUsers];
+        const items = pool.filter(u => words.every(w =>
+            [u.full_name, u.username, String(u.telegram_id)].some(f => (f || '').toLowerCase().includes(w))
+        ));
+        return mockResponse({ items, next: null });
+    },
     approve: (userId, workStartHour, workEndHour) => {
         const user = mockPendingUsers.find(u => u.id === userId);
         if (user) {
@@ -123,6 +133,8 @@ export const usersAPI = MOCK_MODE ? {
     getPending: () => client.get('/users/pending'),
     getApproved: () => client.get('/users/approved'),
     getAll: () => client.get('/users/all'),
+    search: (q, status, after, limit = 50) =>
+        client.get('/users/search', { params: { q: q || undefined, status, after: after || undefined, limit } }),
     approve: (userId, workStartHour, workEndHour) =>
         client.post(`/users/${userId}/approve`, {
             work_start_hour: workStartHour,
@@ -150,12 +162,18 @@ export const locationsAPI = MOCK_MODE ? {
     }),
     getToday: () => mockResponse(mockTodayLocations),
     getStatus: () => mockResponse(mockTodayStatus),
+    getDelta: (since) => mockResponse({ ...mockTodayStatus, cursor: since, locations: [] }),
+    waitForUpdates: (since) => mockResponse({ ...mockTodayStatus, cursor: since, locations: [] }, 25000),
     getHistory: (dateStr) => mockResponse(mockTodayLocations),
 } : {
-    send: (latitude, longitude) =>
-        client.post('/locations/send', { latitude, longitude }),
+    send: (latitude, longitude, accuracy) =>
+        client.post('/locations/send', { latitude, longitude, accuracy }),
     getToday: () => client.get('/locations/today'),
     getStatus: () => client.get('/locations/status'),
+    getDelta: (since) => client.get('/locations/today/delta', { params: { since } }),
+    // Long-poll: server yangi ping kelguncha (yoki timeout gacha) javobni ushlab turadi
+    waitForUpdates: (since, timeout = 25) =>
+        client.get('/locations/today/wait', { params: { since, timeout }, timeout: (timeout + 10) * 1000 }),
     getHistory: (dateStr) => client.get(`/locations/history/${dateStr}`),
 };
 
@@ -164,7 +182,9 @@ export const reportsAPI = MOCK_MODE ? {
     getDaily: (dateStr) => mockResponse(mockDailyReport),
     getRange: (startDate, endDate) => mockResponse(mockMonthlyReport),
     getMonthly: (year, month) => mockResponse(mockMonthlyReport),
+    getTimeline: (dateStr) => mockResponse(null),
     adminGetUserDaily: (userId, dateStr) => mockResponse(mockDailyReport),
+    adminGetUserTimeline: (userId, dateStr) => mockResponse(null),
     adminGetUserRange: (userId, startDate, endDate) => mockResponse(mockMonthlyReport),
     adminGetTodaySummary: () => mockResponse(mockTodaySummary),
 } : {
@@ -174,8 +194,13 @@ export const reportsAPI = MOCK_MODE ? {
         client.get('/reports/range', { params: { start_date: startDate, end_date: endDate } }),
     getMonthly: (year, month) =>
         client.get('/reports/monthly', { params: { year, month } }),
+    // Ofisda / tashqarida / ping yo'q oraliqlari (serverda tayyor segmentlar)
+    getTimeline: (dateStr) =>
+        client.get('/reports/timeline', { params: { date_str: dateStr } }),
     adminGetUserDaily: (userId, dateStr) =>
         client.get(`/reports/admin/user/${userId}/daily`, { params: { date_str: dateStr } }),
+    adminGetUserTimeline: (userId, dateStr) =>
+        client.get(`/reports/admin/user/${userId}/timeline`, { params: { date_str: dateStr } }),
     adminGetUserRange: (userId, startDate, endDate) =>
         client.get(`/reports/admin/user/${userId}/range`, {
             params: { start_date: startDate, end_date: endDate },
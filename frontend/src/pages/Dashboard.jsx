@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../context/AuthContext';
 import { locationsAPI, settingsAPI } from '../api/client';
 import { MapPin, Clock, CheckCircle, XCircle, Send, RefreshCw } from 'lucide-react';
@@ -22,11 +22,45 @@ export default function Dashboard() {
     const [sending, setSending] = useState(false);
     const [error, setError] = useState('');
     const [success, setSuccess] = useState('');
+    const cursorRef = useRef(null);
+    const dateRef = useRef(null);
 
     useEffect(() => {
-        loadData();
+        let active = true;
+        loadData().then(async () => {
+            // Yangi pinglarni long-poll orqali kutish (to'liq qayta yuklamasdan)
+            while (active) {
+                try {
+                    const res = await locationsAPI.waitForUpdates(cursorRef.current);
+                    if (active) applyDelta(res.data);
+                } catch (err) {
+                    await new Promise((resolve) => setTimeout(resolve, 5000));
+                }
+            }
+        });
+        return () => { active = false; };
     }, []);
 
+    const applyDelta = (delta) => {
+        const { cursor, locations: newLocations, ...newStatus } = delta;
+        // Kun almashgan bo'lsa ro'yxat yangidan boshlanadi
+        const dayChanged = dateRef.current !== newStatus.date;
+        // Kechikkan partiya pinglari ham keladi - ro'yxat vaqt bo'yicha saralanadi.
+        // Server kursordan oldingi bir daqiqani qayta yuboradi (kech yozilgan pinglar) - ID bo'yicha takrorlar tashlanadi
+        setLocations((list) => (dayChanged
+            ? newLocations
+            : [...list, ...newLocations.filter((loc) => !list.some((item) => item.id === loc.id))]
+        ).slice().sort((a, b) => a.timestamp.localeCompare(b.timestamp)));
+        setStatus(newStatus);
+        dateRef.current = newStatus.date;
+        cursorRef.current = cursor;
+    };
+
+    const refreshDelta = async () => {
+        const res = await locationsAPI.getDelta(cursorRef.current);
+        applyDelta(res.data);
+    };
+
     const loadData = async () => {
         try {
             const [statusRes, locationsRes, settingsRes] = await Promise.all([
@@ -36,6 +70,9 @@ export default function Dashboard() {
             ]);
             setStatus(statusRes.data);
             setLocations(locationsRes.data);
+            dateRef.current = statusRes.data.date;
+            // Kursor - oxirgi yozilgan ping ID si (ObjectId hex leksikografik o'sadi)
+            cursorRef.current = locationsRes.data.reduce((max, loc) => (max && max > loc.id ? max : loc.id), null);
             setOfficeSettings(settingsRes.data);
         } catch (err) {
             setError('Ma\'lumotlarni yuklashda xatolik');
@@ -60,7 +97,8 @@ export default function Dashboard() {
                 try {
                     const res = await locationsAPI.send(
                         position.coords.latitude,
-                        position.coords.longitude
+                        position.coords.longitude,
+                        position.coords.accuracy
                     );
 
                     if (res.data.is_valid) {
@@ -69,7 +107,7 @@ export default function Dashboard() {
                         setSuccess(`⚠️ Lokatsiya qabul qilindi, lekin siz ofis hududida emassiz. Masofa: ${res.data.distance?.toFixed(0)}m`);
                     }
 
-                    loadData();
+                    refreshDelta();
                 } catch (err) {
                     setError(err.response?.data?.detail || 'Lokatsiya yuborishda xatolik');
                 } finally {
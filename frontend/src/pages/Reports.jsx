@@ -3,11 +3,15 @@ import { reportsAPI } from '../api/client';
 import { Calendar, Clock, TrendingUp, AlertCircle } from 'lucide-react';
 import { format, startOfMonth, endOfMonth, subMonths } from 'date-fns';
 
+const SEGMENT_COLORS = { office: 'bg-green-500', outside: 'bg-yellow-400', gap: 'bg-red-400' };
+const SEGMENT_LABELS = { office: 'Ofisda', outside: 'Tashqarida', gap: "Ping yo'q" };
+
 export default function Reports() {
     const [reportType, setReportType] = useState('daily');
     const [selectedDate, setSelectedDate] = useState(format(new Date(), 'yyyy-MM-dd'));
     const [selectedMonth, setSelectedMonth] = useState(format(new Date(), 'yyyy-MM'));
     const [report, setReport] = useState(null);
+    const [timeline, setTimeline] = useState(null);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState('');
 
@@ -21,8 +25,12 @@ export default function Reports() {
 
         try {
             if (reportType === 'daily') {
-                const res = await reportsAPI.getDaily(selectedDate);
+                const [res, timelineRes] = await Promise.all([
+                    reportsAPI.getDaily(selectedDate),
+                    reportsAPI.getTimeline(selectedDate),
+                ]);
                 setReport(res.data);
+                setTimeline(timelineRes.data);
             } else {
                 const [year, month] = selectedMonth.split('-').map(Number);
                 const res = await reportsAPI.getMonthly(year, month);
@@ -31,6 +39,7 @@ export default function Reports() {
         } catch (err) {
             setError(err.response?.data?.detail || 'Hisobotni yuklashda xatolik');
             setReport(null);
+            setTimeline(null);
         } finally {
             setLoading(false);
         }
@@ -156,6 +165,36 @@ export default function Reports() {
                             </div>
                         </div>
                     </div>
+
+                    {/* Timeline */}
+                    {timeline?.segments?.length > 0 && (
+                        <div className="mt-6">
+                            <p className="text-sm text-gray-500 mb-2">Kun davomida</p>
+                            <div className="flex h-4 rounded-full overflow-hidden bg-gray-100">
+                                {timeline.segments.map((segment) => {
+                                    const dayStart = new Date(timeline.work_start_time).getTime();
+                                    const dayLength = new Date(timeline.work_end_time).getTime() - dayStart || 1;
+                                    const width = (new Date(segment.end) - new Date(segment.start)) / dayLength * 100;
+                                    return (
+                                        <div
+                                            key={segment.start + segment.kind}
+                                            className={SEGMENT_COLORS[segment.kind]}
+                                            style={{ width: `${width}%` }}
+                                            title={`${SEGMENT_LABELS[segment.kind]}: ${format(new Date(segment.start), 'HH:mm')} - ${format(new Date(segment.end), 'HH:mm')}`}
+                                        />
+                                    );
+                                })}
+                            </div>
+                            <div className="flex gap-4 mt-2 text-xs text-gray-500">
+                                {Object.entries(SEGMENT_LABELS).map(([kind, label]) => (
+                                    <span key={kind} className="flex items-center gap-1">
+                                        <span className={`w-3 h-3 rounded-full ${SEGMENT_COLORS[kind]}`} />
+                                        {label}
+                                    </span>
+                                ))}
+                            </div>
+                        </div>
+                    )}
                 </div>
             )}
 
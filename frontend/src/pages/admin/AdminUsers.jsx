@@ -1,33 +1,70 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { usersAPI } from '../../api/client';
-import { UserPlus, UserMinus, Clock, Check, X, Edit2 } from 'lucide-react';
+import { UserPlus, UserMinus, Clock, Check, X, Edit2, Search } from 'lucide-react';
+
+const PAGE_SIZE = 50;
+const SEARCH_DELAY_MS = 300;
 
 export default function AdminUsers() {
     const [tab, setTab] = useState('pending');
+    const [query, setQuery] = useState('');
     const [pendingUsers, setPendingUsers] = useState([]);
     const [approvedUsers, setApprovedUsers] = useState([]);
+    // Keyingi sahifa kursori (`next`), null - boshqa sahifa yo'q
+    const [pendingNext, setPendingNext] = useState(null);
+    const [approvedNext, setApprovedNext] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [approvalModal, setApprovalModal] = useState(null);
     const [editModal, setEditModal] = useState(null);
     const [workHours, setWorkHours] = useState({ start: 9, end: 18 });
+    // Har bir loadUsers raqami: eski so'rov javobi yangisining ustiga yozilmasin
+    const requestSeq = useRef(0);
 
     useEffect(() => {
-        loadUsers();
-    }, []);
+        const timer = setTimeout(() => loadUsers(), SEARCH_DELAY_MS);
+        return () => clearTimeout(timer);
+    }, [query]);
 
     const loadUsers = async () => {
-        setLoading(true);
+        const seq = ++requestSeq.current;
         try {
             const [pendingRes, approvedRes] = await Promise.all([
-                usersAPI.getPending(),
-                usersAPI.getApproved(),
+                usersAPI.search(query, 'pending', null, PAGE_SIZE),
+                usersAPI.search(query, 'approved', null, PAGE_SIZE),
             ]);
-            setPendingUsers(pendingRes.data);
-            setApprovedUsers(approvedRes.data);
+            if (seq !== requestSeq.current) return;
+            setPendingUsers(pendingRes.data.items);
+            setPendingNext(pendingRes.data.next);
+            setApprovedUsers(approvedRes.data.items);
+            setApprovedNext(approvedRes.data.next);
         } catch (err) {
             console.error('Error loading users:', err);
         } finally {
-            setLoading(false);
+            if (seq === requestSeq.current) setLoading(false);
+        }
+    };
+
+    const loadMore = async () => {
+        const after = tab === 'pending' ? pendingNext : approvedNext;
+        if (!after) return;
+        const seq = requestSeq.current;
+        setLoadingMore(true);
+        try {
+            const res = await usersAPI.search(query, tab, after, PAGE_SIZE);
+            // Shu orada ro'yxat boshqa so'rov bilan qayta yuklangan
+            if (seq !== requestSeq.current) return;
+            if (tab === 'pending') {
+                setPendingUsers((users) => [...users, ...res.data.items]);
+                setPendingNext(res.data.next);
+            } else {
+                setApprovedUsers((users) => [...users, ...res.data.items]);
+                setApprovedNext(res.data.next);
+            }
+        } catch (err) {
+            console.error('Error loading users:', err);
+        } finally {
+            setLoadingMore(false);
         }
     };
 
@@ -87,6 +124,19 @@ export default function AdminUsers() {
         <div className="space-y-6">
             <h1 className="text-2xl font-bold text-gray-900">Hodimlarni boshqarish</h1>
 
+            {/* Search */}
+            <div className="relative">
+                <Search className="w-5 h-5 absolute left-3 top-1/2 -translate-y-1/2 text-gray-400" />
+                <input
+                    type="text"
+                    value={query}
+                    onChange={(e) => setQuery(e.target.value)}
+                    placeholder="Ism, username yoki Telegram ID bo'yicha qidirish"
+                    maxLength={100}
+                    className="w-full pl-10 pr-4 py-2 border border-gray-300 rounded-lg"
+                />
+            </div>
+
             {/* Tabs */}
             <div className="flex gap-4 border-b">
                 <button
@@ -96,7 +146,7 @@ export default function AdminUsers() {
                             : 'border-transparent text-gray-500 hover:text-gray-700'
                         }`}
                 >
-                    Kutish ro'yxati ({pendingUsers.length})
+                    Kutish ro'yxati ({pendingUsers.length}{pendingNext ? '+' : ''})
                 </button>
                 <button
                     onClick={() => setTab('approved')}
@@ -105,7 +155,7 @@ export default function AdminUsers() {
                             : 'border-transparent text-gray-500 hover:text-gray-700'
                         }`}
                 >
-                    Tasdiqlangan ({approvedUsers.length})
+                    Tasdiqlangan ({approvedUsers.length}{approvedNext ? '+' : ''})
                 </button>
             </div>
 
@@ -115,7 +165,7 @@ export default function AdminUsers() {
                     {pendingUsers.length === 0 ? (
                         <div className="p-8 text-center text-gray-500">
                             <UserPlus className="w-12 h-12 mx-auto mb-4 text-gray-300" />
-                            <p>Kutish ro'yxati bo'sh</p>
+                            <p>{query ? 'Hech narsa topilmadi' : "Kutish ro'yxati bo'sh"}</p>
                         </div>
                     ) : (
                         <div className="divide-y">
@@ -162,7 +212,7 @@ export default function AdminUsers() {
                     {approvedUsers.length === 0 ? (
                         <div className="p-8 text-center text-gray-500">
                             <UserMinus className="w-12 h-12 mx-auto mb-4 text-gray-300" />
-                            <p>Tasdiqlangan hodimlar yo'q</p>
+                            <p>{query ? 'Hech narsa topilmadi' : "Tasdiqlangan hodimlar yo'q"}</p>
                         </div>
                     ) : (
                         <div className="divide-y">
@@ -204,6 +254,18 @@ export default function AdminUsers() {
                 </div>
             )}
 
+            {(tab === 'pending' ? pendingNext : approvedNext) && (
+                <div className="text-center">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="px-4 py-2 border border-gray-300 rounded-lg hover:bg-gray-50 disabled:opacity-50"
+                    >
+                        {loadingMore ? 'Yuklanmoqda...' : "Ko'proq yuklash"}
+                    </button>
+                </div>
+            )}
+
             {/* Approval Modal */}
             {approvalModal && (
                 <div className="fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center z-50">